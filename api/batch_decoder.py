@@ -0,0 +1,304 @@
+import logging
+import math
+import os
+import queue
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import HOP_LENGTH, N_FRAMES, SAMPLE_RATE
+from whisper.tokenizer import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = N_FRAMES * HOP_LENGTH / SAMPLE_RATE  # 30 s
+TIME_PRECISION = 0.02  # Resolução dos tokens de timestamp do Whisper
+
+# Mesmos limiares usados por whisper.transcribe para descartar janelas sem fala
+# e para decodificar de novo, em temperatura maior, janelas com repetição
+# (compression ratio alto) ou baixa confiança
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+BEST_OF = int(os.getenv("DECODE_BEST_OF", 5))  # Amostras por janela nas temperaturas > 0
+
+
+def needs_fallback(result) -> bool:
+    """Mesmo critério de whisper.transcribe para tentar a janela na próxima temperatura"""
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return False  # Silêncio: a janela é descartada, não decodificada de novo
+    return (result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+            or result.avg_logprob < LOGPROB_THRESHOLD)
+
+
+class DecodeJob:
+    """
+    Estado de uma transcrição dentro do BatchScheduler.
+
+    O scheduler não executa código das tarefas: a cada janela decodificada
+    ele coloca (segmentos novos, fração concluída) em events, e a thread da
+    própria tarefa chama os callbacks. None em events marca o fim.
+    """
+
+    def __init__(self, job_id: str, mel: torch.Tensor, duration: float,
+                 language: Optional[str], task: str):
+        self.job_id = job_id
+        self.mel = mel
+        self.duration = duration
+        self.language = language
+        self.task = task
+        self.n_windows = max(1, math.ceil(duration / WINDOW_SECONDS))
+        self.next_window = 0
+        self.retries: List[tuple] = []  # (janela, índice em TEMPERATURES) para nova tentativa
+        self.emitted_windows = 0
+        self.window_segments: Dict[int, List[Dict]] = {}
+        self.error: Optional[Exception] = None
+        self.events: "queue.Queue[Optional[tuple]]" = queue.Queue()
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.retries) or self.next_window < self.n_windows
+
+    def peek(self) -> tuple:
+        """Próxima (janela, temperatura) a decodificar; novas tentativas vêm primeiro"""
+        return self.retries[0] if self.retries else (self.next_window, 0)
+
+    def take(self) -> tuple:
+        if self.retries:
+            return self.retries.pop(0)
+        self.next_window += 1
+        return self.next_window - 1, 0
+
+    def window_mel(self, index: int) -> torch.Tensor:
+        start = index * N_FRAMES
+        return whisper.pad_or_trim(self.mel[:, start:start + N_FRAMES], N_FRAMES)
+
+    def segments(self) -> List[Dict]:
+        """Segmentos de todas as janelas, em ordem e no tempo absoluto"""
+        return [seg for i in range(self.n_windows) for seg in self.window_segments.get(i, [])]
+
+    def take_ready(self) -> List[Dict]:
+        """Segmentos, em ordem, das janelas contíguas ainda não entregues"""
+        ready = []
+        while self.emitted_windows in self.window_segments:
+            ready.extend(self.window_segments[self.emitted_windows])
+            self.emitted_windows += 1
+        return ready
+
+
+class BatchScheduler:
+    """
+    Agrupa janelas de 30 s de várias transcrições concorrentes em um único
+    batch do encoder/decoder do Whisper.
+
+    Cada janela é decodificada de forma independente (passo fixo de 30 s,
+    sem condicionar no texto anterior), o que permite misturar janelas de
+    tarefas diferentes no mesmo batch. Janelas só são agrupadas quando
+    compartilham idioma e tarefa; o idioma de tarefas "auto" é detectado
+    uma vez, na primeira janela. Janelas reprovadas por needs_fallback
+    voltam à fila e são decodificadas em um batch seguinte, na próxima
+    temperatura de TEMPERATURES, como no whisper.transcribe.
+    """
+
+    def __init__(self, model, batch_size: int = 16, fp16: bool = False):
+        self.model = model
+        self.batch_size = batch_size
+        self.fp16 = fp16
+        self._jobs: "OrderedDict[str, DecodeJob]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._turn = 0  # Próximo idioma/tarefa a formar um batch (round-robin)
+        self._thread = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+        self._thread.start()
+
+    def transcribe(self, job_id: str, audio: np.ndarray, language: Optional[str] = None,
+                   task: str = "transcribe",
+                   on_progress: Optional[Callable[[float], None]] = None,
+                   on_segments: Optional[Callable[[List[Dict]], None]] = None) -> Dict:
+        """
+        Enfileira o áudio e bloqueia até todas as janelas serem decodificadas.
+        on_segments recebe os segmentos novos, em ordem, assim que cada janela
+        (e todas as anteriores) termina. Os callbacks rodam na thread que chamou
+        transcribe; se um deles levantar exceção, as janelas restantes da
+        tarefa são descartadas e a exceção é repassada.
+        """
+        if not self.model.is_multilingual:
+            language = "en"
+        mel = whisper.log_mel_spectrogram(audio, self.model.dims.n_mels)
+        job = DecodeJob(job_id, mel, len(audio) / SAMPLE_RATE, language, task)
+        with self._cond:
+            self._jobs[job_id] = job
+            self._cond.notify()
+
+        try:
+            for segments, fraction in iter(job.events.get, None):
+                if segments and on_segments:
+                    on_segments(segments)
+                if on_progress:
+                    on_progress(fraction)
+        except BaseException:
+            self.cancel(job_id)
+            raise
+        if job.error is not None:
+            raise job.error
+        return {"language": job.language, "segments": job.segments()}
+
+    def cancel(self, job_id: str):
+        """Descarta as janelas ainda não decodificadas da tarefa"""
+        with self._cond:
+            job = self._jobs.pop(job_id, None)
+            if job is not None:
+                job.next_window = job.n_windows
+                job.retries.clear()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and not any(job.pending for job in self._jobs.values()):
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                jobs = [job for job in self._jobs.values() if job.pending]
+
+            undetected = [job for job in jobs if job.language is None]
+            if undetected:
+                self._guard(undetected, self._detect_languages, undetected[:self.batch_size])
+                continue
+
+            batch = self._next_batch(jobs)
+            self._guard([item[0] for item in batch], self._decode_batch, batch)
+
+    def _guard(self, jobs: List[DecodeJob], func, arg):
+        """Executa func; em caso de erro, falha apenas as tarefas envolvidas"""
+        try:
+            with torch.no_grad():
+                func(arg)
+        except Exception as e:
+            logger.error(f"Erro no batch de decodificação: {str(e)}")
+            for job in set(jobs):
+                job.error = e
+                self._finish(job)
+
+    def _next_batch(self, jobs: List[DecodeJob]) -> List[tuple]:
+        """
+        Seleciona até batch_size janelas do mesmo idioma/tarefa/temperatura,
+        alternando entre as tarefas (round-robin) para que nenhuma fique sem
+        andamento. O idioma/tarefa do batch também alterna a cada chamada,
+        para que uma tarefa longa não segure as de outros idiomas.
+        Retorna itens (tarefa, janela, índice da temperatura).
+        """
+        groups = list(OrderedDict.fromkeys((job.language, job.task) for job in jobs))
+        group = groups[self._turn % len(groups)]
+        self._turn += 1
+        candidates = [job for job in jobs if (job.language, job.task) == group]
+        key = (*group, candidates[0].peek()[1])
+        batch = []
+        added = True
+        while len(batch) < self.batch_size and added:
+            added = False
+            for job in candidates:
+                if len(batch) < self.batch_size and job.pending and job.peek()[1] == key[2]:
+                    batch.append((job, *job.take()))
+                    added = True
+        return batch
+
+    def _detect_languages(self, jobs: List[DecodeJob]):
+        mel = torch.stack([job.window_mel(0) for job in jobs]).to(self.model.device)
+        if self.fp16:
+            mel = mel.half()
+        _, probs = self.model.detect_language(mel)
+        for job, job_probs in zip(jobs, probs):
+            job.language = max(job_probs, key=job_probs.get)
+            logger.info(f"Idioma detectado para {job.job_id}: {job.language}")
+
+    def _decode_batch(self, batch: List[tuple]):
+        language, task = batch[0][0].language, batch[0][0].task
+        attempt = batch[0][2]
+        temperature = TEMPERATURES[attempt]
+        mel = torch.stack([job.window_mel(index) for job, index, _ in batch]).to(self.model.device)
+        if self.fp16:
+            mel = mel.half()
+
+        options = whisper.DecodingOptions(
+            language=language,
+            task=task,
+            temperature=temperature,
+            best_of=BEST_OF if temperature > 0 else None,
+            fp16=self.fp16,
+            without_timestamps=False
+        )
+        results = whisper.decode(self.model, mel, options)
+        tokenizer = get_tokenizer(
+            self.model.is_multilingual,
+            num_languages=self.model.num_languages,
+            language=language,
+            task=task
+        )
+
+        for (job, index, _), result in zip(batch, results):
+            if needs_fallback(result) and attempt + 1 < len(TEMPERATURES):
+                # Repetição ou baixa confiança: a janela volta em um próximo batch, na temperatura seguinte
+                job.retries.append((index, attempt + 1))
+                continue
+            offset = index * WINDOW_SECONDS
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                segments = []
+            else:
+                window_end = min(WINDOW_SECONDS, job.duration - offset)
+                segments = tokens_to_segments(tokenizer, result.tokens, offset, window_end)
+            job.window_segments[index] = segments
+            job.events.put((job.take_ready(), len(job.window_segments) / job.n_windows))
+            if len(job.window_segments) == job.n_windows:
+                self._finish(job)
+
+    def _finish(self, job: DecodeJob):
+        with self._cond:
+            self._jobs.pop(job.job_id, None)
+        job.events.put(None)
+
+
+def tokens_to_segments(tokenizer, tokens: List[int], offset: float, window_end: float) -> List[Dict]:
+    """
+    Converte os tokens de uma janela em segmentos usando os tokens de
+    timestamp (<|t|> texto <|t|>). Tempos são deslocados por offset.
+    """
+    segments = []
+    start = None
+    text_tokens = []
+
+    def add_segment(seg_start, seg_end):
+        text = tokenizer.decode(text_tokens).strip()
+        if text:
+            segments.append({
+                "start": round(offset + seg_start, 3),
+                "end": round(offset + max(seg_start, seg_end), 3),
+                "text": text
+            })
+
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            timestamp = min((token - tokenizer.timestamp_begin) * TIME_PRECISION, window_end)
+            if start is not None and text_tokens:
+                add_segment(start, timestamp)
+                text_tokens = []
+                start = None
+            else:
+                start = timestamp
+        elif token < tokenizer.eot:
+            text_tokens.append(token)
+
+    # Segmento sem timestamp final vai até o fim da janela
+    if text_tokens:
+        add_segment(start or 0.0, window_end)
+
+    return segments
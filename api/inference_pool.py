@@ -0,0 +1,544 @@
+import gc
+import logging
+import multiprocessing
+import os
+import json
+import socket
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import librosa
+import numpy as np
+import psutil
+import torch
+import whisper
+from dotenv import load_dotenv
+
+from batch_decoder import BatchScheduler
+from job_store import JobStore, LeaseKeeper, LeaseLost, STATUS_ERROR
+from result_log import ResultLog, ResultWriter
+
+# Módulos compartilhados com o aplicativo (pasta src na raiz do repositório)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from src.cache.transcription_cache import TranscriptionCache, fingerprint_file
+from src.cache.translation_cache import TranslationCache
+from src.translation.translator import create_translator
+from src.translation.pipeline import TranslationPipeline
+from src.models.quantization import CPU_PRECISION, load_quantized_whisper
+from src.models.checkpoint_cache import load_mmap_whisper
+from src.audio_processing.audio_stream import load_audio_stream
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Configuração de hardware
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"  # Redefinido por slot em slot_main
+NUM_THREADS = psutil.cpu_count(logical=False)  # Usar número de cores físicos
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", 16))  # Janelas de 30 s por batch do decoder
+SLOT_CONCURRENT_JOBS = int(os.getenv("SLOT_CONCURRENT_JOBS", 4))  # Tarefas que compartilham os batches de um slot
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", 4))  # Threads para processamento PyTorch
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "large-v3")
+
+# Configuração básica
+UPLOAD_DIR = Path("uploads")
+MODELS_DIR = Path("models/whisper")
+RESULTS_DIR = Path("results")
+
+for directory in [UPLOAD_DIR, MODELS_DIR, RESULTS_DIR]:
+    directory.mkdir(parents=True, exist_ok=True)
+
+logger = logging.getLogger(__name__)
+
+job_store = JobStore(
+    os.getenv("JOB_DB_PATH", "jobs.db"),
+    lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", 60)),
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+)
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2))
+# Segmentos gravados à medida que são decodificados (GET /results/{task_id}?since=N)
+result_log = ResultLog(RESULTS_DIR)
+
+# Cache de transcrições por conteúdo do áudio, compartilhado pelos slots
+CACHE_DIR = Path(os.getenv("CACHE_DIR", "cache"))
+transcription_cache = TranscriptionCache(
+    CACHE_DIR / "transcriptions.db",
+    max_size_mb=int(os.getenv("TRANSCRIPTION_CACHE_MB", 512))
+)
+# Memória de traduções (idioma fonte, idioma alvo, texto), compartilhada com o aplicativo
+translation_cache = TranslationCache(
+    CACHE_DIR / "translations.db",
+    max_size_mb=int(os.getenv("TRANSLATION_CACHE_MB", 128))
+)
+# Tradutor compartilhado pelas tarefas do slot (TRANSLATION_BACKEND=google|local).
+# No Google: mesmo limitador de taxa e textos iguais de tarefas simultâneas viram
+# uma única requisição; no local: o modelo é carregado uma vez por slot
+translator = create_translator(cache=translation_cache)
+# Opções que afetam o resultado; mudanças aqui invalidam o cache
+DECODE_OPTIONS = {"task": "transcribe", "decoder": "batch-30s", "preprocess": "hpss", "timestamps": True,
+                  "temperature_fallback": True}
+
+def get_inference_slots() -> List[str]:
+    """
+    Retorna os dispositivos dos slots de inferência.
+    Cada slot é um processo com uma única instância do modelo.
+    Ex.: INFERENCE_SLOTS=cuda:0,cuda:1 ou INFERENCE_SLOTS=cpu,cpu
+    """
+    slots = os.getenv("INFERENCE_SLOTS")
+    if slots:
+        return [s.strip() for s in slots.split(",") if s.strip()]
+    if torch.cuda.is_available():
+        return [f"cuda:{i}" for i in range(torch.cuda.device_count())]
+    return ["cpu"]
+
+# Gerenciamento de Memória
+def clear_gpu_memory():
+    """Limpa memória GPU"""
+    if DEVICE.startswith("cuda"):
+        torch.cuda.empty_cache()
+        gc.collect()
+
+# Carregamento otimizado do modelo
+class WhisperManager:
+    _instance = None
+    _lock = threading.Lock()
+    
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+                cls._instance.model = None
+                cls._instance.scheduler = None
+            return cls._instance
+    
+    def get_model(self):
+        with self._lock:
+            if self.model is None:
+                logger.info(f"Carregando modelo Whisper {WHISPER_MODEL} em {DEVICE}...")
+                if DEVICE == "cpu" and CPU_PRECISION == "int8":
+                    # Slots de CPU podem usar o modelo int8, quantizado uma vez e salvo em MODELS_DIR
+                    self.model = load_quantized_whisper(
+                        WHISPER_MODEL,
+                        lambda: self._load_weights("cpu"),
+                        MODELS_DIR
+                    )
+                else:
+                    self.model = self._load_weights(DEVICE)
+            return self.model
+    
+    @staticmethod
+    def _load_weights(device: str):
+        """
+        Carrega os pesos do checkpoint mapeado em memória (convertido uma vez
+        em MODELS_DIR): todos os slots compartilham as páginas do arquivo.
+        """
+        try:
+            return load_mmap_whisper(WHISPER_MODEL, device, MODELS_DIR, download_root=str(MODELS_DIR))
+        except Exception as e:
+            logger.warning(f"Checkpoint mapeado indisponível ({e}), usando whisper.load_model")
+            return whisper.load_model(WHISPER_MODEL, device=device, download_root=str(MODELS_DIR))
+    
+    def get_scheduler(self) -> BatchScheduler:
+        """Scheduler único do slot: todas as tarefas compartilham os batches do modelo"""
+        model = self.get_model()
+        with self._lock:
+            if self.scheduler is None:
+                self.scheduler = BatchScheduler(
+                    model,
+                    batch_size=BATCH_SIZE,
+                    fp16=DEVICE.startswith("cuda")
+                )
+            return self.scheduler
+
+def optimize_audio(audio_data: np.ndarray, sr: int) -> np.ndarray:
+    """Otimiza o áudio para processamento"""
+    # Redução de ruído
+    y_cleaned = librosa.effects.preemphasis(audio_data)
+    
+    # Separação de voz usando decomposição harmônica-percussiva
+    y_harmonic, _ = librosa.effects.hpss(y_cleaned)
+    
+    # Normalização
+    y_normalized = librosa.util.normalize(y_harmonic)
+    
+    return y_normalized
+
+def process_audio_chunk(chunk: np.ndarray, sr: int) -> np.ndarray:
+    """Processa um chunk de áudio em paralelo"""
+    return optimize_audio(chunk, sr)
+
+def process_audio(audio_path: str) -> np.ndarray:
+    """Processa o áudio usando múltiplos threads e retorna as amostras float32 a 16 kHz"""
+    logger.info("Processando áudio para melhorar qualidade...")
+    
+    # Carregar o áudio; FLAC/Ogg enviados em streaming são decodificados pelo ffmpeg
+    # (o FLAC de um pipe não tem a duração no cabeçalho)
+    if Path(audio_path).suffix.lower() in (".flac", ".ogg"):
+        y, sr = load_audio_stream(audio_path), 16000
+    else:
+        y, sr = librosa.load(audio_path, sr=16000)
+    
+    # Dividir em chunks para processamento paralelo
+    chunk_size = len(y) // NUM_THREADS
+    chunks = [y[i:i + chunk_size] for i in range(0, len(y), chunk_size)]
+    
+    # Processar chunks em paralelo
+    with ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
+        processed_chunks = list(executor.map(
+            lambda x: process_audio_chunk(x, sr),
+            chunks
+        ))
+    
+    # Combinar chunks processados
+    y_processed = np.concatenate(processed_chunks)
+    
+    # O áudio processado segue em memória para o Whisper, sem WAV intermediário
+    return y_processed.astype(np.float32)
+
+def model_name() -> str:
+    """Nome do modelo do slot, incluindo a precisão quando roda em int8 na CPU"""
+    if DEVICE == "cpu" and CPU_PRECISION == "int8":
+        return f"{WHISPER_MODEL}-int8"
+    return WHISPER_MODEL
+
+def process_transcription(
+    file_path: str,
+    task_id: str,
+    source_lang: str,
+    target_lang: str,
+    worker_id: str,
+    checkpoint: Dict = None,
+    lease_lost: threading.Event = None
+):
+    """
+    Transcreve e traduz a tarefa. lease_lost (LeaseKeeper.lost) é conferido
+    a cada progresso e antes de cada etapa: sem o lease, a tarefa pode estar
+    com outro worker, e esta tentativa para sem gravar mais nada.
+    """
+    whisper_manager = WhisperManager()
+    checkpoint = checkpoint or {}
+    transcription_path = RESULTS_DIR / f"{task_id}_transcription.json"
+    partial = ResultWriter(result_log, task_id)
+    
+    def check_lease():
+        if lease_lost is not None and lease_lost.is_set():
+            raise LeaseLost(f"Lease da tarefa {task_id} perdido pelo worker {worker_id}")
+    
+    def update_progress(progress):
+        check_lease()
+        if not job_store.update_progress(task_id, worker_id, progress):
+            raise LeaseLost(f"Tarefa {task_id} não pertence mais ao worker {worker_id}")
+    
+    def on_translated(translations):
+        check_lease()
+        partial.add_translations(translations)
+    
+    # Tradução concorrente com o Whisper: cada janela decodificada já entra na fila
+    # do tradutor, e ao fim da transcrição só resta traduzir as últimas janelas
+    needs_translation = target_lang != source_lang and target_lang != "auto"
+    pipeline = TranslationPipeline(
+        translator, target_lang[:2], source_lang,
+        on_translated=on_translated,
+        on_progress=lambda done, total: update_progress(min(95, 70 + 25 * done / total))
+    ) if needs_translation else None
+    
+    def on_segments(new_segments):
+        check_lease()
+        partial.add_segments(new_segments)
+        if pipeline:
+            pipeline.submit([seg["text"].strip() for seg in new_segments])
+    
+    try:
+        update_progress(10)
+        
+        if checkpoint.get("stage") == "transcribed" and transcription_path.exists():
+            # Retomar a partir da transcrição salva por uma tentativa anterior
+            logger.info(f"Retomando task {task_id} a partir da transcrição salva")
+            with open(transcription_path, 'r', encoding='utf-8') as f:
+                segments = json.load(f)
+        else:
+            # Consultar o cache antes de decodificar: o mesmo arquivo enviado de novo não roda o Whisper
+            fingerprint = fingerprint_file(file_path)
+            cache_key = TranscriptionCache.make_key(fingerprint, model_name(), source_lang, DECODE_OPTIONS)
+            result = transcription_cache.get(cache_key)
+            
+            if result is not None:
+                logger.info(f"Transcrição da task {task_id} encontrada no cache")
+            else:
+                # Processar áudio
+                audio = process_audio(file_path)
+                update_progress(30)
+                
+                # Transcrição: as janelas de 30 s entram nos batches compartilhados do slot
+                logger.info(f"Iniciando transcrição para task {task_id}")
+                result = whisper_manager.get_scheduler().transcribe(
+                    task_id,
+                    audio,
+                    language=source_lang if source_lang != "auto" else None,
+                    task="transcribe",
+                    on_progress=lambda fraction: update_progress(30 + 40 * fraction),
+                    on_segments=on_segments
+                )
+                transcription_cache.put(
+                    cache_key, result, fingerprint=fingerprint, model=model_name(), language=source_lang
+                )
+            segments = result["segments"]
+            # Do cache os segmentos chegam todos de uma vez (já gravados quando decodificados agora)
+            on_segments(segments[partial.next_index:])
+            
+            # Checkpoint: uma nova tentativa não precisa repetir o Whisper
+            check_lease()
+            with open(transcription_path, 'w', encoding='utf-8') as f:
+                json.dump(segments, f, ensure_ascii=False)
+            job_store.save_checkpoint(task_id, worker_id, {"stage": "transcribed"})
+            
+            # Limpar GPU após transcrição
+            clear_gpu_memory()
+        
+        update_progress(70)
+        
+        # Esperar a tradução do que ainda está na fila. Numa tarefa retomada do
+        # checkpoint os segmentos entram todos aqui (o cache evita repetir o que já foi traduzido)
+        texts = [seg["text"].strip() for seg in segments]
+        if pipeline:
+            pipeline.submit(texts[len(pipeline.texts):])
+            translated_texts = pipeline.close()
+        else:
+            translated_texts = texts
+
+        subtitles = [
+            {"timestamp": seg["start"], "text": text}
+            for seg, text in zip(segments, translated_texts)
+        ]
+        
+        if needs_translation:
+            stats = translation_cache.stats()
+            logger.info(f"Cache de traduções: {stats['hits']} acertos, {stats['misses']} faltas "
+                        f"({stats['hit_rate']:.0%}), {stats['entries']} entradas")
+        
+        # Salvar resultado
+        check_lease()
+        result_path = RESULTS_DIR / f"{task_id}_result.json"
+        with open(result_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "task_id": task_id,
+                "status": "completed",
+                "subtitles": subtitles,
+                "metadata": {
+                    "source_language": source_lang,
+                    "target_language": target_lang,
+                    "processing_device": DEVICE,
+                    "model": model_name()
+                }
+            }, f, ensure_ascii=False, indent=2)
+        
+        if job_store.complete(task_id, worker_id):
+            _remove_files(file_path, transcription_path)
+        else:
+            logger.warning(f"Task {task_id} concluída após perda do lease")
+            
+    except LeaseLost as e:
+        # Outro worker reprocessa a tarefa; nada de falha, resultado ou remoção de arquivos aqui
+        logger.warning(f"{str(e)}; abandonando a tentativa")
+        if pipeline:
+            pipeline.abort()
+    except Exception as e:
+        logger.error(f"Erro no processamento: {str(e)}")
+        if pipeline:
+            pipeline.abort()
+        job_store.fail(task_id, worker_id, str(e))
+        
+        job = job_store.get(task_id)
+        if job and job["status"] == STATUS_ERROR:
+            # Sem novas tentativas: salvar erro e liberar arquivos
+            with open(RESULTS_DIR / f"{task_id}_result.json", 'w', encoding='utf-8') as f:
+                json.dump({
+                    "task_id": task_id,
+                    "status": "error",
+                    "error": str(e)
+                }, f)
+            _remove_files(file_path, transcription_path)
+    finally:
+        # Limpar memória
+        clear_gpu_memory()
+
+def _remove_files(*paths):
+    """Remove arquivos temporários ignorando os que já não existem"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _slot_info(slot_id: int) -> Dict:
+    """Informações do slot publicadas para o endpoint /health"""
+    info = {"slot": slot_id, "device": DEVICE, "model": WHISPER_MODEL, "pid": os.getpid()}
+    if DEVICE.startswith("cuda"):
+        try:
+            index = torch.device(DEVICE).index or 0
+            total = torch.cuda.get_device_properties(index).total_memory
+            allocated = torch.cuda.memory_allocated(index)
+            info["gpu_memory"] = {
+                "total": total,
+                "allocated": allocated,
+                "available": total - allocated
+            }
+        except Exception:
+            pass
+    return info
+
+def slot_main(slot_id: int, device: str, torch_threads: int, stop_event):
+    """Loop principal de um slot: carrega o modelo uma vez e consome a fila"""
+    global DEVICE
+    DEVICE = device
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('subtitle_server.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+    # Configurar PyTorch
+    torch.set_num_threads(torch_threads)
+    if DEVICE.startswith("cuda"):
+        torch.cuda.set_device(torch.device(DEVICE))
+        torch.backends.cudnn.benchmark = True
+        torch.backends.cudnn.deterministic = False
+
+    slot_worker_id = f"{socket.gethostname()}:{os.getpid()}:slot{slot_id}"
+    logger.info(f"Slot {slot_id} iniciado em {DEVICE} ({torch_threads} threads)")
+
+    # Carregar modelo antes de aceitar tarefas
+    WhisperManager().get_scheduler()
+
+    # Publicar estado do slot periodicamente, inclusive durante tarefas longas
+    def publish_info():
+        while not stop_event.is_set():
+            try:
+                job_store.register_worker(slot_worker_id, _slot_info(slot_id))
+            except Exception as e:
+                logger.warning(f"Erro ao publicar estado do slot {slot_id}: {str(e)}")
+            stop_event.wait(10)
+
+    threading.Thread(target=publish_info, daemon=True).start()
+
+    # Várias tarefas por slot, todas alimentando o mesmo BatchScheduler
+    job_threads = [
+        threading.Thread(
+            target=_job_loop,
+            args=(slot_id, f"{slot_worker_id}:{n}", stop_event),
+            daemon=True
+        )
+        for n in range(SLOT_CONCURRENT_JOBS)
+    ]
+    for thread in job_threads:
+        thread.start()
+    for thread in job_threads:
+        thread.join()
+
+    job_store.remove_worker(slot_worker_id)
+
+def _job_loop(slot_id: int, worker_id: str, stop_event):
+    """Reserva e processa tarefas da fila até o slot ser encerrado"""
+    while not stop_event.is_set():
+        try:
+            job = job_store.claim(worker_id)
+        except Exception as e:
+            logger.error(f"Erro ao reservar tarefa: {str(e)}")
+            job = None
+
+        if job is None:
+            stop_event.wait(JOB_POLL_INTERVAL)
+            continue
+
+        payload = job["payload"]
+        logger.info(f"Slot {slot_id} processando task {job['id']} (tentativa {job['attempts']})")
+        try:
+            with LeaseKeeper(job_store, job["id"], worker_id) as keeper:
+                process_transcription(
+                    payload["file_path"],
+                    job["id"],
+                    payload["source_language"],
+                    payload["target_language"],
+                    worker_id=worker_id,
+                    checkpoint=job["checkpoint"],
+                    lease_lost=keeper.lost
+                )
+        except Exception as e:
+            # Ex.: job_store.fail ou o heartbeat com o banco travado. A thread
+            # continua; a tarefa volta para a fila quando o lease expirar
+            logger.error(f"Erro inesperado na task {job['id']} (slot {slot_id}): {str(e)}")
+
+class InferencePool:
+    """
+    Pool de processos de inferência, independente dos workers HTTP.
+
+    Os workers HTTP apenas enfileiram tarefas no JobStore; cada slot deste
+    pool mantém uma única cópia do modelo e consome a fila. O uso de memória
+    fica limitado ao número de slots, não ao número de workers HTTP.
+    Slots que morrerem são reiniciados; suas tarefas voltam para a fila
+    quando o lease expira.
+    """
+
+    def __init__(self, devices: List[str] = None):
+        self.devices = devices or get_inference_slots()
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop_event = self._ctx.Event()
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        cpu_slots = sum(1 for d in self.devices if d == "cpu") or 1
+        self._cpu_threads = max(1, TORCH_THREADS // cpu_slots)
+
+    def _start_slot(self, slot_id: int):
+        device = self.devices[slot_id]
+        threads = self._cpu_threads if device == "cpu" else TORCH_THREADS
+        process = self._ctx.Process(
+            target=slot_main,
+            args=(slot_id, device, threads, self._stop_event),
+            name=f"inference-slot-{slot_id}",
+            daemon=True
+        )
+        process.start()
+        self._processes[slot_id] = process
+
+    def start(self):
+        logger.info(f"Iniciando pool de inferência com slots: {self.devices}")
+        for slot_id in range(len(self.devices)):
+            self._start_slot(slot_id)
+        return self
+
+    def supervise(self, interval: float = 5):
+        """Reinicia slots que morreram até o pool ser encerrado"""
+        while not self._stop_event.is_set():
+            for slot_id, process in list(self._processes.items()):
+                if not process.is_alive():
+                    logger.error(f"Slot {slot_id} encerrou (exit code {process.exitcode}), reiniciando...")
+                    self._start_slot(slot_id)
+            self._stop_event.wait(interval)
+
+    def start_supervisor(self):
+        threading.Thread(target=self.supervise, daemon=True).start()
+        return self
+
+    def stop(self, timeout: float = 30):
+        self._stop_event.set()
+        for process in self._processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+if __name__ == "__main__":
+    # Permite executar o pool em máquinas separadas do servidor HTTP
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    pool = InferencePool().start()
+    try:
+        pool.supervise()
+    except KeyboardInterrupt:
+        pool.stop()
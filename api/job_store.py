@@ -0,0 +1,300 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Estados possíveis de uma tarefa
+STATUS_QUEUED = "queued"
+STATUS_PROCESSING = "processing"
+STATUS_COMPLETED = "completed"
+STATUS_ERROR = "error"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    checkpoint TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    lease_owner TEXT,
+    lease_expires REAL,
+    revision INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    info TEXT NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+
+class JobStore:
+    """
+    Fila de tarefas persistente em SQLite (modo WAL), compartilhada por
+    todos os workers do servidor.
+
+    Cada tarefa é reservada por um worker através de um lease com prazo de
+    validade. Se o worker morrer sem renovar o lease, a tarefa volta para a
+    fila e é reprocessada a partir do último checkpoint salvo.
+    """
+
+    def __init__(self, db_path, lease_seconds: float = 60, max_attempts: int = 3):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        # Bancos criados antes da coluna revision
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "revision" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual (sqlite3 não compartilha conexões entre threads)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[Dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["checkpoint"] = json.loads(job["checkpoint"]) if job["checkpoint"] else None
+        return job
+
+    def create(self, task_id: str, payload: Dict, max_attempts: Optional[int] = None) -> Dict:
+        """Enfileira uma nova tarefa"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO jobs (id, status, payload, max_attempts, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (task_id, STATUS_QUEUED, json.dumps(payload),
+             max_attempts or self.max_attempts, now, now)
+        )
+        return self.get(task_id)
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        """Retorna a tarefa ou None se não existir"""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (task_id,)).fetchone()
+        return self._to_dict(row)
+
+    def get_if_changed(self, task_id: str, revision: int) -> Optional[Dict]:
+        """
+        Retorna a tarefa se ela mudou depois de revision, None se não mudou e
+        {"status": "not_found"} se ela não existe (mais). Consulta leve usada
+        pelos streams de progresso, que a repetem algumas vezes por segundo.
+        """
+        row = self._connect().execute(
+            "SELECT revision FROM jobs WHERE id = ?", (task_id,)
+        ).fetchone()
+        if row is None:
+            return {"id": task_id, "status": "not_found"}
+        if row["revision"] <= revision:
+            return None
+        return self.get(task_id)
+
+    def count(self, statuses: List[str]) -> int:
+        """Conta tarefas nos estados informados"""
+        placeholders = ",".join("?" for _ in statuses)
+        row = self._connect().execute(
+            f"SELECT COUNT(*) FROM jobs WHERE status IN ({placeholders})", statuses
+        ).fetchone()
+        return row[0]
+
+    def list_active(self) -> List[Dict]:
+        """Lista tarefas ainda na fila ou em processamento"""
+        rows = self._connect().execute(
+            "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+            (STATUS_QUEUED, STATUS_PROCESSING)
+        ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def _recover_expired(self, conn: sqlite3.Connection, now: float):
+        """Devolve à fila tarefas cujo lease expirou (worker morto ou travado)"""
+        expired = conn.execute(
+            "SELECT id, attempts, max_attempts, lease_owner FROM jobs "
+            "WHERE status = ? AND lease_expires < ?",
+            (STATUS_PROCESSING, now)
+        ).fetchall()
+        for row in expired:
+            if row["attempts"] >= row["max_attempts"]:
+                logger.error(f"Tarefa {row['id']} excedeu o número máximo de tentativas")
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, "
+                    "lease_expires = NULL, revision = revision + 1, updated_at = ? WHERE id = ?",
+                    (STATUS_ERROR, "Número máximo de tentativas excedido", now, row["id"])
+                )
+            else:
+                logger.warning(f"Lease expirado para tarefa {row['id']} "
+                               f"(worker {row['lease_owner']}), devolvendo à fila")
+                conn.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+                    "revision = revision + 1, updated_at = ? WHERE id = ?",
+                    (STATUS_QUEUED, now, row["id"])
+                )
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Reserva a tarefa mais antiga da fila para o worker informado"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._recover_expired(conn, now)
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (STATUS_QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, revision = revision + 1, updated_at = ? WHERE id = ?",
+                (STATUS_PROCESSING, worker_id, now + self.lease_seconds, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def _update_owned(self, task_id: str, worker_id: str, assignments: str, params: tuple,
+                      visible: bool = True) -> bool:
+        """
+        Atualiza a tarefa somente se o worker ainda for o dono do lease.
+        Mudanças visíveis ao cliente (visible=True) incrementam a revisão da
+        tarefa, que acorda os streams de progresso.
+        """
+        if visible:
+            assignments += ", revision = revision + 1"
+        cursor = self._connect().execute(
+            f"UPDATE jobs SET {assignments}, updated_at = ? "
+            "WHERE id = ? AND lease_owner = ? AND status = ?",
+            params + (time.time(), task_id, worker_id, STATUS_PROCESSING)
+        )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        """Renova o lease. Retorna False se o worker perdeu a tarefa"""
+        return self._update_owned(task_id, worker_id, "lease_expires = ?",
+                                  (time.time() + self.lease_seconds,), visible=False)
+
+    def update_progress(self, task_id: str, worker_id: str, progress: float) -> bool:
+        return self._update_owned(task_id, worker_id, "progress = ?", (progress,))
+
+    def save_checkpoint(self, task_id: str, worker_id: str, checkpoint: Dict) -> bool:
+        """Salva estado retomável da tarefa (usado após falha do worker)"""
+        return self._update_owned(task_id, worker_id, "checkpoint = ?", (json.dumps(checkpoint),),
+                                  visible=False)
+
+    def complete(self, task_id: str, worker_id: str) -> bool:
+        return self._update_owned(
+            task_id, worker_id,
+            "status = ?, progress = 100, error = NULL, lease_owner = NULL, lease_expires = NULL",
+            (STATUS_COMPLETED,)
+        )
+
+    def fail(self, task_id: str, worker_id: str, error: str, retry: bool = True) -> bool:
+        """
+        Registra falha da tarefa. Se ainda houver tentativas disponíveis e
+        retry=True, a tarefa volta para a fila.
+        """
+        job = self.get(task_id)
+        if job is None:
+            return False
+        can_retry = retry and job["attempts"] < job["max_attempts"]
+        status = STATUS_QUEUED if can_retry else STATUS_ERROR
+        return self._update_owned(
+            task_id, worker_id,
+            "status = ?, error = ?, lease_owner = NULL, lease_expires = NULL",
+            (status, error)
+        )
+
+    def purge_finished(self, max_age_hours: float = 24) -> int:
+        """Remove tarefas finalizadas mais antigas que max_age_hours"""
+        cursor = self._connect().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (STATUS_COMPLETED, STATUS_ERROR, time.time() - max_age_hours * 3600)
+        )
+        return cursor.rowcount
+
+    def register_worker(self, worker_id: str, info: Dict):
+        """Registra (ou renova) um worker de inferência e suas informações"""
+        self._connect().execute(
+            "INSERT INTO workers (id, info, heartbeat_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET info = excluded.info, heartbeat_at = excluded.heartbeat_at",
+            (worker_id, json.dumps(info), time.time())
+        )
+
+    def remove_worker(self, worker_id: str):
+        self._connect().execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def list_workers(self, max_age: float = 60) -> List[Dict]:
+        """Lista workers de inferência com heartbeat recente"""
+        rows = self._connect().execute(
+            "SELECT * FROM workers WHERE heartbeat_at >= ? ORDER BY id",
+            (time.time() - max_age,)
+        ).fetchall()
+        return [dict(json.loads(row["info"]), id=row["id"], heartbeat_at=row["heartbeat_at"])
+                for row in rows]
+
+
+class LeaseLost(Exception):
+    """O worker perdeu o lease da tarefa; outro worker pode já estar com ela"""
+
+
+class LeaseKeeper:
+    """Renova periodicamente o lease de uma tarefa enquanto ela é processada"""
+
+    def __init__(self, store: JobStore, task_id: str, worker_id: str, interval: Optional[float] = None):
+        self.store = store
+        self.task_id = task_id
+        self.worker_id = worker_id
+        self.interval = interval or max(1.0, store.lease_seconds / 4)
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                renewed = self.store.heartbeat(self.task_id, self.worker_id)
+            except Exception as e:
+                # Banco ocupado: tenta de novo no próximo intervalo, antes de o lease expirar
+                logger.warning(f"Erro ao renovar lease da tarefa {self.task_id}: {str(e)}")
+                continue
+            if not renewed:
+                logger.warning(f"Lease da tarefa {self.task_id} perdido pelo worker {self.worker_id}")
+                self.lost.set()
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
@@ -1,40 +1,34 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
-import shutil
-import whisper
-import librosa
-import soundfile as sf
-import numpy as np
-from deep_translator import GoogleTranslator
+import asyncio
 import logging
 import os
 import json
-from typing import Dict, List
+import re
 import uuid
+from typing import Dict, Optional
 from pydantic import BaseModel
 from dotenv import load_dotenv
-import torch
-import gc
 import psutil
-import threading
-from concurrent.futures import ThreadPoolExecutor
-from queue import Queue
 import time
 import requests
 from urllib3.util import Retry
 from requests.adapters import HTTPAdapter
+from job_store import JobStore, STATUS_QUEUED, STATUS_PROCESSING, STATUS_COMPLETED, STATUS_ERROR
+from upload_store import UploadStore, UploadConflict
+from result_log import ResultLog
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
 # Configuração de hardware
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+# O Whisper roda apenas nos slots do pool de inferência (inference_pool.py);
+# os workers HTTP não importam torch/whisper nem carregam modelos.
 NUM_THREADS = psutil.cpu_count(logical=False)  # Usar número de cores físicos
-BATCH_SIZE = 16  # Otimizado para 3GB VRAM
-MAX_CONCURRENT_TASKS = 2  # Limitar número de tarefas simultâneas
-TORCH_THREADS = 4  # Threads para processamento PyTorch
+MAX_QUEUED_TASKS = int(os.getenv("MAX_QUEUED_TASKS", 20))  # Controle de admissão
 
 # Configurar sessão HTTP com retry
 session = requests.Session()
@@ -47,12 +41,6 @@ adapter = HTTPAdapter(max_retries=retry_strategy)
 session.mount("http://", adapter)
 session.mount("https://", adapter)
 
-# Configurar PyTorch
-torch.set_num_threads(TORCH_THREADS)
-if DEVICE == "cuda":
-    torch.backends.cudnn.benchmark = True
-    torch.backends.cudnn.deterministic = False
-
 # Configuração básica
 UPLOAD_DIR = Path("uploads")
 MODELS_DIR = Path("models/whisper")
@@ -88,296 +76,426 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Sistema de fila para controlar processamento
-task_queue = Queue()
-processing_tasks = {}
-task_status = {}
-thread_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_TASKS)
-
-# Gerenciamento de Memória
-def clear_gpu_memory():
-    """Limpa memória GPU"""
-    if DEVICE == "cuda":
-        torch.cuda.empty_cache()
-        gc.collect()
-
-# Carregamento otimizado do modelo
-class WhisperManager:
-    _instance = None
-    _lock = threading.Lock()
-    
-    def __new__(cls):
-        with cls._lock:
-            if cls._instance is None:
-                cls._instance = super().__new__(cls)
-                cls._instance.model = None
-            return cls._instance
-    
-    def get_model(self):
-        if self.model is None:
-            logger.info("Carregando modelo Whisper...")
-            self.model = whisper.load_model(
-                "large-v3",
-                device=DEVICE,
-                download_root=str(MODELS_DIR)
-            )
-        return self.model
+# Fila persistente compartilhada entre todos os workers (SQLite/WAL)
+job_store = JobStore(
+    os.getenv("JOB_DB_PATH", "jobs.db"),
+    lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", 60)),
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+)
+WORKER_STALE_SECONDS = 60  # Slots sem heartbeat há mais tempo não aparecem no /health
 
-def optimize_audio(audio_data: np.ndarray, sr: int) -> np.ndarray:
-    """Otimiza o áudio para processamento"""
-    # Redução de ruído
-    y_cleaned = librosa.effects.preemphasis(audio_data)
-    
-    # Separação de voz usando decomposição harmônica-percussiva
-    y_harmonic, _ = librosa.effects.hpss(y_cleaned)
-    
-    # Normalização
-    y_normalized = librosa.util.normalize(y_harmonic)
-    
-    return y_normalized
+# Streams de progresso (SSE e long-poll): o servidor consulta a revisão da tarefa
+# no SQLite e só responde quando ela muda, em vez de o cliente repetir o /status
+EVENT_POLL_INTERVAL = float(os.getenv("EVENT_POLL_INTERVAL", 0.25))
+EVENT_HEARTBEAT_SECONDS = 15  # Comentário SSE enviado sem mudanças, mantém a conexão viva
+LONG_POLL_MAX_WAIT = 30
 
-def process_audio_chunk(chunk: np.ndarray, sr: int) -> np.ndarray:
-    """Processa um chunk de áudio em paralelo"""
-    return optimize_audio(chunk, sr)
+# Segmentos gravados pelos slots à medida que são decodificados
+result_log = ResultLog(RESULTS_DIR)
 
-def process_audio(audio_path: str) -> str:
-    """Processa o áudio usando múltiplos threads"""
-    logger.info("Processando áudio para melhorar qualidade...")
-    
-    # Carregar o áudio
-    y, sr = librosa.load(audio_path, sr=16000)
-    
-    # Dividir em chunks para processamento paralelo
-    chunk_size = len(y) // NUM_THREADS
-    chunks = [y[i:i + chunk_size] for i in range(0, len(y), chunk_size)]
-    
-    # Processar chunks em paralelo
-    with ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
-        processed_chunks = list(executor.map(
-            lambda x: process_audio_chunk(x, sr),
-            chunks
-        ))
-    
-    # Combinar chunks processados
-    y_processed = np.concatenate(processed_chunks)
-    
-    # Salvar áudio processado
-    output_path = str(Path(audio_path).parent / "processed_audio.wav")
-    sf.write(output_path, y_processed, sr)
+# Uploads retomáveis (partes em UPLOAD_DIR/partial, compartilhadas entre os workers)
+upload_store = UploadStore(UPLOAD_DIR, max_size_mb=int(os.getenv("MAX_UPLOAD_SIZE_MB", 4096)))
+
+# Áudio enviado em streaming no corpo da requisição (Content-Type -> extensão)
+STREAM_CONTENT_TYPES = {
+    "audio/flac": ".flac",
+    "audio/x-flac": ".flac",
+    "audio/ogg": ".ogg",
+    "audio/opus": ".ogg",
+    "audio/wav": ".wav",
+    "audio/x-wav": ".wav",
+}
+
+def _check_admission():
+    """
+    Recusa novas tarefas (503) com memória alta ou fila cheia. Consulta o
+    SQLite: os handlers chamam via run_in_threadpool
+    """
+    # Verificar uso de memória
+    if psutil.virtual_memory().percent > 90:
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor sobrecarregado. Tente novamente mais tarde."
+        )
     
-    return output_path
+    # Controle de admissão: limitar tarefas aguardando os slots de inferência
+    if job_store.count([STATUS_QUEUED, STATUS_PROCESSING]) >= MAX_QUEUED_TASKS:
+        raise HTTPException(
+            status_code=503,
+            detail="Fila de processamento cheia. Tente novamente mais tarde."
+        )
 
-async def process_transcription(
-    file_path: str,
-    task_id: str,
-    source_lang: str,
-    target_lang: str
-):
-    whisper_manager = WhisperManager()
+def _enqueue(task_id: str, file_path: Path, options: Dict) -> JSONResponse:
+    """Enfileira na fila persistente; qualquer worker pode processar"""
+    job_store.create(task_id, {
+        "file_path": str(file_path),
+        **options
+    })
     
+    return JSONResponse({
+        "task_id": task_id,
+        "status": "processing",
+        "message": "Arquivo recebido e processamento iniciado"
+    })
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Arquivo maior que o limite de {upload_store.max_size // 1024**2} MB"
+    )
+
+def _copy_upload(source, file_path: Path):
+    """Copia o arquivo do formulário respeitando o limite de tamanho dos uploads"""
+    copied = 0
+    with open(file_path, "wb") as buffer:
+        for chunk in iter(lambda: source.read(1024 * 1024), b""):
+            copied += len(chunk)
+            if copied > upload_store.max_size:
+                raise _too_large()
+            buffer.write(chunk)
+
+async def _save_multipart(request: Request, task_id: str, options: Dict) -> Path:
+    """Formulário multipart (campo file) - formato original do endpoint"""
+    form = await request.form()
+    upload = form.get("file")
+    if upload is None or not hasattr(upload, "file"):
+        raise HTTPException(status_code=400, detail="Campo 'file' ausente")
+    for field in ("source_language", "target_language"):
+        if form.get(field):
+            options[field] = form.get(field)
+
+    file_path = UPLOAD_DIR / f"{task_id}_{Path(upload.filename or 'audio').name}"
     try:
-        task_status[task_id] = {"status": "processing", "progress": 10}
-        
-        # Processar áudio
-        processed_path = process_audio(file_path)
-        task_status[task_id]["progress"] = 30
-        
-        # Carregar modelo
-        model = whisper_manager.get_model()
-        
-        # Configurar opções de transcrição
-        options = {
-            "language": source_lang if source_lang != "auto" else None,
-            "task": "transcribe",
-            "fp16": True if DEVICE == "cuda" else False,
-            "batch_size": BATCH_SIZE,
-            "verbose": True
-        }
-        
-        # Transcrição
-        logger.info(f"Iniciando transcrição para task {task_id}")
-        result = model.transcribe(processed_path, **options)
-        task_status[task_id]["progress"] = 70
-        
-        # Limpar GPU após transcrição
-        clear_gpu_memory()
-        
-        # Processar e traduzir em batches
-        subtitles = []
-        batch_size = 50  # Processar traduções em lotes
-        
-        segments = result["segments"]
-        total_segments = len(segments)
-        
-        # Inicializar tradutor apenas se necessário
-        translator = None
-        if target_lang != source_lang and target_lang != "auto":
-            translator = GoogleTranslator(source='auto', target=target_lang[:2])
-        
-        for i in range(0, total_segments, batch_size):
-            batch = segments[i:i + batch_size]
-            texts = [seg["text"].strip() for seg in batch]
-            
-            # Traduzir se necessário
-            if translator:
-                try:
-                    translated_texts = [translator.translate(text) for text in texts]
-                except Exception as e:
-                    logger.warning(f"Erro na tradução em lote: {str(e)}")
-                    translated_texts = texts
-            else:
-                translated_texts = texts
-            
-            # Adicionar à lista de legendas
-            for seg, text in zip(batch, translated_texts):
-                subtitles.append({
-                    "timestamp": seg["start"],
-                    "text": text
-                })
-            
-            # Atualizar progresso
-            progress = 70 + (i / total_segments) * 25
-            task_status[task_id]["progress"] = min(95, progress)
-        
-        # Salvar resultado
-        result_path = RESULTS_DIR / f"{task_id}_result.json"
-        with open(result_path, 'w', encoding='utf-8') as f:
-            json.dump({
-                "task_id": task_id,
-                "status": "completed",
-                "subtitles": subtitles,
-                "metadata": {
-                    "source_language": source_lang,
-                    "target_language": target_lang,
-                    "processing_device": DEVICE,
-                    "model": "large-v3"
-                }
-            }, f, ensure_ascii=False, indent=2)
-        
-        task_status[task_id] = {"status": "completed", "progress": 100}
-            
-    except Exception as e:
-        logger.error(f"Erro no processamento: {str(e)}")
-        task_status[task_id] = {"status": "error", "error": str(e)}
-        
-        # Salvar erro
-        with open(RESULTS_DIR / f"{task_id}_result.json", 'w', encoding='utf-8') as f:
-            json.dump({
-                "task_id": task_id,
-                "status": "error",
-                "error": str(e)
-            }, f)
-    finally:
-        # Limpar arquivos temporários e memória
-        try:
-            os.remove(file_path)
-            os.remove(processed_path)
-            clear_gpu_memory()
-        except:
-            pass
+        await run_in_threadpool(_copy_upload, upload.file, file_path)
+    except Exception:
+        file_path.unlink(missing_ok=True)
+        raise
+    return file_path
 
-class TranscriptionRequest(BaseModel):
-    source_language: str = "auto"
-    target_language: str = "pt-br"
+async def _save_stream(request: Request, task_id: str, suffix: str) -> Path:
+    """
+    Corpo em streaming (chunked): gravado em disco à medida que chega, com o
+    mesmo limite de tamanho dos uploads retomáveis (MAX_UPLOAD_SIZE_MB)
+    """
+    file_path = UPLOAD_DIR / f"{task_id}{suffix}"
+    received = 0
+    try:
+        # Abertura e gravação fora do loop de eventos: um disco lento não trava as outras requisições
+        buffer = await run_in_threadpool(open, file_path, "wb")
+        try:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > upload_store.max_size:
+                    raise _too_large()
+                await run_in_threadpool(buffer.write, chunk)
+        finally:
+            await run_in_threadpool(buffer.close)
+    except Exception:
+        file_path.unlink(missing_ok=True)
+        raise
+    if not received:
+        file_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="Corpo da requisição vazio")
+    logger.info(f"Áudio recebido em streaming: {received / 1024**2:.1f} MB ({suffix})")
+    return file_path
 
 @app.post("/transcribe/")
 async def transcribe_audio(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    request: TranscriptionRequest = TranscriptionRequest()
+    request: Request,
+    source_language: str = "auto",
+    target_language: str = "pt-br"
 ):
+    """
+    Recebe o áudio como formulário multipart (campo file) ou, com Content-Type
+    audio/flac, audio/ogg ou audio/wav, como corpo em streaming; neste caso
+    os idiomas vão na query string.
+    """
     task_id = str(uuid.uuid4())
     
     try:
-        # Verificar uso de memória
-        if psutil.virtual_memory().percent > 90:
-            raise HTTPException(
-                status_code=503,
-                detail="Servidor sobrecarregado. Tente novamente mais tarde."
-            )
+        await run_in_threadpool(_check_admission)
         
         # Salvar arquivo recebido
-        file_path = UPLOAD_DIR / f"{task_id}_{file.filename}"
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Iniciar processamento em background
-        background_tasks.add_task(
-            process_transcription,
-            str(file_path),
-            task_id,
-            request.source_language,
-            request.target_language
-        )
+        options = {"source_language": source_language, "target_language": target_language}
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type == "multipart/form-data":
+            file_path = await _save_multipart(request, task_id, options)
+        elif content_type in STREAM_CONTENT_TYPES:
+            file_path = await _save_stream(request, task_id, STREAM_CONTENT_TYPES[content_type])
+        else:
+            raise HTTPException(
+                status_code=415,
+                detail=f"Content-Type não suportado: {content_type or 'ausente'}"
+            )
         
-        return JSONResponse({
-            "task_id": task_id,
-            "status": "processing",
-            "message": "Arquivo recebido e processamento iniciado"
-        })
+        return await run_in_threadpool(_enqueue, task_id, file_path, options)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao receber arquivo: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/status/{task_id}")
-async def get_task_status(task_id: str):
-    if task_id not in task_status:
-        return JSONResponse({
-            "task_id": task_id,
-            "status": "not_found",
-            "error": "Tarefa não encontrada"
+class UploadCreateRequest(BaseModel):
+    size: int
+    content_type: Optional[str] = None
+    filename: Optional[str] = None
+    source_language: str = "auto"
+    target_language: str = "pt-br"
+
+class UploadFinalizeRequest(BaseModel):
+    sha256: str
+
+def _upload_state(upload: Dict) -> Dict:
+    return {"upload_id": upload["upload_id"], "offset": upload["offset"], "size": upload["size"]}
+
+def _parse_content_range(header: str):
+    """'bytes início-fim/total' -> (início, fim, total)"""
+    match = re.match(r"^bytes (\d+)-(\d+)/(\d+)$", (header or "").strip())
+    if not match:
+        raise HTTPException(status_code=400, detail="Content-Range inválido (use 'bytes início-fim/total')")
+    start, end, total = (int(value) for value in match.groups())
+    if end < start or end >= total:
+        raise HTTPException(status_code=416, detail="Intervalo fora do arquivo")
+    return start, end, total
+
+@app.post("/uploads/", status_code=201)
+async def create_upload(body: UploadCreateRequest):
+    """
+    Inicia um upload retomável: o cliente envia o arquivo em blocos com
+    PUT /uploads/{id} (Content-Range), consulta o offset com GET depois de
+    uma falha e termina com POST /uploads/{id}/finalize (SHA-256).
+    """
+    await run_in_threadpool(_check_admission)
+    suffix = STREAM_CONTENT_TYPES.get((body.content_type or "").lower())
+    if suffix is None:
+        suffix = Path(body.filename or "").suffix.lower() or ".wav"
+    try:
+        upload = upload_store.create(body.size, suffix, {
+            "source_language": body.source_language,
+            "target_language": body.target_language
         })
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return _upload_state(upload)
+
+@app.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    upload = upload_store.get(upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload não encontrado")
+    return _upload_state(upload)
+
+@app.put("/uploads/{upload_id}")
+async def upload_range(upload_id: str, request: Request):
+    """Grava um bloco; o offset confirmado é o que foi gravado, mesmo se a conexão cair no meio"""
+    start, end, total = _parse_content_range(request.headers.get("content-range"))
+    try:
+        f = await run_in_threadpool(upload_store.open_range, upload_id, start, total)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload não encontrado")
+    except UploadConflict as e:
+        return JSONResponse(status_code=409, content={"detail": str(e), "offset": e.offset})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    limit = end - start + 1
+    written = 0
+    try:
+        # Cada gravação roda no threadpool, como a abertura (stat + truncate)
+        async for chunk in request.stream():
+            chunk = chunk[:limit - written]
+            await run_in_threadpool(f.write, chunk)
+            written += len(chunk)
+            if written >= limit:
+                break
+    finally:
+        await run_in_threadpool(f.close)
+    if written != limit:
+        raise HTTPException(status_code=400, detail=f"Bloco incompleto: {written} de {limit} bytes")
+    return _upload_state(await run_in_threadpool(upload_store.get, upload_id))
+
+@app.post("/uploads/{upload_id}/finalize")
+async def finalize_upload(upload_id: str, body: UploadFinalizeRequest):
+    """Confere o hash, move o arquivo para UPLOAD_DIR e enfileira a tarefa"""
+    await run_in_threadpool(_check_admission)
+    upload = upload_store.get(upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload não encontrado")
+
+    task_id = str(uuid.uuid4())
+    file_path = UPLOAD_DIR / f"{task_id}{upload['suffix']}"
+    try:
+        upload = await run_in_threadpool(upload_store.finalize, upload_id, body.sha256, file_path)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload não encontrado")
+    except UploadConflict as e:
+        return JSONResponse(status_code=409, content={"detail": str(e), "offset": e.offset})
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return await run_in_threadpool(_enqueue, task_id, file_path, upload["options"])
+
+@app.delete("/uploads/{upload_id}")
+async def cancel_upload(upload_id: str):
+    try:
+        upload_store.delete(upload_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload não encontrado")
+    return {"upload_id": upload_id, "status": "cancelled"}
+
+def _job_status(job: Dict) -> Dict:
+    status = {
+        "task_id": job["id"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "revision": job["revision"]
+    }
+    if job["status"] == STATUS_ERROR:
+        status["error"] = job["error"]
+    return status
+
+def _not_found(task_id: str) -> Dict:
+    return {"task_id": task_id, "status": "not_found", "error": "Tarefa não encontrada"}
+
+async def _wait_for_change(task_id: str, revision: int, timeout: float) -> Optional[Dict]:
+    """Espera até a tarefa passar da revisão informada; None se o tempo acabar sem mudança"""
+    deadline = time.monotonic() + timeout
+    while True:
+        # Consulta ao SQLite fora do event loop: com o banco ocupado pelos slots ela pode esperar o busy timeout
+        job = await run_in_threadpool(job_store.get_if_changed, task_id, revision)
+        if job is not None or time.monotonic() >= deadline:
+            return job
+        await asyncio.sleep(EVENT_POLL_INTERVAL)
+
+def _load_result(task_id: str) -> Optional[Dict]:
+    result_file = RESULTS_DIR / f"{task_id}_result.json"
+    if not result_file.exists():
+        return None
+    with open(result_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _sse(event: str, data: Dict, event_id: Optional[int] = None) -> str:
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get("/status/{task_id}")
+async def get_task_status(task_id: str, revision: int = -1, wait: float = 0):
+    """
+    Status da tarefa. Com wait > 0 (long-poll) a resposta espera até wait
+    segundos por uma revisão maior que revision antes de sair.
+    """
+    job = None
+    if wait > 0:
+        job = await _wait_for_change(task_id, revision, min(wait, LONG_POLL_MAX_WAIT))
+    if job is None or job["status"] == "not_found":
+        job = await run_in_threadpool(job_store.get, task_id)
+    if job is None:
+        return JSONResponse(_not_found(task_id))
     
-    status = task_status[task_id]
-    if status["status"] == "completed":
+    if job["status"] == STATUS_COMPLETED:
+        # O resultado vai direto do disco, sem ser decodificado e serializado de novo
         result_file = RESULTS_DIR / f"{task_id}_result.json"
         if result_file.exists():
-            with open(result_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return FileResponse(result_file, media_type="application/json")
     
-    return status
+    return _job_status(job)
+
+@app.get("/results/{task_id}")
+async def get_partial_results(task_id: str, since: int = 0):
+    """
+    Segmentos já decodificados a partir do cursor since (número de registros
+    já lidos). Registros com o mesmo index completam o anterior (a tradução
+    chega depois do texto transcrito); a resposta traz o cursor seguinte em next.
+    """
+    job = await run_in_threadpool(job_store.get, task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+    records, next_cursor = await run_in_threadpool(result_log.read, task_id, since)
+    return {**_job_status(job), "since": since, "next": next_cursor, "segments": records}
+
+@app.get("/events/{task_id}")
+async def task_events(task_id: str, request: Request, since: Optional[int] = None):
+    """
+    Stream SSE da tarefa: um evento "progress" a cada mudança de estado e, no
+    fim, "completed" com o resultado ou "error". O id de cada evento é a
+    revisão da tarefa; o cliente reconecta com Last-Event-ID sem perder nada.
+    Com since, os segmentos novos do log incremental chegam em eventos
+    "segments" ({"next", "segments"}, como em /results) antes de cada "progress".
+    """
+    if await run_in_threadpool(job_store.get, task_id) is None:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+    try:
+        revision = int(request.headers.get("last-event-id", -1))
+    except ValueError:
+        revision = -1
+
+    async def stream():
+        nonlocal revision, since
+        while not await request.is_disconnected():
+            job = await _wait_for_change(task_id, revision, EVENT_HEARTBEAT_SECONDS)
+            if job is None:
+                yield ": ping\n\n"
+                continue
+            if job["status"] == "not_found":
+                yield _sse("error", _not_found(task_id))
+                return
+            revision = job["revision"]
+            if since is not None:
+                records, since = await run_in_threadpool(result_log.read, task_id, since)
+                if records:
+                    yield _sse("segments", {"next": since, "segments": records})
+            if job["status"] == STATUS_COMPLETED:
+                result = await run_in_threadpool(_load_result, task_id)
+                yield _sse("completed", result or _job_status(job), revision)
+                return
+            yield _sse("progress", _job_status(job), revision)
+            if job["status"] == STATUS_ERROR:
+                return
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/health")
 async def health_check():
+    slots = await run_in_threadpool(job_store.list_workers, max_age=WORKER_STALE_SECONDS)
     system_info = {
         "status": "healthy",
         "version": "1.0.0",
-        "device": DEVICE,
         "cpu_usage": psutil.cpu_percent(),
         "memory_usage": psutil.virtual_memory().percent,
-        "gpu_memory": None
+        "queued_tasks": await run_in_threadpool(job_store.count, [STATUS_QUEUED]),
+        "processing_tasks": await run_in_threadpool(job_store.count, [STATUS_PROCESSING]),
+        "inference_slots": slots
     }
     
-    if DEVICE == "cuda":
-        try:
-            gpu_memory = torch.cuda.get_device_properties(0).total_memory
-            gpu_memory_allocated = torch.cuda.memory_allocated(0)
-            system_info["gpu_memory"] = {
-                "total": gpu_memory,
-                "allocated": gpu_memory_allocated,
-                "available": gpu_memory - gpu_memory_allocated
-            }
-        except:
-            pass
-    
     return system_info
 
 if __name__ == "__main__":
     import uvicorn
+    from inference_pool import InferencePool
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
     
+    # Pool de inferência em processos próprios (um modelo por slot)
+    pool = InferencePool().start().start_supervisor()
+    
     # Configurar uvicorn para usar múltiplos workers
     workers = min(NUM_THREADS, 4)  # Máximo de 4 workers
     
-    uvicorn.run(
-        "main:app",
-        host=host,
-        port=port,
-        reload=False,  # Desabilitar reload em produção
-        workers=workers,
-        limit_concurrency=100,  # Limite de conexões concorrentes
-        timeout_keep_alive=30  # Timeout para conexões keep-alive
-    )
\ No newline at end of file
+    try:
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            reload=False,  # Desabilitar reload em produção
+            workers=workers,
+            limit_concurrency=100,  # Limite de conexões concorrentes
+            timeout_keep_alive=30  # Timeout para conexões keep-alive
+        )
+    finally:
+        pool.stop()
@@ -4,8 +4,15 @@ import psutil
 import torch
 import shutil
 from pathlib import Path
+import sys
 import logging
 from dotenv import load_dotenv
+from job_store import JobStore
+from upload_store import UploadStore
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from src.cache.transcription_cache import TranscriptionCache
+from src.cache.translation_cache import TranslationCache
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -29,6 +36,17 @@ class ServerMaintenance:
         self.max_cache_size = int(os.getenv('MAX_CACHE_SIZE', 2048))  # MB
         self.max_memory_percent = int(os.getenv('MAX_MEMORY_PERCENT', 90))
         self.clear_cache_interval = int(os.getenv('CLEAR_CACHE_INTERVAL', 300))
+        self.job_store = JobStore(os.getenv('JOB_DB_PATH', 'jobs.db'))
+        self.upload_store = UploadStore(self.upload_dir)
+        self.upload_expire_hours = float(os.getenv('UPLOAD_EXPIRE_HOURS', 24))
+        self.transcription_cache = TranscriptionCache(
+            self.cache_dir / 'transcriptions.db',
+            max_size_mb=int(os.getenv('TRANSCRIPTION_CACHE_MB', 512))
+        )
+        self.translation_cache = TranslationCache(
+            self.cache_dir / 'translations.db',
+            max_size_mb=int(os.getenv('TRANSLATION_CACHE_MB', 128))
+        )
 
     def clear_gpu_memory(self):
         """Limpa memória GPU se disponível"""
@@ -36,14 +54,15 @@ class ServerMaintenance:
             torch.cuda.empty_cache()
             logger.info("Memória GPU liberada")
 
-    def clear_old_files(self, directory: Path, max_age_hours: int = 24):
-        """Remove arquivos mais antigos que max_age_hours"""
+    def clear_old_files(self, directory: Path, max_age_hours: int = 24, keep=()):
+        """Remove arquivos mais antigos que max_age_hours, exceto os listados em keep"""
         if not directory.exists():
             return
 
+        keep = {Path(p).resolve() for p in keep}
         current_time = time.time()
         for file in directory.iterdir():
-            if file.is_file():
+            if file.is_file() and file.resolve() not in keep:
                 file_age = current_time - file.stat().st_mtime
                 if file_age > (max_age_hours * 3600):
                     try:
@@ -66,12 +85,27 @@ class ServerMaintenance:
         if not self.cache_dir.exists():
             return
 
+        # Transcrições: remover as menos usadas até caber no limite próprio
+        evicted = self.transcription_cache.evict()
+        if evicted:
+            logger.info(f"{evicted} transcrições removidas do cache (LRU)")
+        evicted = self.translation_cache.evict()
+        if evicted:
+            logger.info(f"{evicted} traduções removidas do cache (LRU)")
+
         cache_size = self.check_directory_size(self.cache_dir)
         if cache_size > self.max_cache_size:
             logger.info(f"Cache excedeu limite ({cache_size:.2f}MB). Limpando...")
             try:
-                shutil.rmtree(self.cache_dir)
-                self.cache_dir.mkdir(exist_ok=True)
+                # Os bancos de transcrições e traduções já são limitados pelo LRU e não são apagados
+                db_names = (self.transcription_cache.db_path.name, self.translation_cache.db_path.name)
+                for entry in self.cache_dir.iterdir():
+                    if entry.name.startswith(db_names):
+                        continue
+                    if entry.is_dir():
+                        shutil.rmtree(entry)
+                    else:
+                        entry.unlink()
                 logger.info("Cache limpo com sucesso")
             except Exception as e:
                 logger.error(f"Erro ao limpar cache: {e}")
@@ -93,9 +127,21 @@ class ServerMaintenance:
                 # Verificar recursos
                 self.check_system_resources()
                 
-                # Limpar arquivos antigos
-                self.clear_old_files(self.upload_dir, max_age_hours=1)  # Uploads temporários
-                self.clear_old_files(self.results_dir, max_age_hours=24)  # Resultados
+                # Limpar arquivos antigos, preservando os de tarefas ainda na fila
+                active_jobs = self.job_store.list_active()
+                active_uploads = [job["payload"]["file_path"] for job in active_jobs]
+                active_results = [self.results_dir / f"{job['id']}{suffix}" for job in active_jobs
+                                  for suffix in ("_transcription.json", "_segments.jsonl")]
+                self.clear_old_files(self.upload_dir, max_age_hours=1, keep=active_uploads)  # Uploads temporários
+                self.clear_old_files(self.results_dir, max_age_hours=24, keep=active_results)  # Resultados
+                expired = self.upload_store.clear_expired(self.upload_expire_hours)  # Uploads retomáveis abandonados
+                if expired:
+                    logger.info(f"{expired} uploads incompletos expirados")
+                
+                # Remover tarefas finalizadas da fila persistente
+                purged = self.job_store.purge_finished(max_age_hours=24)
+                if purged:
+                    logger.info(f"{purged} tarefas antigas removidas da fila")
                 
                 # Manter cache
                 self.maintain_cache()
@@ -0,0 +1,88 @@
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResultLog:
+    """
+    Resultado incremental das tarefas em RESULTS_DIR/{task_id}_segments.jsonl.
+
+    Cada linha é um registro de um segmento, identificado por index (ordem
+    no áudio). Registros com o mesmo index completam o anterior: primeiro
+    chega o texto transcrito (timestamp, end, text) e, quando houver, a
+    tradução (translation). O cursor dos clientes é o número de linhas já
+    lidas, então o arquivo só cresce enquanto a tarefa existe.
+    """
+
+    def __init__(self, results_dir):
+        self.directory = Path(results_dir)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, task_id: str) -> Path:
+        return self.directory / f"{task_id}_segments.jsonl"
+
+    def append(self, task_id: str, records: List[Dict]):
+        if not records:
+            return
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with open(self.path(task_id), "a", encoding="utf-8") as f:
+            f.write(data)
+
+    def read(self, task_id: str, since: int = 0) -> Tuple[List[Dict], int]:
+        """
+        Registros a partir da linha since e o cursor para a próxima leitura.
+        Uma linha ainda sem o "\\n" final está sendo gravada e fica para depois.
+        """
+        try:
+            with open(self.path(task_id), "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return [], 0
+        complete = len(lines) if not lines or lines[-1].endswith("\n") else len(lines) - 1
+        since = max(0, since)
+        return [json.loads(line) for line in lines[since:complete]], max(since, complete)
+
+    def count_transcribed(self, task_id: str) -> int:
+        """Quantos segmentos transcritos já estão no log (de uma tentativa anterior)"""
+        records, _ = self.read(task_id)
+        return sum(1 for record in records if "text" in record)
+
+
+class ResultWriter:
+    """
+    Numera os segmentos de uma tarefa na ordem em que são decodificados e os
+    grava no ResultLog. Numa nova tentativa os segmentos que a anterior já
+    gravou são pulados, para que os clientes não os recebam duas vezes.
+    Falhas de gravação só geram aviso: o resultado final não depende do log.
+    """
+
+    def __init__(self, log: ResultLog, task_id: str):
+        self.log = log
+        self.task_id = task_id
+        self.logged = log.count_transcribed(task_id)
+        self.next_index = 0
+
+    def add_segments(self, segments: List[Dict]):
+        records = []
+        for seg in segments:
+            if self.next_index >= self.logged:
+                records.append({
+                    "index": self.next_index,
+                    "timestamp": seg["start"],
+                    "end": seg["end"],
+                    "text": seg["text"].strip()
+                })
+            self.next_index += 1
+        self._append(records)
+
+    def add_translations(self, translations: Iterable[Tuple[int, str]]):
+        self._append([{"index": index, "translation": text} for index, text in translations])
+
+    def _append(self, records: List[Dict]):
+        try:
+            self.log.append(self.task_id, records)
+        except OSError as e:
+            logger.warning(f"Erro ao gravar resultado parcial da task {self.task_id}: {str(e)}")
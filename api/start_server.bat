@@ -23,12 +23,11 @@ set CUDA_VISIBLE_DEVICES=0
 set OMP_NUM_THREADS=4
 set MKL_NUM_THREADS=4
 
-:: Limpar cache antigo
-if exist "cache" rmdir /s /q "cache"
-if exist "uploads" rmdir /s /q "uploads"
-mkdir cache
-mkdir uploads
-mkdir results
+:: Criar diretórios. Uploads não são apagados aqui: tarefas da fila (jobs.db) e uploads
+:: retomáveis (uploads\partial) sobrevivem ao reinício; o maintenance.py remove os órfãos e expirados
+if not exist "cache" mkdir cache
+if not exist "uploads" mkdir uploads
+if not exist "results" mkdir results
 
 :: Instalar dependências se necessário
 pip install -r requirements.txt
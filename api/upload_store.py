@@ -0,0 +1,130 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class UploadConflict(Exception):
+    """O intervalo enviado não começa no fim do que o servidor já tem"""
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        self.offset = offset
+
+
+class UploadStore:
+    """
+    Uploads retomáveis gravados em partes sob UPLOAD_DIR/partial.
+
+    Cada upload tem um arquivo .part com os bytes já recebidos e um .json
+    com o tamanho total e as opções da tarefa. O offset confirmado é sempre
+    o tamanho do .part: depois de uma queda o cliente pergunta o offset e
+    continua dali. Os arquivos são compartilhados por todos os workers HTTP.
+    """
+
+    def __init__(self, upload_dir, max_size_mb: int = 4096):
+        self.directory = Path(upload_dir) / "partial"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size_mb * 1024 * 1024
+
+    def _paths(self, upload_id: str):
+        if not _UPLOAD_ID.match(upload_id or ""):
+            raise KeyError(upload_id)
+        return self.directory / f"{upload_id}.part", self.directory / f"{upload_id}.json"
+
+    def create(self, size: int, suffix: str, options: Dict) -> Dict:
+        if size <= 0 or size > self.max_size:
+            raise ValueError(f"Tamanho inválido: {size} bytes (máximo {self.max_size // 1024**2} MB)")
+        upload_id = uuid.uuid4().hex
+        part_path, meta_path = self._paths(upload_id)
+        meta = {
+            "upload_id": upload_id,
+            "size": size,
+            "suffix": suffix,
+            "options": options,
+            "created_at": time.time()
+        }
+        part_path.touch()
+        tmp_path = meta_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_path, meta_path)
+        return {**meta, "offset": 0}
+
+    def get(self, upload_id: str) -> Optional[Dict]:
+        """Metadados do upload com o offset confirmado, ou None se não existe"""
+        try:
+            part_path, meta_path = self._paths(upload_id)
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            return {**meta, "offset": part_path.stat().st_size}
+        except (KeyError, FileNotFoundError):
+            return None
+
+    def open_range(self, upload_id: str, start: int, total: Optional[int] = None):
+        """
+        Abre o .part para gravar a partir de start. start pode ser menor que o
+        offset (reenvio de um bloco cuja resposta se perdeu): o excedente é
+        descartado. Um start além do offset gera UploadConflict.
+        """
+        upload = self.get(upload_id)
+        if upload is None:
+            raise KeyError(upload_id)
+        if total is not None and total != upload["size"]:
+            raise ValueError(f"Tamanho total {total} diferente do declarado ({upload['size']})")
+        if start > upload["offset"]:
+            raise UploadConflict(f"Esperado offset {upload['offset']}, recebido {start}", upload["offset"])
+
+        part_path, _ = self._paths(upload_id)
+        f = open(part_path, "r+b")
+        f.truncate(start)
+        f.seek(start)
+        return f
+
+    def finalize(self, upload_id: str, sha256: str, destination: Path) -> Dict:
+        """
+        Confere tamanho e SHA-256 e move o arquivo completo para destination.
+        Com hash diferente o upload é descartado e precisa ser refeito.
+        """
+        upload = self.get(upload_id)
+        if upload is None:
+            raise KeyError(upload_id)
+        if upload["offset"] != upload["size"]:
+            raise UploadConflict(f"Upload incompleto: {upload['offset']} de {upload['size']} bytes", upload["offset"])
+
+        part_path, meta_path = self._paths(upload_id)
+        digest = hashlib.sha256()
+        with open(part_path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        if digest.hexdigest() != (sha256 or "").lower():
+            self.delete(upload_id)
+            raise ValueError("SHA-256 não confere; o upload foi descartado")
+
+        os.replace(part_path, destination)
+        meta_path.unlink(missing_ok=True)
+        return upload
+
+    def delete(self, upload_id: str):
+        for path in self._paths(upload_id):
+            path.unlink(missing_ok=True)
+
+    def clear_expired(self, max_age_hours: float = 24) -> int:
+        """Remove uploads sem atividade há mais de max_age_hours. Retorna quantos saíram"""
+        limit = time.time() - max_age_hours * 3600
+        removed = 0
+        for meta_path in self.directory.glob("*.json"):
+            part_path = meta_path.with_suffix(".part")
+            last_write = part_path.stat().st_mtime if part_path.exists() else meta_path.stat().st_mtime
+            if last_write < limit:
+                self.delete(meta_path.stem)
+                removed += 1
+        return removed
@@ -1,10 +1,16 @@
+import importlib.util
 import os
 import sys
+import multiprocessing
 from pathlib import Path
+from src.startup_profile import StartupProfiler, QUIT_FLAG
+
+# Instalado antes dos demais imports para medir também o PyQt e a interface
+startup_profiler = StartupProfiler.from_args(sys.argv)
+
 from PyQt5.QtWidgets import QApplication, QMessageBox
-from PyQt5.QtCore import Qt, QCoreApplication
+from PyQt5.QtCore import Qt, QCoreApplication, QTimer
 from src.gui.gui import MainWindow
-from src.models.models_handler import download_silero_model
 from src.worker import init as init_dirs
 import signal
 
@@ -13,26 +19,33 @@ def signal_handler(signum, frame):
     QApplication.quit()
 
 def check_vlc():
-    try:
-        import vlc
+    # Só verifica se o python-vlc está instalado: importar o módulo carrega a
+    # libvlc, o que fica para o primeiro vídeo aberto
+    if importlib.util.find_spec('vlc') is not None:
         return True
-    except ImportError:
-        QMessageBox.critical(None, "Erro de Dependência",
-                           "VLC não encontrado. Por favor, instale o VLC media player e o python-vlc:\n"
-                           "1. Instale o VLC de https://www.videolan.org/\n"
-                           "2. Execute: pip install python-vlc")
-        return False
+    QMessageBox.critical(None, "Erro de Dependência",
+                       "VLC não encontrado. Por favor, instale o VLC media player e o python-vlc:\n"
+                       "1. Instale o VLC de https://www.videolan.org/\n"
+                       "2. Execute: pip install python-vlc")
+    return False
+
+def finish_startup_profile(app):
+    """Chamado quando o loop de eventos começa, com a janela já exibida"""
+    startup_profiler.mark("janela exibida")
+    startup_profiler.stop()
+    print(startup_profiler.report())
+    path = startup_profiler.save(Path(__file__).parent / 'data' / 'startup_profile.jsonl')
+    print(f"Perfil de inicialização salvo em: {path}")
+    if QUIT_FLAG in sys.argv:
+        app.quit()
 
 def main():
-    if not check_vlc():
-        sys.exit(1)
+    if startup_profiler:
+        startup_profiler.mark("imports")
 
     # Inicializar estrutura de diretórios
     init_dirs()
 
-    # Garantir que o modelo está baixado antes de iniciar
-    download_silero_model()
-    
     try:
         # Configurar manipulador de sinais
         signal.signal(signal.SIGINT, signal_handler)
@@ -42,13 +55,26 @@ def main():
         QCoreApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
         
         app = QApplication(sys.argv)
+        if startup_profiler:
+            startup_profiler.mark("QApplication")
+
+        if not check_vlc():
+            return 1
         
         # Configurar encerramento limpo
         app.aboutToQuit.connect(app.deleteLater)
         
         # Iniciar aplicação
         window = MainWindow()
+        if startup_profiler:
+            startup_profiler.mark("janela criada")
         window.show()
+
+        if startup_profiler:
+            QTimer.singleShot(0, lambda: finish_startup_profile(app))
+        
+        # Baixar/carregar VAD e Whisper em segundo plano, depois que a janela aparecer
+        QTimer.singleShot(0, window.start_warmup)
         
         return app.exec_()
     except KeyboardInterrupt:
@@ -59,6 +85,8 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # Necessário para o pool de transcrição paralela (spawn) em executáveis congelados
+    multiprocessing.freeze_support()
     sys.exit(main())
 
 def load_previous_project(self, project_item):
@@ -1,9 +1,113 @@
 import requests
 from urllib3.util import Retry
 from requests.adapters import HTTPAdapter
+import hashlib
+import json
 import logging
+import os
+import subprocess
+import threading
 import time
-from typing import Dict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+# Formato do áudio enviado ao servidor: 'opus' (Ogg/Opus, com perdas, ~8x menor
+# que o WAV) ou 'flac' (sem perdas, ~2x menor)
+UPLOAD_CODEC = os.getenv('UPLOAD_CODEC', 'opus').lower()
+UPLOAD_CODECS = {
+    'opus': {'args': ['-c:a', 'libopus', '-b:a', '32k', '-application', 'voip', '-f', 'ogg'],
+             'content_type': 'audio/ogg'},
+    'flac': {'args': ['-c:a', 'flac', '-compression_level', '5', '-f', 'flac'],
+             'content_type': 'audio/flac'},
+}
+# Envio ao servidor: 'resumable' (arquivo comprimido enviado em blocos, retomável)
+# ou 'stream' (enviado enquanto o ffmpeg codifica, sem arquivo temporário)
+UPLOAD_MODE = os.getenv('UPLOAD_MODE', 'resumable').lower()
+UPLOAD_EXTENSIONS = {'opus': '.ogg', 'flac': '.flac'}
+STREAM_CHUNK_SIZE = 64 * 1024
+UPLOAD_BLOCK_SIZE = 8 * 1024 * 1024  # Bloco de um PUT no upload retomável
+# Acompanhamento da tarefa: stream SSE e, se ele cair, long-poll no /status
+EVENTS_READ_TIMEOUT = 60  # O servidor manda um ping a cada 15 s
+LONG_POLL_WAIT = 25
+
+def encoded_audio_stream(source, codec=UPLOAD_CODEC, chunk_size=STREAM_CHUNK_SIZE, stats=None) -> Iterator[bytes]:
+    """
+    Codifica o áudio de source (vídeo ou áudio) com o ffmpeg, mono 16 kHz, e
+    gera os bytes do stdout à medida que são produzidos: o envio começa antes
+    de o ffmpeg terminar e nada é gravado em disco. stats (dict), se
+    informado, recebe o total de bytes gerados.
+    """
+    process = subprocess.Popen(
+        ['ffmpeg', '-nostdin', '-loglevel', 'error', '-i', str(source),
+         '-vn', '-ac', '1', '-ar', '16000', *UPLOAD_CODECS[codec]['args'], 'pipe:1'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    # Drenar stderr em paralelo para o ffmpeg não travar com o pipe cheio
+    stderr_chunks = []
+    stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    stderr_thread.start()
+
+    total = 0
+    try:
+        while True:
+            chunk = process.stdout.read(chunk_size)
+            if not chunk:
+                break
+            total += len(chunk)
+            yield chunk
+        process.wait()
+        stderr_thread.join()
+        if process.returncode != 0:
+            error = b''.join(stderr_chunks).decode('utf-8', errors='replace')
+            raise Exception(f"FFmpeg error: {error}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        if stats is not None:
+            stats['bytes'] = total
+
+def parse_sse(lines) -> Iterator[tuple]:
+    """Converte as linhas de um stream text/event-stream em pares (evento, dados JSON)"""
+    event, data = 'message', []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, json.loads('\n'.join(data))
+            event, data = 'message', []
+        elif line.startswith(':'):
+            continue
+        elif line.startswith('event:'):
+            event = line[6:].strip()
+        elif line.startswith('data:'):
+            data.append(line[5:].lstrip())
+
+def merge_segment_records(subtitles: Dict[int, Dict], records) -> list:
+    """
+    Aplica os registros do resultado incremental (/results ou eventos "segments")
+    em subtitles ({index: legenda}) e retorna a lista de legendas em ordem, no
+    formato do resultado final ({"timestamp", "text"}). A tradução, quando
+    chega, substitui o texto transcrito.
+    """
+    for record in records:
+        subtitle = subtitles.setdefault(record["index"], {"timestamp": 0.0, "text": ""})
+        if "timestamp" in record:
+            subtitle["timestamp"] = record["timestamp"]
+        if "translation" in record:
+            subtitle["text"] = record["translation"]
+            subtitle["translated"] = True
+        elif "text" in record and not subtitle.get("translated"):
+            subtitle["text"] = record["text"]
+    return [{"timestamp": sub["timestamp"], "text": sub["text"]}
+            for _, sub in sorted(subtitles.items())]
+
+def encode_audio_file(source, destination, codec=UPLOAD_CODEC):
+    """Grava em destination o mesmo áudio comprimido que submit_stream enviaria"""
+    with open(destination, 'wb') as f:
+        for chunk in encoded_audio_stream(source, codec):
+            f.write(chunk)
+    return destination
 
 class SubtitleAPIClient:
     def __init__(self, api_url: str = "http://localhost:8000"):
@@ -56,6 +160,143 @@ class SubtitleAPIClient:
             self.logger.error(f"Erro ao enviar arquivo para transcrição: {str(e)}")
             raise
 
+    def submit_stream(self, source: str, source_lang: str = "auto", target_lang: str = "pt-br",
+                      codec: str = UPLOAD_CODEC) -> str:
+        """
+        Envia o áudio de source (vídeo ou áudio) comprimido em codec, em
+        streaming (transfer-encoding chunked) enquanto o ffmpeg ainda codifica.
+        Retorna o task_id.
+        """
+        if not self.check_server_health():
+            raise ConnectionError("Servidor de transcrição não está disponível")
+
+        stats = {}
+        start = time.time()
+        try:
+            response = self.session.post(
+                f"{self.api_url}/transcribe/",
+                params={
+                    'source_language': source_lang,
+                    'target_language': target_lang
+                },
+                data=encoded_audio_stream(source, codec, stats=stats),
+                headers={'Content-Type': UPLOAD_CODECS[codec]['content_type']},
+                # Sem limite para o envio; 30 s para conectar e 5 min para a resposta
+                timeout=(30, 300)
+            )
+            response.raise_for_status()
+        except Exception as e:
+            self.logger.error(f"Erro ao enviar áudio para transcrição: {str(e)}")
+            raise
+
+        self.logger.info(
+            f"Áudio enviado ({codec}): {stats.get('bytes', 0) / 1024**2:.1f} MB em {time.time() - start:.0f}s"
+        )
+        return response.json()["task_id"]
+
+    def submit_resumable(self, audio_file: str, source_lang: str = "auto", target_lang: str = "pt-br",
+                         block_size: int = UPLOAD_BLOCK_SIZE, max_failures: int = 5) -> str:
+        """
+        Envia audio_file pelo protocolo de upload retomável (POST /uploads/,
+        PUT de blocos com Content-Range, finalize com SHA-256) e retorna o
+        task_id. Depois de uma falha de rede o envio continua do offset
+        confirmado pelo servidor; o upload_id fica em <arquivo>.upload.json,
+        então uma nova chamada após reiniciar o programa também retoma.
+        """
+        path = Path(audio_file)
+        size = path.stat().st_size
+        sha256 = self._file_sha256(path)
+        state_path = path.with_name(path.name + ".upload.json")
+
+        upload = self._resume_upload(state_path, size, sha256)
+        if upload is None:
+            upload = self._request_json("post", "/uploads/", json={
+                'size': size,
+                'filename': path.name,
+                'source_language': source_lang,
+                'target_language': target_lang
+            })
+            state_path.write_text(json.dumps({'upload_id': upload['upload_id'], 'size': size, 'sha256': sha256}))
+        upload_id = upload['upload_id']
+        offset = upload['offset']
+        if offset:
+            self.logger.info(f"Retomando upload {upload_id} em {offset / 1024**2:.1f} MB")
+
+        failures = 0
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    while offset < size:
+                        f.seek(offset)
+                        block = f.read(block_size)
+                        response = self.session.put(
+                            f"{self.api_url}/uploads/{upload_id}",
+                            data=block,
+                            headers={'Content-Range': f"bytes {offset}-{offset + len(block) - 1}/{size}"},
+                            timeout=(30, 120)
+                        )
+                        if response.status_code == 409:
+                            offset = response.json()['offset']
+                            continue
+                        response.raise_for_status()
+                        offset = response.json()['offset']
+                        failures = 0
+                        self.logger.info(f"Upload: {offset / size:.0%}")
+
+                    response = self.session.post(
+                        f"{self.api_url}/uploads/{upload_id}/finalize",
+                        json={'sha256': sha256},
+                        timeout=(30, 300)
+                    )
+                    if response.status_code == 409:
+                        offset = response.json()['offset']
+                        continue
+                    if response.status_code == 422:
+                        state_path.unlink(missing_ok=True)
+                    response.raise_for_status()
+                    state_path.unlink(missing_ok=True)
+                    return response.json()['task_id']
+
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    failures += 1
+                    if failures > max_failures:
+                        self.logger.error(f"Upload interrompido após {failures} falhas: {str(e)}")
+                        raise
+                    wait = min(60, 2 ** failures)
+                    self.logger.warning(f"Falha de rede no upload ({str(e)}); retomando em {wait}s")
+                    time.sleep(wait)
+                    try:
+                        offset = self._request_json("get", f"/uploads/{upload_id}")['offset']
+                    except (requests.ConnectionError, requests.Timeout):
+                        pass  # Tenta de novo a partir do último offset conhecido
+
+    def _resume_upload(self, state_path: Path, size: int, sha256: str):
+        """Estado no servidor de um upload anterior do mesmo arquivo, se ainda existir"""
+        try:
+            state = json.loads(state_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        if state.get('size') != size or state.get('sha256') != sha256:
+            return None
+        response = self.session.get(f"{self.api_url}/uploads/{state['upload_id']}", timeout=30)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def _request_json(self, method: str, path: str, **kwargs) -> Dict:
+        response = self.session.request(method, f"{self.api_url}{path}", timeout=30, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _file_sha256(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(UPLOAD_BLOCK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
     def get_transcription_status(self, task_id: str) -> Dict:
         """Verifica o status de uma tarefa de transcrição"""
         try:
@@ -69,25 +310,88 @@ class SubtitleAPIClient:
             self.logger.error(f"Erro ao verificar status da transcrição: {str(e)}")
             raise
 
-    def wait_for_completion(self, task_id: str, check_interval: int = 5, timeout: int = 3600) -> Dict:
+    def get_partial_results(self, task_id: str, since: int = 0) -> Dict:
+        """Segmentos já decodificados a partir do cursor since; o próximo cursor vem em 'next'"""
+        return self._request_json('GET', f"/results/{task_id}", params={"since": since})
+
+    def wait_for_completion(self, task_id: str, check_interval: int = 5, timeout: int = 3600,
+                            on_progress: Optional[Callable[[Dict], None]] = None,
+                            on_segments: Optional[Callable[[list], None]] = None) -> Dict:
         """
         Aguarda a conclusão da transcrição com timeout
         timeout: tempo máximo de espera em segundos (padrão 1 hora)
+        on_progress: chamado com o status a cada atualização enviada pelo servidor
+        on_segments: chamado com os registros novos do resultado incremental
+            (ver merge_segment_records) enquanto a tarefa é processada
+
+        O progresso chega pelo stream SSE /events/{task_id}; se ele não estiver
+        disponível ou cair, o acompanhamento continua por long-poll no /status.
+        check_interval só é usado com servidores sem long-poll.
         """
-        start_time = time.time()
+        deadline = time.time() + timeout
+        cursor = {'since': 0}  # Registros do resultado incremental já entregues
+        try:
+            return self._wait_events(task_id, deadline, on_progress, on_segments, cursor)
+        except (requests.RequestException, ValueError) as e:
+            self.logger.warning(f"Stream de progresso indisponível ({str(e)}), usando long-poll")
+        return self._wait_long_poll(task_id, deadline, check_interval, on_progress, on_segments, cursor)
+
+    def _wait_events(self, task_id: str, deadline: float, on_progress=None, on_segments=None,
+                     cursor=None) -> Dict:
+        with self.session.get(
+            f"{self.api_url}/events/{task_id}",
+            params={"since": cursor['since']} if on_segments else None,
+            headers={"Accept": "text/event-stream"},
+            stream=True,
+            timeout=(10, EVENTS_READ_TIMEOUT)
+        ) as response:
+            response.raise_for_status()
+            response.encoding = 'utf-8'
+            for event, data in parse_sse(response.iter_lines(decode_unicode=True)):
+                if event == "completed":
+                    return data
+                if event == "segments":
+                    cursor['since'] = data["next"]
+                    on_segments(data["segments"])
+                    continue
+                if event == "error" or data.get("status") in ("error", "not_found"):
+                    raise Exception(data.get("error", "Erro desconhecido na transcrição"))
+                self._report_progress(data, on_progress)
+                if time.time() > deadline:
+                    raise TimeoutError("Tempo limite excedido aguardando transcrição")
+        raise requests.ConnectionError("Stream de progresso encerrado antes do fim da tarefa")
+
+    def _wait_long_poll(self, task_id: str, deadline: float, check_interval: int, on_progress=None,
+                        on_segments=None, cursor=None) -> Dict:
+        revision = -1
         while True:
-            if time.time() - start_time > timeout:
+            if time.time() > deadline:
                 raise TimeoutError("Tempo limite excedido aguardando transcrição")
-                
-            status = self.get_transcription_status(task_id)
+            
+            status = self._request_json(
+                'GET', f"/status/{task_id}",
+                params={"revision": revision, "wait": LONG_POLL_WAIT}
+            )
             
             if status["status"] == "completed":
                 return status
-            elif status["status"] == "error":
+            elif status["status"] in ("error", "not_found"):
                 raise Exception(status.get("error", "Erro desconhecido na transcrição"))
             
-            # Registrar progresso
-            if "progress" in status:
-                self.logger.info(f"Progresso: {status['progress']}%")
-            
-            time.sleep(check_interval)
\ No newline at end of file
+            self._report_progress(status, on_progress)
+            if on_segments:
+                partial = self.get_partial_results(task_id, cursor['since'])
+                cursor['since'] = partial["next"]
+                if partial["segments"]:
+                    on_segments(partial["segments"])
+            if "revision" in status:
+                revision = status["revision"]
+            else:
+                # Servidor sem long-poll: a resposta volta na hora
+                time.sleep(check_interval)
+
+    def _report_progress(self, status: Dict, on_progress=None):
+        if "progress" in status:
+            self.logger.info(f"Progresso: {status['progress']:.0f}%")
+        if on_progress:
+            on_progress(status)
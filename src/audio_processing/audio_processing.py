@@ -2,7 +2,8 @@ import ffmpeg
 import os
 from pathlib import Path
 import uuid
-import subprocess
+from src.audio_processing.audio_stream import load_audio_stream
+from src.worker.project_import import import_source_video
 
 def create_project_dirs(video_file):
     """Cria estrutura de diretórios do projeto"""
@@ -20,15 +21,10 @@ def create_project_dirs(video_file):
     for dir_path in [segments_dir, transcripts_dir, original_dir]:
         dir_path.mkdir(parents=True, exist_ok=True)
     
-    # Copiar vídeo original mantendo o nome e o áudio
-    video_path = Path(video_file)
-    original_video = original_dir / video_path.name
-    
-    if not original_video.exists():
-        from shutil import copy2
-        copy2(video_file, original_video)  # Copia mantendo o áudio original
+    # Importar vídeo original (reflink/hardlink/referência, cópia só se pedida)
+    original_video = import_source_video(video_file, original_dir)['path']
         
-    return str(segments_dir), str(transcripts_dir), str(original_video), project_id
+    return str(segments_dir), str(transcripts_dir), original_video, project_id
 
 def extract_audio(video_file):
     try:
@@ -39,33 +35,16 @@ def extract_audio(video_file):
         audio_file = str(Path(segments_dir) / 'full_audio.wav')
         
         try:
-            # Usar subprocess diretamente para mais controle
-            command = [
-                'ffmpeg', '-i', video_file,
-                '-vn',  # No video
-                '-acodec', 'pcm_s16le',  # WAV format
-                '-ac', '1',  # Mono
-                '-ar', '16000',  # 16kHz
-                '-y',  # Overwrite output
-                audio_file
-            ]
-            
-            # Executar comando ffmpeg
-            result = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
-            
-            if result.returncode != 0:
-                raise Exception(f"FFmpeg error: {result.stderr}")
+            # Decodificar uma única vez pelo pipe do ffmpeg; o WAV é gravado a
+            # partir do mesmo PCM apenas para reprodução no projeto
+            audio = load_audio_stream(video_file, wav_path=audio_file)
             
         except Exception as e:
             raise Exception(f"Error extracting audio: {str(e)}")
         
         return {
             'audio_file': audio_file,
+            'audio': audio,  # Amostras float32 a 16 kHz, prontas para VAD/transcrição
             'segments_dir': segments_dir,
             'transcripts_dir': transcripts_dir,
             'project_id': project_id,
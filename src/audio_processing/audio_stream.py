@@ -0,0 +1,95 @@
+import subprocess
+import threading
+import wave
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+def _ffmpeg_command(source, sample_rate):
+    return [
+        'ffmpeg', '-nostdin',
+        '-loglevel', 'error',
+        '-i', str(source),
+        '-vn',  # No video
+        '-ac', '1',  # Mono
+        '-ar', str(sample_rate),
+        '-f', 's16le',  # PCM cru, sem cabeçalho
+        '-acodec', 'pcm_s16le',
+        'pipe:1'
+    ]
+
+def stream_audio_frames(source, frame_seconds=30, sample_rate=SAMPLE_RATE, wav_path=None):
+    """
+    Decodifica o áudio de um vídeo/áudio com uma única execução do ffmpeg,
+    lendo PCM do stdout e gerando frames float32 de frame_seconds segundos
+    (o último pode ser menor). Os bytes são lidos em um buffer fixo
+    reutilizado; nenhum arquivo intermediário é necessário.
+
+    Se wav_path for informado, o mesmo PCM é gravado em um WAV enquanto é
+    lido (para reprodução na interface), sem decodificar o vídeo de novo.
+    """
+    frame_bytes = int(frame_seconds * sample_rate) * 2
+    buffer = bytearray(frame_bytes)
+    view = memoryview(buffer)
+
+    process = subprocess.Popen(
+        _ffmpeg_command(source, sample_rate),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=frame_bytes
+    )
+
+    # Drenar stderr em paralelo para o ffmpeg não travar com o pipe cheio
+    stderr_chunks = []
+    stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    stderr_thread.start()
+
+    wav_file = None
+    if wav_path:
+        wav_file = wave.open(str(wav_path), 'wb')
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+
+    try:
+        filled = 0
+        while True:
+            n = process.stdout.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+            if filled == frame_bytes:
+                if wav_file:
+                    wav_file.writeframesraw(view)
+                yield np.frombuffer(buffer, dtype=np.int16).astype(np.float32) / 32768.0
+                filled = 0
+
+        # Último frame incompleto (descartando um eventual byte solto)
+        filled -= filled % 2
+        if filled:
+            if wav_file:
+                wav_file.writeframesraw(view[:filled])
+            yield np.frombuffer(buffer, dtype=np.int16, count=filled // 2).astype(np.float32) / 32768.0
+
+        process.wait()
+        stderr_thread.join()
+        if process.returncode != 0:
+            error = b''.join(stderr_chunks).decode('utf-8', errors='replace')
+            raise Exception(f"FFmpeg error: {error}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        if wav_file:
+            wav_file.close()
+
+def load_audio_stream(source, sample_rate=SAMPLE_RATE, wav_path=None):
+    """
+    Carrega todo o áudio em memória (float32 mono) a partir do pipe do
+    ffmpeg. Substitui whisper.load_audio sem exigir um WAV intermediário.
+    """
+    frames = list(stream_audio_frames(source, sample_rate=sample_rate, wav_path=wav_path))
+    if not frames:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(frames)
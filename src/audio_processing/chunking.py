@@ -0,0 +1,146 @@
+import re
+import numpy as np
+
+SAMPLE_RATE = 16000
+ENERGY_FRAME = 320  # 20 ms a 16 kHz
+
+def _quietest_sample(audio, lo, hi, frame=ENERGY_FRAME):
+    """Centro do frame de menor energia em audio[lo:hi]"""
+    n = (hi - lo) // frame
+    if n <= 0:
+        return (lo + hi) // 2
+    energy = np.square(audio[lo:lo + n * frame].reshape(n, frame)).mean(axis=1)
+    return lo + int(np.argmin(energy)) * frame + frame // 2
+
+def _silence_gaps(speech_regions, total, sample_rate):
+    """Intervalos (início, fim) em amostras entre regiões de fala consecutivas"""
+    gaps = []
+    previous_end = 0
+    for region in speech_regions:
+        start = int(region['start'] * sample_rate)
+        if start > previous_end:
+            gaps.append((previous_end, start))
+        previous_end = max(previous_end, int(region['end'] * sample_rate))
+    if previous_end < total:
+        gaps.append((previous_end, total))
+    return gaps
+
+def plan_chunks(audio, chunk_seconds=300, overlap_seconds=2.0, speech_regions=None,
+                search_seconds=10.0, sample_rate=SAMPLE_RATE):
+    """
+    Define os limites (início, fim) em amostras dos chunks de um áudio.
+
+    Cada corte é procurado em até search_seconds ao redor do tamanho alvo:
+    com speech_regions (VAD), no meio do silêncio mais próximo, sem
+    sobreposição; sem VAD (ou sem silêncio por perto), no frame de menor
+    energia, e os chunks vizinhos se sobrepõem em overlap_seconds para que
+    nenhuma palavra fique cortada. O último pedaço curto é anexado ao chunk
+    anterior em vez de virar um chunk próprio.
+    """
+    total = len(audio)
+    size = max(1, int(chunk_seconds * sample_rate))
+    half_overlap = int(overlap_seconds * sample_rate) // 2
+    search = int(search_seconds * sample_rate)
+    gaps = _silence_gaps(speech_regions, total, sample_rate) if speech_regions is not None else []
+
+    bounds = []
+    start = 0
+    while start < total:
+        target = start + size
+        if target + size // 4 >= total:
+            bounds.append((start, total))
+            break
+
+        candidates = [(a + b) // 2 for a, b in gaps if abs((a + b) // 2 - target) <= search and (a + b) // 2 > start]
+        if candidates:
+            cut = min(candidates, key=lambda c: abs(c - target))
+            end, next_start = cut, cut
+        else:
+            cut = _quietest_sample(audio, max(start + 1, target - search), min(total, target + search))
+            end, next_start = min(total, cut + half_overlap), max(start + 1, cut - half_overlap)
+
+        bounds.append((start, end))
+        start = next_start
+    return bounds
+
+def split_audio(audio, chunk_seconds=300, overlap_seconds=2.0, speech_regions=None, sample_rate=SAMPLE_RATE):
+    """
+    Divide o áudio em chunks conforme plan_chunks. Retorna listas de chunks e
+    de offsets (segundos). Os chunks são views do array original (nenhuma
+    cópia, desde que o áudio já seja float32).
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    bounds = plan_chunks(audio, chunk_seconds, overlap_seconds, speech_regions, sample_rate=sample_rate)
+    chunks = [audio[start:end] for start, end in bounds]
+    offsets = [start / sample_rate for start, _ in bounds]
+    return chunks, offsets
+
+def _normalize(text):
+    return re.sub(r'[^\w\s]', '', text.lower()).strip()
+
+def _is_duplicate(previous, segment):
+    """Mesmo trecho transcrito pelos dois chunks de uma sobreposição"""
+    if segment['start'] >= previous['end']:
+        return False
+    a, b = _normalize(previous['text']), _normalize(segment['text'])
+    return bool(a and b) and (a == b or a.endswith(b) or b.startswith(a))
+
+class ChunkMerger:
+    """
+    Versão incremental de merge_chunk_segments. Os chunks podem chegar fora
+    de ordem (transcrição paralela); add() devolve, na ordem original, os
+    segmentos mantidos de cada chunk que já pode ser juntado (todos os
+    anteriores chegaram). O resultado é o mesmo de merge_chunk_segments.
+    """
+
+    def __init__(self, chunk_bounds):
+        self.chunk_bounds = chunk_bounds
+        self.merged = []
+        self._pending = {}
+        self._last = None
+
+    def add(self, index, segments):
+        self._pending[index] = segments
+        ready = []
+        while len(self.merged) in self._pending:
+            kept = self._merge(len(self.merged), self._pending.pop(len(self.merged)))
+            self.merged.append(kept)
+            ready.append(kept)
+        return ready
+
+    def _merge(self, i, segments):
+        start, end = self.chunk_bounds[i]
+        lo = -np.inf
+        if i > 0:
+            previous_end = self.chunk_bounds[i - 1][1]
+            lo = (start + previous_end) / 2 if previous_end > start else start
+        hi = np.inf
+        if i + 1 < len(self.chunk_bounds):
+            next_start = self.chunk_bounds[i + 1][0]
+            hi = (next_start + end) / 2 if end > next_start else next_start
+
+        kept = []
+        for segment in segments:
+            center = (segment['start'] + segment['end']) / 2
+            if center < lo or center >= hi:
+                continue
+            if self._last is not None and _is_duplicate(self._last, segment):
+                continue
+            kept.append(segment)
+            self._last = segment
+        return kept
+
+def merge_chunk_segments(chunk_segments, chunk_bounds):
+    """
+    Junta os segmentos (em tempo absoluto) de chunks que podem se sobrepor.
+
+    chunk_bounds são os intervalos (início, fim) em segundos de cada chunk.
+    Em cada sobreposição, o ponto médio decide de qual chunk vem cada
+    segmento (pelo centro do segmento); segmentos repetidos na fronteira são
+    descartados comparando tempo e texto. Retorna os segmentos mantidos de
+    cada chunk, na mesma ordem.
+    """
+    merger = ChunkMerger(chunk_bounds)
+    for i, segments in enumerate(chunk_segments):
+        merger.add(i, segments)
+    return merger.merged
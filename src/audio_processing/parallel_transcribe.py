@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Estado de cada processo do pool (preenchido por _init_worker)
+_worker_model = None
+_worker_audio = None
+_worker_shm = None
+
+def default_threads_per_worker(num_workers):
+    """Divide os núcleos da máquina entre os processos do pool"""
+    return max(1, (os.cpu_count() or 1) // max(1, num_workers))
+
+def _init_worker(model_size, num_threads, shm_name, num_samples):
+    """Inicializa um processo: limita as threads do torch, carrega o modelo e mapeia o áudio"""
+    global _worker_model, _worker_audio, _worker_shm
+    import torch
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+
+    from src.models.models_handler import load_whisper_model
+    _worker_model = load_whisper_model(model_size)
+    _worker_model.eval()
+
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_audio = np.ndarray((num_samples,), dtype=np.float32, buffer=_worker_shm.buf)
+
+def _detect_language(start, end):
+    import torch
+    import whisper
+    with torch.no_grad():
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(_worker_audio[start:end])).to(_worker_model.device)
+        _, probs = _worker_model.detect_language(mel)
+    return max(probs, key=probs.get)
+
+def _transcribe_chunk(index, start, end, options):
+    """Transcreve audio[start:end] e devolve (índice, segmentos relativos ao chunk)"""
+    import torch
+    with torch.no_grad():
+        result = _worker_model.transcribe(_worker_audio[start:end], **options)
+    return index, (result or {}).get("segments", [])
+
+class ParallelChunkTranscriber:
+    """
+    Pool de processos para transcrever chunks em paralelo em máquinas sem GPU.
+
+    O áudio completo é colocado uma única vez em memória compartilhada; cada
+    processo carrega sua própria cópia do modelo (model_size pode ser menor
+    que o do modo sequencial) com torch limitado a threads_per_worker
+    threads, e recebe apenas os índices (início, fim) de cada chunk.
+    """
+
+    def __init__(self, audio, num_workers, model_size="small", threads_per_worker=None):
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        self.num_workers = num_workers
+        self.model_size = model_size
+        self.threads_per_worker = threads_per_worker or default_threads_per_worker(num_workers)
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, audio.nbytes))
+        np.ndarray(audio.shape, dtype=np.float32, buffer=self._shm.buf)[:] = audio
+        self.num_samples = len(audio)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_size, self.threads_per_worker, self._shm.name, self.num_samples)
+        )
+
+    def detect_language(self, start, end):
+        return self._executor.submit(_detect_language, start, end).result()
+
+    def transcribe(self, bounds, options, on_progress=None, on_chunk=None):
+        """
+        Transcreve os chunks definidos por bounds (lista de (início, fim) em
+        amostras). Retorna os segmentos de cada chunk na ordem original;
+        on_progress(concluídos, total) é chamado a cada chunk terminado e
+        on_chunk(índice, segmentos) recebe cada chunk assim que ele termina.
+        """
+        futures = [
+            self._executor.submit(_transcribe_chunk, i, start, end, options)
+            for i, (start, end) in enumerate(bounds)
+        ]
+        results = [None] * len(bounds)
+        for done, future in enumerate(as_completed(futures), 1):
+            index, segments = future.result()
+            results[index] = segments
+            if on_chunk:
+                on_chunk(index, segments)
+            if on_progress:
+                on_progress(done, len(bounds))
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,132 @@
+import numpy as np
+from pathlib import Path
+
+FORMAT_VERSION = 1
+SEGMENTS_SUFFIX = '.segments.npz'
+
+def _pack_texts(texts):
+    """Concatena textos UTF-8 em um único buffer + offsets (n + 1)"""
+    encoded = [t.encode('utf-8') for t in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+def segments_path(transcripts_dir, stem):
+    """Caminho do arquivo de segmentos de um áudio dentro de transcripts/"""
+    return Path(transcripts_dir) / f"{stem}{SEGMENTS_SUFFIX}"
+
+def save_segments(path, segments, words=None):
+    """
+    Salva segmentos (e opcionalmente palavras) em formato colunar (.npz).
+
+    segments: lista de dicts com 'start', 'end' e 'text' em tempo absoluto.
+    words: lista de dicts com 'start', 'end', 'text', 'probability' e
+    'segment' (índice do segmento a que a palavra pertence).
+    Os tempos ficam em float32 e os textos em um único buffer UTF-8 com
+    offsets, sem um objeto Python por segmento.
+    """
+    text_bytes, text_offsets = _pack_texts([s['text'] for s in segments])
+    columns = {
+        'version': np.array(FORMAT_VERSION),
+        'start': np.array([s['start'] for s in segments], dtype=np.float32),
+        'end': np.array([s['end'] for s in segments], dtype=np.float32),
+        'text_bytes': text_bytes,
+        'text_offsets': text_offsets
+    }
+
+    if words:
+        word_bytes, word_offsets = _pack_texts([w['text'] for w in words])
+        columns.update({
+            'word_start': np.array([w['start'] for w in words], dtype=np.float32),
+            'word_end': np.array([w['end'] for w in words], dtype=np.float32),
+            'word_probability': np.array([w.get('probability', 1.0) for w in words], dtype=np.float32),
+            'word_segment': np.array([w['segment'] for w in words], dtype=np.int32),
+            'word_bytes': word_bytes,
+            'word_offsets': word_offsets
+        })
+
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **columns)
+    return Path(path)
+
+class SegmentTable:
+    """
+    Segmentos de uma transcrição carregados em colunas numpy.
+    Permite buscar o segmento de um instante (busca binária) e decodifica
+    os textos apenas quando acessados.
+    """
+
+    def __init__(self, columns):
+        self.start = columns['start']
+        self.end = columns['end']
+        self._text_bytes = columns['text_bytes']
+        self._text_offsets = columns['text_offsets']
+        self.has_words = 'word_start' in columns
+        if self.has_words:
+            self.word_start = columns['word_start']
+            self.word_end = columns['word_end']
+            self.word_probability = columns['word_probability']
+            self.word_segment = columns['word_segment']
+            self._word_bytes = columns['word_bytes']
+            self._word_offsets = columns['word_offsets']
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def __len__(self):
+        return len(self.start)
+
+    def text(self, index):
+        a, b = self._text_offsets[index], self._text_offsets[index + 1]
+        return self._text_bytes[a:b].tobytes().decode('utf-8')
+
+    @property
+    def texts(self):
+        return [self.text(i) for i in range(len(self))]
+
+    def index_at(self, seconds):
+        """Índice do segmento em andamento no instante informado (ou o anterior mais próximo); -1 se antes do primeiro"""
+        return int(np.searchsorted(self.start, seconds, side='right')) - 1
+
+    def words(self, index):
+        """Palavras de um segmento como lista de dicts"""
+        if not self.has_words:
+            return []
+        result = []
+        for i in np.flatnonzero(self.word_segment == index):
+            a, b = self._word_offsets[i], self._word_offsets[i + 1]
+            result.append({
+                'start': round(float(self.word_start[i]), 3),
+                'end': round(float(self.word_end[i]), 3),
+                'text': self._word_bytes[a:b].tobytes().decode('utf-8'),
+                'probability': float(self.word_probability[i])
+            })
+        return result
+
+    def to_list(self):
+        """Segmentos como lista de dicts (start, end, text)"""
+        return [{
+            'start': round(float(self.start[i]), 3),
+            'end': round(float(self.end[i]), 3),
+            'text': self.text(i)
+        } for i in range(len(self))]
+
+def load_segments(path):
+    return SegmentTable.load(path)
+
+def replace_texts(path, table, texts):
+    """
+    Regrava os segmentos de table com novos textos (editados na interface),
+    mantendo os tempos. As palavras só são mantidas nos segmentos cujo texto
+    não mudou. Retorna a tabela regravada.
+    """
+    segments = table.to_list()
+    words = []
+    for index, (segment, text) in enumerate(zip(segments, texts)):
+        if text == segment['text']:
+            words.extend(dict(word, segment=index) for word in table.words(index))
+        segment['text'] = text
+    save_segments(path, segments, words)
+    return load_segments(path)
@@ -2,14 +2,22 @@ import whisper
 import torch
 from pathlib import Path
 import json
-from src.models.models_handler import load_whisper_model
+from src.models.models_handler import load_whisper_model, ModelManager
+from src.models.quantization import CPU_PRECISION
 import logging
 import psutil
 import os
 import numpy as np
 import threading
 from functools import wraps
-from src.translation.translator import GoogleTranslator
+from src.translation.translator import create_translator
+from src.translation.pipeline import TranslationPipeline
+from src.audio_processing.vad import detect_speech_regions, pack_speech_windows
+from src.audio_processing.audio_stream import load_audio_stream
+from src.audio_processing.segment_store import save_segments, segments_path
+from src.audio_processing.chunking import split_audio, ChunkMerger
+from src.audio_processing.parallel_transcribe import ParallelChunkTranscriber, default_threads_per_worker
+from src.cache.transcription_cache import TranscriptionCache, fingerprint_pcm
 
 def timeout(seconds):
     """Timeout decorator usando threading.Timer em vez de signal.SIGALRM"""
@@ -54,127 +62,354 @@ def check_system_resources():
         raise Exception("Memória insuficiente para transcrição (mínimo 2GB necessário)")
     return True
 
-def split_audio(audio, chunk_duration=300):
-    """Divide o áudio em chunks de tamanho especificado (em segundos)"""
-    sample_rate = whisper.audio.SAMPLE_RATE
-    chunk_length = chunk_duration * sample_rate
-    chunks = np.array_split(audio, max(1, len(audio) // chunk_length))
-    # Converter chunks para float32
-    return [chunk.astype(np.float32) for chunk in chunks]
-
 def format_portuguese_text(text):
     """Formata o texto traduzido para melhor legibilidade"""
     # Remove espaços extras
     text = ' '.join(text.split())
     return text
 
+MODEL_SIZE = "small"
+
+# Transcrição paralela em CPU: número de processos (1 = sequencial) e modelo usado por eles
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", 1))
+PARALLEL_MODEL = os.getenv("PARALLEL_MODEL", MODEL_SIZE)
+
+# Opções de decodificação do Whisper (o idioma é preenchido após a detecção)
+DECODE_OPTIONS = {
+    "task": "transcribe",
+    "temperature": [0.0, 0.2],
+    "best_of": 2,
+    "beam_size": 3,
+    "patience": 1.0,
+    "verbose": False,
+    "fp16": False
+}
+
+_transcription_cache = None
+
+def transcription_model(parallel_workers=1, parallel_model=None):
+    """Modelo efetivamente usado: no modo paralelo (só sem GPU) pode ser outro"""
+    if parallel_workers > 1 and not torch.cuda.is_available():
+        return parallel_model or PARALLEL_MODEL
+    return MODEL_SIZE
+
+def get_transcription_cache():
+    """Cache de transcrições compartilhado (data/cache/transcriptions.db)"""
+    global _transcription_cache
+    if _transcription_cache is None:
+        _transcription_cache = TranscriptionCache()
+    return _transcription_cache
+
 @timeout(300)  # 5 minutos timeout
 def load_model_with_timeout(model_size="small", target_language="pt"):
-    """Carrega o modelo Whisper com timeout"""
-    return load_whisper_model(model_size, target_language=target_language)
+    """Carrega o modelo Whisper com timeout, reservado até ModelManager.release"""
+    return load_whisper_model(model_size, target_language=target_language, reserve=True)
 
-def transcribe_audio(audio_file, target_language="pt", transcripts_dir=None, chunk_size=300):
-    """Função de transcrição com suporte a processamento em chunks e detecção automática de idioma"""
+def _load_model():
+    """Carrega o modelo Whisper do modo sequencial com timeout"""
+    print("\nCarregando modelo Whisper...")
     try:
-        print("\n=== Iniciando Transcrição ===")
-        
-        # 0. Verificar recursos do sistema
-        check_system_resources()
+        model = load_model_with_timeout(MODEL_SIZE)
+        print("✓ Modelo carregado com sucesso")
+        print(f"Tipo do modelo: {type(model)}")
+        print(f"Dispositivo do modelo: {next(model.parameters()).device}")
+        return model
         
-        # 1. Verificar arquivo de áudio
-        audio_path = Path(audio_file)
-        if not audio_path.exists():
-            raise FileNotFoundError(f"Arquivo não encontrado: {audio_file}")
-        print(f"Arquivo de áudio: {audio_file} ({audio_path.stat().st_size / 1024 / 1024:.2f} MB)")
-        
-        # 2. Carregar modelo com timeout
-        print("\nCarregando modelo Whisper...")
+    except TimeoutError:
+        raise Exception("Timeout ao carregar modelo (5 minutos)")
+    except Exception as e:
+        raise Exception(f"Erro ao carregar modelo: {e}")
+
+def _plan_chunks(full_audio, chunk_size, use_vad, chunk_overlap):
+    """
+    Define os trechos a transcrever. Retorna (chunks, offsets, speech_windows):
+    janelas com fala do VAD ou, sem VAD, chunks com sobreposição.
+    """
+    duration = len(full_audio) / whisper.audio.SAMPLE_RATE
+    
+    # Detectar regiões de fala e agrupá-las em janelas de até 30 segundos
+    speech_windows = None
+    if use_vad:
         try:
-            model = load_model_with_timeout("small")
-            print("✓ Modelo carregado com sucesso")
-            print(f"Tipo do modelo: {type(model)}")
-            print(f"Dispositivo do modelo: {next(model.parameters()).device}")
-            
-        except TimeoutError:
-            raise Exception("Timeout ao carregar modelo (5 minutos)")
+            print("\nDetectando fala (VAD)...")
+            speech_regions = detect_speech_regions(full_audio)
+            speech_windows = pack_speech_windows(speech_regions)
+            speech_seconds = sum(w['duration'] for w in speech_windows)
+            print(f"✓ {len(speech_regions)} regiões de fala em {len(speech_windows)} janelas "
+                  f"({speech_seconds/60:.2f} de {duration/60:.2f} minutos)")
         except Exception as e:
-            raise Exception(f"Erro ao carregar modelo: {e}")
-        
-        # 3. Carregar e processar áudio
-        print("\nCarregando áudio...")
-        try:
-            # Carregar áudio
-            full_audio = whisper.load_audio(str(audio_path))
-            duration = len(full_audio) / whisper.audio.SAMPLE_RATE
-            print(f"✓ Áudio carregado: {duration/60:.2f} minutos")
+            print(f"Aviso: VAD indisponível ({e}), transcrevendo o áudio completo")
+            speech_windows = None
+    
+    if speech_windows == []:
+        raise Exception("Nenhuma fala detectada no áudio")
+    
+    if speech_windows:
+        # Cada janela é um trecho contíguo: timestamps da janela + offset = tempo original
+        audio_chunks = [
+            full_audio[int(w['start'] * whisper.audio.SAMPLE_RATE):int(w['end'] * whisper.audio.SAMPLE_RATE)]
+            for w in speech_windows
+        ]
+        chunk_offsets = [w['start'] for w in speech_windows]
+        print(f"\nTranscrevendo {len(audio_chunks)} janelas com fala")
+    else:
+        # Dividir em chunks cortados no trecho mais silencioso, com sobreposição
+        audio_chunks, chunk_offsets = split_audio(full_audio, chunk_size, overlap_seconds=chunk_overlap)
+        print(f"\nDividindo áudio em {len(audio_chunks)} chunks de ~{chunk_size} segundos "
+              f"(sobreposição de {chunk_overlap} s)")
+    
+    return audio_chunks, chunk_offsets, speech_windows
+
+def _absolute_segments(segments, offset):
+    """Timestamps relativos ao chunk -> linha do tempo original"""
+    return [{
+        'start': round(float(offset + seg["start"]), 3),
+        'end': round(float(offset + seg["end"]), 3),
+        'text': seg["text"].strip(),
+        'words': [{
+            'start': round(float(offset + word["start"]), 3),
+            'end': round(float(offset + word["end"]), 3),
+            'text': word["word"].strip(),
+            'probability': round(float(word.get("probability", 1.0)), 4)
+        } for word in seg.get("words", [])]
+    } for seg in segments]
+
+def run_whisper(full_audio, chunk_size=300, use_vad=True, word_timestamps=False, chunk_overlap=2.0,
+                parallel_workers=TRANSCRIBE_WORKERS, parallel_model=None, on_progress=None, on_chunk=None):
+    """
+    Executa VAD, detecção de idioma e Whisper sobre o áudio decodificado.
+    Retorna dict com 'language', 'chunks' (texto por janela/chunk),
+    'segments' e 'words' (tempo absoluto), 'speech_windows', 'model' e
+    'configuration'.
+
+    Com parallel_workers > 1 e sem GPU, os chunks são distribuídos entre
+    processos (ParallelChunkTranscriber), cada um com seu modelo
+    (parallel_model, por padrão PARALLEL_MODEL) e uma fatia dos núcleos.
+    on_progress(concluídos, total) é chamado a cada chunk transcrito e
+    on_chunk(segmentos, idioma) recebe os segmentos mantidos de cada chunk
+    (tempo absoluto, já sem as sobreposições), em ordem, assim que ele e os
+    anteriores terminam; o texto de cada chamada é o mesmo de 'chunks'.
+    """
+    parallel = parallel_workers > 1 and not torch.cuda.is_available()
+    model_size = transcription_model(parallel_workers, parallel_model)
+    
+    try:
+        audio_chunks, chunk_offsets, speech_windows = _plan_chunks(full_audio, chunk_size, use_vad, chunk_overlap)
+    except Exception as e:
+        raise Exception(f"Erro ao processar áudio: {e}")
+    
+    # Sobreposições: cada trecho fica com um único chunk, sem frases repetidas.
+    # Os chunks são juntados à medida que terminam, para on_chunk já receber o texto final
+    chunk_bounds = [(offset, offset + len(chunk) / whisper.audio.SAMPLE_RATE)
+                    for chunk, offset in zip(audio_chunks, chunk_offsets)]
+    merger = ChunkMerger(chunk_bounds)
+    
+    def add_chunk(index, segments):
+        for kept in merger.add(index, segments):
+            if on_chunk:
+                on_chunk(kept, audio_language)
+    
+    # Usar apenas os primeiros 30 segundos (de fala, se o VAD estiver ativo) para detectar o idioma
+    sample_start = int(chunk_offsets[0] * whisper.audio.SAMPLE_RATE) if speech_windows else 0
+    sample_end = sample_start + whisper.audio.SAMPLE_RATE * 30
+    
+    pool = None
+    model = None
+    try:
+        if parallel:
+            threads = default_threads_per_worker(parallel_workers)
+            print(f"\nTranscrição paralela: {parallel_workers} processos com o modelo {model_size}, "
+                  f"{threads} threads cada")
+            pool = ParallelChunkTranscriber(full_audio, parallel_workers, model_size, threads)
+            print("\nDetectando idioma do áudio...")
+            audio_language = pool.detect_language(sample_start, sample_end)
+        else:
+            model = _load_model()
             
             # Detectar idioma do áudio usando a função do próprio Whisper
             print("\nDetectando idioma do áudio...")
-            # Usar apenas os primeiros 30 segundos para detecção de idioma
-            audio_sample = whisper.pad_or_trim(full_audio[:whisper.audio.SAMPLE_RATE * 30])
-            # Converter para mel spectrograms
+            audio_sample = whisper.pad_or_trim(full_audio[sample_start:sample_end])
             mel = whisper.log_mel_spectrogram(audio_sample).to(model.device)
-            
-            # Detectar idioma usando a função dedicada do Whisper
             _, probs = model.detect_language(mel)
             audio_language = max(probs, key=probs.get)
-            print(f"✓ Idioma detectado: {audio_language}")
-            
-            # Dividir em chunks menores
-            audio_chunks = split_audio(full_audio, chunk_size)
-            print(f"\nDividindo áudio em {len(audio_chunks)} chunks de {chunk_size} segundos cada")
-            
-        except Exception as e:
-            raise Exception(f"Erro ao processar áudio: {e}")
+        print(f"✓ Idioma detectado: {audio_language}")
         
-        # 4. Configurar transcrição
-        options = {
-            "task": "transcribe",
-            "language": audio_language,
-            "temperature": [0.0, 0.2],
-            "best_of": 2,
-            "beam_size": 3,
-            "patience": 1.0,
-            "verbose": False,
-            "fp16": False
-        }
+        # Configurar transcrição
+        options = dict(DECODE_OPTIONS, language=audio_language, word_timestamps=word_timestamps)
         print("\nConfigurações:", options)
         
-        # 5. Realizar transcrição por chunks
+        # Realizar transcrição por chunks
         print("\nIniciando transcrição em chunks...")
-        try:
+        if parallel:
+            bounds = []
+            for chunk, offset in zip(audio_chunks, chunk_offsets):
+                start = int(round(offset * whisper.audio.SAMPLE_RATE))
+                bounds.append((start, start + len(chunk)))
+            pool.transcribe(
+                bounds, options, on_progress=on_progress,
+                on_chunk=lambda index, segments: add_chunk(index, _absolute_segments(segments, chunk_offsets[index]))
+            )
+        else:
             model.eval()
-            transcribed_chunks = []
-            
             with torch.no_grad():
-                for i, chunk in enumerate(audio_chunks, 1):
+                for i, (chunk, offset) in enumerate(zip(audio_chunks, chunk_offsets), 1):
                     print(f"\nProcessando chunk {i}/{len(audio_chunks)}...")
                     if torch.cuda.is_available():
                         torch.cuda.empty_cache()
                     
                     # Usar a função transcribe diretamente no chunk de áudio
                     result = model.transcribe(chunk, **options)
+                    add_chunk(i - 1, _absolute_segments((result or {}).get("segments", []), offset))
                     
-                    if result and result.get("text"):
-                        transcribed_chunks.append(result["text"])
-                    
+                    if on_progress:
+                        on_progress(i, len(audio_chunks))
                     if torch.cuda.is_available():
                         torch.cuda.empty_cache()
-            
+    finally:
+        if pool is not None:
+            pool.close()
+        if model is not None:
+            ModelManager.release(model)
+    
+    transcribed_chunks = []
+    segments = []
+    words = []
+    for kept in merger.merged:
+        text = " ".join(seg['text'] for seg in kept if seg['text'])
+        if text:
+            transcribed_chunks.append(text)
+        for seg in kept:
+            words.extend(dict(word, segment=len(segments)) for word in seg.pop('words'))
+            segments.append(seg)
+    
+    return {
+        'language': audio_language,
+        'chunks': transcribed_chunks,
+        'segments': segments,
+        'words': words,
+        'speech_windows': len(speech_windows) if speech_windows else None,
+        'model': model_size,
+        'configuration': options
+    }
+
+def transcribe_audio(audio_file, target_language="pt", transcripts_dir=None, chunk_size=300, use_vad=True, audio=None,
+                     use_cache=True, word_timestamps=False, chunk_overlap=2.0,
+                     parallel_workers=None, parallel_model=None, on_progress=None):
+    """
+    Função de transcrição com suporte a processamento em chunks e detecção automática de idioma.
+    Se audio (float32, 16 kHz) for informado, o arquivo não é decodificado novamente.
+    Com use_vad=True, apenas as janelas com fala detectadas pelo Silero VAD são
+    enviadas ao Whisper; silêncio e trechos sem voz não são transcritos.
+    Com use_cache=True, um áudio já transcrito (mesmas amostras, modelo e
+    opções) é recuperado do cache sem carregar o Whisper.
+    Os segmentos (e, com word_timestamps=True, as palavras) são salvos em
+    transcripts/<nome>.segments.npz com tempos absolutos.
+    Com parallel_workers > 1 (padrão: TRANSCRIBE_WORKERS) em máquinas sem
+    GPU, os chunks são transcritos em paralelo; on_progress(concluídos, total)
+    informa o andamento por chunk.
+    A tradução roda em paralelo com o Whisper (TranslationPipeline): cada
+    chunk é enviado ao tradutor assim que é transcrito.
+    """
+    parallel_workers = TRANSCRIBE_WORKERS if parallel_workers is None else parallel_workers
+    model_name = transcription_model(parallel_workers, parallel_model)
+    # A precisão da CPU (fp32/int8) muda o resultado e faz parte da chave do cache
+    cache_model = model_name if torch.cuda.is_available() else f"{model_name}-{CPU_PRECISION}"
+    translator = None
+    pipeline = None
+    try:
+        print("\n=== Iniciando Transcrição ===")
+        
+        # 0. Verificar recursos do sistema
+        check_system_resources()
+        
+        # 1. Verificar arquivo de áudio
+        audio_path = Path(audio_file)
+        if not audio_path.exists():
+            raise FileNotFoundError(f"Arquivo não encontrado: {audio_file}")
+        print(f"Arquivo de áudio: {audio_file} ({audio_path.stat().st_size / 1024 / 1024:.2f} MB)")
+        
+        # 2. Carregar áudio (reutilizando as amostras já decodificadas, se houver)
+        print("\nCarregando áudio...")
+        try:
+            full_audio = audio if audio is not None else load_audio_stream(audio_path)
+            duration = len(full_audio) / whisper.audio.SAMPLE_RATE
+            print(f"✓ Áudio carregado: {duration/60:.2f} minutos")
+        except Exception as e:
+            raise Exception(f"Erro ao processar áudio: {e}")
+        
+        # 3. Consultar o cache pelo conteúdo do áudio
+        cache_key = None
+        transcription = None
+        if use_cache:
+            try:
+                fingerprint = fingerprint_pcm(full_audio)
+                cache_key = TranscriptionCache.make_key(
+                    fingerprint, cache_model,
+                    options=dict(DECODE_OPTIONS, use_vad=use_vad, chunk_size=chunk_size,
+                                 chunk_overlap=chunk_overlap, word_timestamps=word_timestamps)
+                )
+                transcription = get_transcription_cache().get(cache_key)
+                if transcription:
+                    print("✓ Transcrição encontrada no cache")
+            except Exception as e:
+                print(f"Aviso: cache de transcrições indisponível: {e}")
+                cache_key = None
+        
+        # 4. Transcrever com o Whisper, traduzindo cada chunk enquanto os próximos são transcritos
+        def translate_chunk(chunk_segments, language):
+            nonlocal translator, pipeline
+            text = " ".join(seg['text'] for seg in chunk_segments if seg['text'])
+            if language == target_language or not text:
+                return
+            if pipeline is None:
+                translator = create_translator()
+                pipeline = TranslationPipeline(translator, target_language, language)
+            pipeline.submit([text])
+        
+        if transcription is None:
+            transcription = run_whisper(full_audio, chunk_size=chunk_size, use_vad=use_vad,
+                                        word_timestamps=word_timestamps, chunk_overlap=chunk_overlap,
+                                        parallel_workers=parallel_workers, parallel_model=parallel_model,
+                                        on_progress=on_progress, on_chunk=translate_chunk)
+            if cache_key and transcription['chunks']:
+                try:
+                    get_transcription_cache().put(cache_key, transcription, fingerprint=fingerprint, model=cache_model)
+                except Exception as e:
+                    print(f"Aviso: erro ao salvar no cache de transcrições: {e}")
+        
+        audio_language = transcription['language']
+        transcribed_chunks = transcription['chunks']
+        segments = transcription['segments']
+        options = transcription['configuration']
+        
+        try:
             if not transcribed_chunks:
                 raise Exception("A transcrição não gerou texto")
             
-            # 6. Traduzir o texto transcrito
+            # 5. Traduzir o texto transcrito
             original_text = " ".join(transcribed_chunks)
             translated_text = original_text
             
             if audio_language != target_language:
                 print(f"\nTraduzindo de {audio_language} para {target_language}...")
-                translator = GoogleTranslator()
-                translated_chunks = translator.translate_batch(transcribed_chunks, 
-                                                            target_lang=target_language,
-                                                            source_lang=audio_language)
+                # Chunks já traduzidos durante a transcrição (já sem as sobreposições);
+                # só os que faltarem (todos, se a transcrição veio do cache) são traduzidos agora
+                translated = {}
+                if pipeline is not None:
+                    translated = dict(zip(pipeline.texts, pipeline.close()))
+                else:
+                    translator = create_translator()
+                missing = [text for text in dict.fromkeys(transcribed_chunks) if text not in translated]
+                if missing:
+                    translated.update(zip(missing, translator.translate_batch(
+                        missing, target_lang=target_language, source_lang=audio_language
+                    )))
+                translated_chunks = [translated[text] for text in transcribed_chunks]
                 translated_text = " ".join(translated_chunks)
+                if translator.cache is not None:
+                    stats = translator.cache.stats()
+                    print(f"Cache de traduções: {stats['hits']} acertos, {stats['misses']} faltas "
+                          f"({stats['hit_rate']:.0%})")
             else:
                 print("\nIdioma fonte igual ao alvo, pulando tradução...")
             
@@ -184,10 +419,16 @@ def transcribe_audio(audio_file, target_language="pt", transcripts_dir=None, chu
         except Exception as e:
             raise Exception(f"Erro durante processamento: {e}")
         
-        # 7. Salvar resultado
+        # 6. Salvar resultado
         if transcripts_dir:
             try:
                 output_path = Path(transcripts_dir) / f"{audio_path.stem}.json"
+                # Segmentos em formato colunar, separados do JSON editado pela interface
+                segments_file = save_segments(
+                    segments_path(transcripts_dir, audio_path.stem),
+                    segments,
+                    transcription.get('words')
+                )
                 transcript_data = {
                     'audio_file': audio_path.name,
                     'source_language': audio_language,
@@ -195,6 +436,9 @@ def transcribe_audio(audio_file, target_language="pt", transcripts_dir=None, chu
                     'original_text': original_text,
                     'translated_text': translated_text,
                     'duration_minutes': duration/60,
+                    'speech_windows': transcription['speech_windows'],
+                    'segments_file': segments_file.name,
+                    'segment_count': len(segments),
                     'configuration': options
                 }
                 with open(output_path, 'w', encoding='utf-8') as f:
@@ -214,6 +458,8 @@ def transcribe_audio(audio_file, target_language="pt", transcripts_dir=None, chu
         return "", error_msg
         
     finally:
+        if pipeline is not None:
+            pipeline.abort()  # Sem efeito se a tradução já terminou
         print("\n=== Fim do Processamento ===")
         if torch.cuda.is_available():
-            torch.cuda.empty_cache()
\ No newline at end of file
+            torch.cuda.empty_cache()
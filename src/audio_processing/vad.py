@@ -3,22 +3,131 @@ import numpy as np
 import soundfile as sf
 import warnings
 import os
+import threading
+from pathlib import Path
 from src.models.models_handler import download_silero_model
+from src.audio_processing.vad_engine import BatchedVAD, probs_to_regions
+
+SAMPLE_RATE = 16000
+MAX_WINDOW_SECONDS = 30  # Tamanho da janela de contexto do Whisper
+
+_vad_engine = None
+_vad_lock = threading.Lock()
+
+def _silero_onnx_path():
+    """Caminho do modelo Silero VAD ONNX empacotado em data/models/silero_vad"""
+    silero_dir = Path(download_silero_model())
+    return silero_dir / 'src' / 'silero_vad' / 'data' / 'silero_vad.onnx'
+
+def load_vad_engine():
+    """Carrega (uma única vez) o motor de VAD em lote"""
+    global _vad_engine
+    with _vad_lock:
+        if _vad_engine is None:
+            _vad_engine = BatchedVAD(_silero_onnx_path())
+        return _vad_engine
+
+def detect_speech_regions(audio, threshold=0.5, min_speech_ms=250, min_silence_ms=500, speech_pad_ms=200):
+    """
+    Detecta regiões de fala em um áudio mono de 16 kHz (np.ndarray float32).
+    Retorna lista de dicts com 'start' e 'end' em segundos. O áudio é dividido
+    em fatias processadas em paralelo pelo BatchedVAD; regiões longas são
+    cortadas depois por pack_speech_windows.
+    """
+    engine = load_vad_engine()
+    with _vad_lock:
+        probs = engine.long_audio_probs(np.ascontiguousarray(audio, dtype=np.float32))
+    return probs_to_regions(
+        probs,
+        len(audio),
+        threshold=threshold,
+        min_speech_ms=min_speech_ms,
+        min_silence_ms=min_silence_ms,
+        speech_pad_ms=speech_pad_ms
+    )
+
+def detect_speech_regions_batch(audios, threshold=0.5, min_speech_ms=250, min_silence_ms=500, speech_pad_ms=200):
+    """Detecta regiões de fala em vários áudios com uma chamada ONNX por passo para todos"""
+    engine = load_vad_engine()
+    with _vad_lock:
+        all_probs = engine.speech_probs([np.ascontiguousarray(a, dtype=np.float32) for a in audios])
+    return [
+        probs_to_regions(probs, len(audio), threshold=threshold, min_speech_ms=min_speech_ms,
+                         min_silence_ms=min_silence_ms, speech_pad_ms=speech_pad_ms)
+        for probs, audio in zip(all_probs, audios)
+    ]
+
+def vad_throughput():
+    """Estatísticas do motor de VAD, incluindo horas de áudio por segundo de CPU"""
+    if _vad_engine is None:
+        return None
+    return dict(_vad_engine.stats, audio_hours_per_cpu_second=_vad_engine.audio_hours_per_cpu_second)
+
+def pack_speech_windows(regions, max_window=MAX_WINDOW_SECONDS):
+    """
+    Agrupa regiões de fala consecutivas em janelas de no máximo max_window
+    segundos. O silêncio entre janelas é descartado; cada janela é um trecho
+    contíguo do áudio original, então um timestamp t dentro da janela
+    corresponde a window['start'] + t na linha do tempo original.
+    """
+    windows = []
+    for region in regions:
+        start, end = region['start'], region['end']
+        # Regiões maiores que a janela são cortadas em pedaços
+        while end - start > max_window:
+            windows.append({'start': start, 'end': start + max_window, 'regions': 1})
+            start += max_window
+
+        if windows and end - windows[-1]['start'] <= max_window and start >= windows[-1]['end']:
+            windows[-1]['end'] = end
+            windows[-1]['regions'] += 1
+        else:
+            windows.append({'start': start, 'end': end, 'regions': 1})
+
+    for window in windows:
+        window['duration'] = window['end'] - window['start']
+    return windows
+
+def _read_mono_16k(audio_file):
+    audio, sr = sf.read(audio_file, dtype='float32')
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sr != SAMPLE_RATE:
+        raise ValueError(f"Taxa de amostragem {sr} não suportada (esperado {SAMPLE_RATE})")
+    return audio
+
+def _as_segments(regions):
+    return [{
+        'start': region['start'],
+        'end': region['end'],
+        'duration': region['end'] - region['start']
+    } for region in regions]
 
 def detect_voice_activity(audio_file):
-    """Função simplificada que retorna um único segmento com todo o áudio"""
+    """Detecta segmentos de fala no arquivo usando o Silero VAD"""
     try:
-        # Criar um único segmento com todo o áudio
-        import soundfile as sf
-        with sf.SoundFile(audio_file) as f:
-            duration = len(f) / f.samplerate
-            
-        return [{
-            'start': 0,
-            'end': duration,
-            'duration': duration
-        }]
-        
+        return _as_segments(detect_speech_regions(_read_mono_16k(audio_file)))
+
     except Exception as e:
-        print(f"Erro ao processar áudio: {str(e)}")
-        return []
+        print(f"Erro ao processar áudio com VAD: {str(e)}")
+        # Sem VAD, considerar o arquivo inteiro como fala
+        try:
+            with sf.SoundFile(audio_file) as f:
+                duration = len(f) / f.samplerate
+            return [{'start': 0, 'end': duration, 'duration': duration}]
+        except Exception:
+            return []
+
+def detect_voice_activity_batch(audio_files):
+    """
+    Detecta segmentos de fala em vários arquivos de uma vez (ex.: uma
+    biblioteca inteira), com todos os arquivos no mesmo batch do VAD.
+    Retorna um dicionário arquivo -> segmentos.
+    """
+    audios = [_read_mono_16k(f) for f in audio_files]
+    regions = detect_speech_regions_batch(audios)
+    stats = vad_throughput()
+    if stats:
+        print(f"VAD: {stats['audio_seconds']/3600:.2f} h de áudio, "
+              f"{stats['audio_hours_per_cpu_second']:.4f} h de áudio por segundo de CPU")
+    return {str(f): _as_segments(r) for f, r in zip(audio_files, regions)}
@@ -0,0 +1,170 @@
+import os
+import time
+import numpy as np
+
+SAMPLE_RATE = 16000
+WINDOW_SAMPLES = 512  # Janela do Silero VAD a 16 kHz
+CONTEXT_SAMPLES = 64  # Amostras da janela anterior concatenadas a cada passo
+STATE_SIZE = 128
+
+class BatchedVAD:
+    """
+    Motor de VAD em lote usando o modelo Silero ONNX diretamente com numpy.
+
+    Vários streams de áudio (arquivos diferentes ou fatias de um mesmo áudio
+    longo) avançam juntos: cada passo é uma única chamada session.run com
+    todas as janelas de 512 amostras do batch. Buffers de entrada, estado e
+    saída são pré-alocados e não há conversão para tensores torch.
+    """
+
+    def __init__(self, onnx_path, num_threads=None):
+        import onnxruntime
+
+        opts = onnxruntime.SessionOptions()
+        opts.inter_op_num_threads = 1
+        opts.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        providers = ['CPUExecutionProvider'] if 'CPUExecutionProvider' in onnxruntime.get_available_providers() else None
+        self.session = onnxruntime.InferenceSession(str(onnx_path), sess_options=opts, providers=providers)
+        self._sr = np.array(SAMPLE_RATE, dtype=np.int64)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'audio_seconds': 0.0, 'cpu_seconds': 0.0, 'wall_seconds': 0.0, 'steps': 0}
+
+    @property
+    def audio_hours_per_cpu_second(self):
+        """Vazão do VAD: horas de áudio processadas por segundo de CPU"""
+        if not self.stats['cpu_seconds']:
+            return 0.0
+        return self.stats['audio_seconds'] / 3600 / self.stats['cpu_seconds']
+
+    def speech_probs(self, streams):
+        """
+        Calcula a probabilidade de fala por janela de 512 amostras para cada
+        stream (np.ndarray float32 mono a 16 kHz). Retorna uma lista de arrays.
+        """
+        if not streams:
+            return []
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+
+        # Ordenar por duração decrescente: streams ativos formam sempre um prefixo
+        # do batch, que encolhe conforme os streams mais curtos terminam
+        order = sorted(range(len(streams)), key=lambda i: len(streams[i]), reverse=True)
+        steps = [-(-len(streams[i]) // WINDOW_SAMPLES) for i in order]
+        batch_size = len(order)
+        total_steps = steps[0]
+
+        audio = np.zeros((batch_size, total_steps * WINDOW_SAMPLES), dtype=np.float32)
+        for row, i in enumerate(order):
+            audio[row, :len(streams[i])] = streams[i]
+
+        x = np.zeros((batch_size, CONTEXT_SAMPLES + WINDOW_SAMPLES), dtype=np.float32)
+        state = np.zeros((2, batch_size, STATE_SIZE), dtype=np.float32)
+        probs = np.zeros((batch_size, total_steps), dtype=np.float32)
+
+        active = batch_size
+        for step in range(total_steps):
+            while active and steps[active - 1] <= step:
+                active -= 1
+
+            # Contexto = últimas amostras da janela anterior
+            x[:active, :CONTEXT_SAMPLES] = x[:active, -CONTEXT_SAMPLES:]
+            x[:active, CONTEXT_SAMPLES:] = audio[:active, step * WINDOW_SAMPLES:(step + 1) * WINDOW_SAMPLES]
+
+            out, new_state = self.session.run(None, {
+                'input': x[:active],
+                'state': np.ascontiguousarray(state[:, :active]),
+                'sr': self._sr
+            })
+            state[:, :active] = new_state
+            probs[:active, step] = out[:, 0]
+
+        self.stats['steps'] += total_steps
+        self.stats['audio_seconds'] += sum(len(s) for s in streams) / SAMPLE_RATE
+        self.stats['cpu_seconds'] += time.process_time() - cpu_start
+        self.stats['wall_seconds'] += time.perf_counter() - wall_start
+
+        results = [None] * batch_size
+        for row, i in enumerate(order):
+            results[i] = probs[row, :steps[row]]
+        return results
+
+    def long_audio_probs(self, audio, num_slices=None, warmup_seconds=2.0):
+        """
+        Divide um áudio longo em fatias processadas em paralelo no mesmo batch.
+        Cada fatia começa warmup_seconds antes do seu trecho para aquecer o
+        estado recorrente do modelo; as probabilidades do aquecimento são
+        descartadas ao juntar o resultado.
+        """
+        total_windows = -(-len(audio) // WINDOW_SAMPLES)
+        if not total_windows:
+            return np.zeros(0, dtype=np.float32)
+        warmup_windows = int(warmup_seconds * SAMPLE_RATE / WINDOW_SAMPLES)
+        num_slices = num_slices or os.cpu_count() or 1
+        # Fatias muito curtas não compensam o custo do aquecimento
+        num_slices = max(1, min(num_slices, total_windows // max(1, 4 * warmup_windows)))
+        slice_windows = -(-total_windows // num_slices)
+
+        streams, skips = [], []
+        for start in range(0, total_windows, slice_windows):
+            warm_start = max(0, start - warmup_windows)
+            end = min(total_windows, start + slice_windows)
+            streams.append(audio[warm_start * WINDOW_SAMPLES:end * WINDOW_SAMPLES])
+            skips.append(start - warm_start)
+
+        probs = self.speech_probs(streams)
+        return np.concatenate([p[skip:] for p, skip in zip(probs, skips)])
+
+def probs_to_regions(probs, num_samples, threshold=0.5, neg_threshold=None,
+                     min_speech_ms=250, min_silence_ms=100, speech_pad_ms=30):
+    """
+    Converte probabilidades por janela em regiões de fala (em segundos),
+    com a mesma histerese e padding de get_speech_timestamps do Silero.
+    """
+    if neg_threshold is None:
+        neg_threshold = max(threshold - 0.15, 0.01)
+    min_speech = SAMPLE_RATE * min_speech_ms / 1000
+    min_silence = SAMPLE_RATE * min_silence_ms / 1000
+    pad = int(SAMPLE_RATE * speech_pad_ms / 1000)
+
+    speeches = []
+    triggered = False
+    start = temp_end = 0
+    for i, prob in enumerate(probs):
+        current = i * WINDOW_SAMPLES
+        if prob >= threshold and temp_end:
+            temp_end = 0
+        if prob >= threshold and not triggered:
+            triggered = True
+            start = current
+            continue
+        if prob < neg_threshold and triggered:
+            if not temp_end:
+                temp_end = current
+            if current - temp_end < min_silence:
+                continue
+            if temp_end - start > min_speech:
+                speeches.append([start, temp_end])
+            triggered = False
+            temp_end = 0
+
+    if triggered and num_samples - start > min_speech:
+        speeches.append([start, num_samples])
+
+    # Padding: estender cada região, dividindo o silêncio quando as regiões ficam próximas
+    for i, speech in enumerate(speeches):
+        if i == 0:
+            speech[0] = max(0, speech[0] - pad)
+        if i < len(speeches) - 1:
+            gap = speeches[i + 1][0] - speech[1]
+            if gap < 2 * pad:
+                speech[1] += gap // 2
+                speeches[i + 1][0] = max(0, speeches[i + 1][0] - gap // 2)
+            else:
+                speech[1] = min(num_samples, speech[1] + pad)
+                speeches[i + 1][0] = max(0, speeches[i + 1][0] - pad)
+        else:
+            speech[1] = min(num_samples, speech[1] + pad)
+
+    return [{'start': s / SAMPLE_RATE, 'end': e / SAMPLE_RATE} for s, e in speeches]
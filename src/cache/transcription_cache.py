@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+try:
+    import xxhash  # Opcional: bem mais rápido que blake2b para arquivos grandes
+except ImportError:
+    xxhash = None
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent.parent / 'data' / 'cache' / 'transcriptions.db'
+DEFAULT_MAX_SIZE_MB = int(os.getenv('TRANSCRIPTION_CACHE_MB', 512))
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcriptions (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    model TEXT NOT NULL,
+    language TEXT,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcriptions_last_access ON transcriptions (last_access);
+"""
+
+def _new_hasher():
+    if xxhash is not None:
+        return 'xxh3', xxhash.xxh3_128()
+    return 'blake2b', hashlib.blake2b(digest_size=16)
+
+def fingerprint_file(path, chunk_size=HASH_CHUNK_SIZE):
+    """Impressão digital do conteúdo completo de um arquivo, lido em blocos"""
+    name, hasher = _new_hasher()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, 'rb') as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return f"file-{name}:{hasher.hexdigest()}"
+
+def fingerprint_pcm(audio):
+    """
+    Impressão digital de um áudio já decodificado (np.ndarray). O mesmo vídeo
+    decodificado duas vezes gera as mesmas amostras e portanto a mesma chave.
+    """
+    import numpy as np
+
+    samples = np.ascontiguousarray(audio, dtype=np.float32)
+    name, hasher = _new_hasher()
+    hasher.update(memoryview(samples).cast('B'))
+    return f"pcm-{name}:{hasher.hexdigest()}"
+
+class TranscriptionCache:
+    """
+    Cache de transcrições endereçado pelo conteúdo do áudio.
+
+    A chave combina a impressão digital do áudio com o modelo, o idioma e as
+    opções de decodificação; o valor é o resultado em JSON (segmentos etc.).
+    Fica em um arquivo SQLite (modo WAL) que pode ser compartilhado entre
+    processos, com remoção LRU quando o tamanho passa de max_size_mb.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(fingerprint, model, language=None, options=None):
+        """Chave determinística para áudio + modelo + idioma + opções de decodificação"""
+        payload = json.dumps({
+            'fingerprint': fingerprint,
+            'model': model,
+            'language': language or 'auto',
+            'options': options or {}
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Retorna o resultado salvo (dict) ou None, marcando o acesso para o LRU"""
+        conn = self._connect()
+        row = conn.execute("SELECT result FROM transcriptions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        conn.execute("UPDATE transcriptions SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, result, fingerprint='', model='', language=None):
+        """Salva um resultado e aplica o limite de tamanho"""
+        data = json.dumps(result, ensure_ascii=False)
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO transcriptions "
+            "(key, fingerprint, model, language, result, size, created_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, fingerprint, model, language, data, len(data.encode('utf-8')), now, now)
+        )
+        self.evict()
+
+    def size_bytes(self):
+        row = self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM transcriptions").fetchone()
+        return row[0]
+
+    def evict(self, max_bytes=None):
+        """Remove as entradas menos usadas até o total caber em max_bytes. Retorna quantas saíram"""
+        max_bytes = self.max_size_bytes if max_bytes is None else max_bytes
+        conn = self._connect()
+        total = self.size_bytes()
+        if total <= max_bytes:
+            return 0
+
+        removed = []
+        for key, size in conn.execute("SELECT key, size FROM transcriptions ORDER BY last_access, rowid").fetchall():
+            if total <= max_bytes:
+                break
+            removed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM transcriptions WHERE key = ?", removed)
+        return len(removed)
+
+    def stats(self):
+        count = self._connect().execute("SELECT COUNT(*) FROM transcriptions").fetchone()[0]
+        return {
+            'entries': count,
+            'size_mb': self.size_bytes() / (1024 * 1024),
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -0,0 +1,200 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent.parent / 'data' / 'cache' / 'translations' / 'translations.db'
+DEFAULT_MAX_SIZE_MB = int(os.getenv('TRANSLATION_CACHE_MB', 128))
+# Limite de variáveis por consulta do SQLite (versões antigas aceitam 999)
+_QUERY_BATCH = 500
+# Ao passar do limite, a remoção LRU desce até esta fração dele: a próxima só
+# acontece depois de vários lotes novos, não a cada gravação
+EVICT_TARGET = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    key TEXT PRIMARY KEY,
+    source_lang TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    text TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS translations_last_access ON translations (last_access);
+"""
+
+_translation_cache = None
+
+def normalize_text(text):
+    """Forma canônica do texto usada na chave: NFC, sem espaços extras nas pontas ou repetidos"""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text)).strip()
+
+@contextmanager
+def _transaction(conn):
+    """Transação explícita (as conexões estão em autocommit)"""
+    conn.execute("BEGIN")
+    try:
+        yield
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def get_translation_cache():
+    """Cache de traduções compartilhado (data/cache/translations/translations.db)"""
+    global _translation_cache
+    if _translation_cache is None:
+        _translation_cache = TranslationCache()
+    return _translation_cache
+
+class TranslationCache:
+    """
+    Memória de traduções persistente.
+
+    A chave é (idioma fonte, idioma alvo, texto normalizado); o valor é a
+    tradução. Fica em um arquivo SQLite (modo WAL) que pode ser compartilhado
+    entre processos, com remoção LRU quando o tamanho passa de max_size_mb.
+    Textos vazios não são guardados.
+
+    O tamanho total é somado uma vez e depois acompanhado em memória a cada
+    gravação; o SUM e a remoção só rodam quando a estimativa passa do limite.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # Estimativa do tamanho total (None até a primeira gravação)
+        self._size_lock = threading.Lock()
+        self._local = threading.local()
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(text, target_lang, source_lang='auto'):
+        payload = "\x1f".join((source_lang or 'auto', target_lang, normalize_text(text)))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, text, target_lang, source_lang='auto'):
+        """Tradução salva de text ou None"""
+        return self.get_many([text], target_lang, source_lang)[0]
+
+    def get_many(self, texts, target_lang, source_lang='auto'):
+        """Traduções salvas na mesma ordem de texts (None onde não há)"""
+        keys = [self.make_key(text, target_lang, source_lang) if normalize_text(text) else None for text in texts]
+        wanted = list({key for key in keys if key})
+        found = {}
+        conn = self._connect()
+        for i in range(0, len(wanted), _QUERY_BATCH):
+            batch = wanted[i:i + _QUERY_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            found.update(conn.execute(
+                f"SELECT key, translation FROM translations WHERE key IN ({placeholders})", batch
+            ).fetchall())
+
+        if found:
+            # Atualização LRU dos acertos em uma única transação
+            hit_keys = list(found)
+            now = time.time()
+            with _transaction(conn):
+                for i in range(0, len(hit_keys), _QUERY_BATCH):
+                    batch = hit_keys[i:i + _QUERY_BATCH]
+                    placeholders = ",".join("?" * len(batch))
+                    conn.execute(
+                        f"UPDATE translations SET hits = hits + 1, last_access = ? WHERE key IN ({placeholders})",
+                        [now] + batch
+                    )
+        results = [found.get(key) if key else None for key in keys]
+        self.hits += sum(1 for key in keys if key in found)
+        self.misses += sum(1 for key in keys if key and key not in found)
+        return results
+
+    def put(self, text, translation, target_lang, source_lang='auto'):
+        self.put_many([(text, translation)], target_lang, source_lang)
+
+    def put_many(self, pairs, target_lang, source_lang='auto'):
+        """Salva pares (texto, tradução) e aplica o limite de tamanho"""
+        now = time.time()
+        rows = []
+        for text, translation in pairs:
+            normalized = normalize_text(text)
+            if not normalized or translation is None:
+                continue
+            size = len(normalized.encode('utf-8')) + len(translation.encode('utf-8'))
+            rows.append((self.make_key(text, target_lang, source_lang), source_lang or 'auto',
+                         target_lang, normalized, translation, size, now, now))
+        if not rows:
+            return
+        conn = self._connect()
+        with _transaction(conn):
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations "
+                "(key, source_lang, target_lang, text, translation, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+        # Substituições e gravações de outros processos deixam a estimativa
+        # aproximada; evict() a corrige com o total real
+        with self._size_lock:
+            if self._size is None:
+                self._size = self.size_bytes()
+            else:
+                self._size += sum(row[5] for row in rows)
+            over_limit = self._size > self.max_size_bytes
+        if over_limit:
+            self.evict(int(self.max_size_bytes * EVICT_TARGET))
+
+    def size_bytes(self):
+        row = self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM translations").fetchone()
+        return row[0]
+
+    def evict(self, max_bytes=None):
+        """Remove as entradas menos usadas até o total caber em max_bytes. Retorna quantas saíram"""
+        max_bytes = self.max_size_bytes if max_bytes is None else max_bytes
+        conn = self._connect()
+        total = self.size_bytes()
+        removed = []
+        if total > max_bytes:
+            # Cursor percorrido só até liberar o necessário, pelo índice de last_access
+            cursor = conn.execute("SELECT key, size FROM translations ORDER BY last_access, rowid")
+            for key, size in cursor:
+                if total <= max_bytes:
+                    break
+                removed.append((key,))
+                total -= size
+            cursor.close()
+            with _transaction(conn):
+                conn.executemany("DELETE FROM translations WHERE key = ?", removed)
+        with self._size_lock:
+            self._size = total
+        return len(removed)
+
+    def stats(self):
+        count = self._connect().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'entries': count,
+            'size_mb': self.size_bytes() / (1024 * 1024),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -4,19 +4,19 @@ from PyQt5.QtWidgets import (QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout,
                            QGroupBox, QMessageBox, QMenu, QFrame, QSizePolicy, 
                            QStackedWidget, QSlider, QStyle, QApplication, QProgressDialog, QDialog)  # Adicionado QDialog
 from PyQt5.QtCore import Qt, QTimer, QUrl
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 from PyQt5.QtGui import QIcon, QFont
 import json
 import time
 from pathlib import Path
-from src.worker.worker import AudioProcessingWorker
-from src.worker.subtitle_worker import SubtitleExtractionWorker  # Fixed import
+from src.worker.warmup_worker import WarmupWorker
+from src.worker.project_import import resolve_source_video
 import sys
 import os
 from .video_player import VideoPlayer  # Fixed relative import
-from .editor_window import VideoEditor  # Also fixed this import
-from ..video_editor.clipchamp_editor import ClipchampEditor  # Corrigindo importação para usar caminho relativo
-from ..translation.translator import GoogleTranslator  # Adicionando importação do GoogleTranslator
+from .transcript_text import timestamped_text, strip_timestamps, segment_texts
+
+# Os workers de processamento, os editores (vlc, ffmpeg), o tradutor (requests)
+# e o QtMultimedia são importados no primeiro uso para a janela abrir rápido
 
 def load_stylesheet(filename):
     """Carrega arquivo CSS"""
@@ -35,6 +35,7 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Audio Extractor and Transcriber")
         self.setGeometry(100, 100, 1400, 800)
         self.current_project = None
+        self.segment_table = None  # Segmentos (.segments.npz) da transcrição carregada
         
         # Configurar ícone da aplicação
         icon_path = Path(__file__).parent.parent.parent / 'assets' / 'icons' / 'app_icon.png'
@@ -323,6 +324,7 @@ class MainWindow(QMainWindow):
             progress.show()
             
             # Iniciar extração em thread separada
+            from src.worker.subtitle_worker import SubtitleExtractionWorker
             self.subtitle_worker = SubtitleExtractionWorker(
                 str(video_file), 
                 subtitles_dir,
@@ -333,6 +335,7 @@ class MainWindow(QMainWindow):
             self.subtitle_worker.progressChanged.connect(progress.setValue)
             self.subtitle_worker.statusChanged.connect(progress.setLabelText)
             self.subtitle_worker.logMessage.connect(lambda msg: self.log_message(msg, "info"))
+            self.subtitle_worker.partialSubtitles.connect(self.on_subtitle_extraction_partial)
             self.subtitle_worker.finished.connect(progress.close)
             self.subtitle_worker.finished.connect(self.on_subtitle_extraction_finished)
             self.subtitle_worker.error.connect(self.on_subtitle_extraction_error)
@@ -351,6 +354,7 @@ class MainWindow(QMainWindow):
             
             # Atualizar área de texto
             if subtitles_data and 'subtitles' in subtitles_data:
+                self.segment_table = None
                 extracted_text = "\n".join(sub['text'] for sub in subtitles_data['subtitles'] if sub['text'])
                 self.original_text_area.setText(extracted_text)
                 
@@ -364,6 +368,11 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.warning(self, "Erro", f"Erro ao carregar legendas extraídas: {str(e)}")
 
+    def on_subtitle_extraction_partial(self, subtitles):
+        """Mostra as legendas já decodificadas enquanto o servidor processa o restante"""
+        self.segment_table = None
+        self.original_text_area.setText("\n".join(sub['text'] for sub in subtitles if sub['text']))
+
     def on_subtitle_extraction_error(self, error_msg):
         """Chamado quando ocorre um erro na extração de legendas"""
         QMessageBox.critical(self, "Erro", f"Erro na extração de legendas: {error_msg}")
@@ -437,8 +446,15 @@ class MainWindow(QMainWindow):
                 return
             
             # Criar tradutor e traduzir
-            translator = GoogleTranslator()
-            translated_text = translator.translate(original_text, target_lang)
+            from src.translation.translator import create_translator
+            translator = create_translator()
+            texts = self._edited_segment_texts()
+            if texts is not None:
+                # Traduz segmento a segmento (com as edições), mantendo os tempos de cada linha
+                translated = translator.translate_batch(texts, target_lang)
+                translated_text = timestamped_text(self.segment_table.start, translated)
+            else:
+                translated_text = translator.translate(strip_timestamps(original_text), target_lang)
             
             # Atualizar área de texto traduzido
             self.transcript_area.setText(translated_text)
@@ -448,6 +464,19 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.warning(self, "Erro", f"Erro ao traduzir texto: {str(e)}")
 
+    def _edited_segment_texts(self):
+        """
+        Textos dos segmentos como estão na área do texto original. Se as
+        linhas não correspondem mais aos segmentos, a tabela é descartada e
+        o texto passa a ser tratado como texto livre.
+        """
+        if self.segment_table is None:
+            return None
+        texts = segment_texts(self.original_text_area.toPlainText(), len(self.segment_table))
+        if texts is None:
+            self.segment_table = None
+        return texts
+
     def update_language_labels(self, detected_lang, target_lang):
         """Atualiza os labels de idioma"""
         self.detected_lang_label.setText(f"Idioma detectado: {detected_lang}")
@@ -456,11 +485,26 @@ class MainWindow(QMainWindow):
     def load_transcription(self):
         """Carrega a transcrição do projeto atual"""
         if self.current_project:
-            transcript_path = Path(self.current_project['transcripts_dir']) / 'full_audio.json'
+            transcripts_dir = Path(self.current_project['transcripts_dir'])
+            transcript_path = transcripts_dir / 'full_audio.json'
+            self.segment_table = None
             if transcript_path.exists():
                 with open(transcript_path, 'r', encoding='utf-8') as f:
                     transcript_data = json.load(f)
-                    self.original_text_area.setText(transcript_data.get('original_text', ''))
+                    segments_file = transcript_data.get('segments_file')
+                    if segments_file and (transcripts_dir / segments_file).exists():
+                        try:
+                            from src.audio_processing.segment_store import load_segments
+                            self.segment_table = load_segments(transcripts_dir / segments_file)
+                        except Exception as e:
+                            self.log_message(f"Aviso: Erro ao carregar segmentos: {str(e)}", "warning")
+                    if self.segment_table is not None:
+                        # Uma linha por frase, com o instante em que ela começa no áudio
+                        self.original_text_area.setText(
+                            timestamped_text(self.segment_table.start, self.segment_table.texts)
+                        )
+                    else:
+                        self.original_text_area.setText(transcript_data.get('original_text', ''))
                     self.transcript_area.setText(transcript_data.get('translated_text', ''))
                     
                     # Atualizar labels de idioma
@@ -476,6 +520,7 @@ class MainWindow(QMainWindow):
         reply = QMessageBox.question(self, "Confirmar", "Deseja limpar a transcrição atual?",
                                    QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
+            self.segment_table = None
             self.original_text_area.clear()
             self.transcript_area.clear()
 
@@ -483,12 +528,22 @@ class MainWindow(QMainWindow):
         try:
             if self.current_project:
                 transcript_path = Path(self.current_project['transcripts_dir']) / 'full_audio.json'
+                texts = self._edited_segment_texts()
+                # Os tempos exibidos ficam fora do JSON (estão no .npz)
                 transcript_data = {
                     'audio_file': 'full_audio.wav',
                     'language': self.language_combo.currentText(),
-                    'original_text': self.original_text_area.toPlainText(),
-                    'translated_text': self.transcript_area.toPlainText()
+                    'original_text': strip_timestamps(self.original_text_area.toPlainText()),
+                    'translated_text': strip_timestamps(self.transcript_area.toPlainText())
                 }
+                if texts is not None:
+                    from src.audio_processing.segment_store import segments_path, replace_texts
+                    path = segments_path(self.current_project['transcripts_dir'], 'full_audio')
+                    if texts != self.segment_table.texts:
+                        # Edições no texto original vão para os segmentos, com os mesmos tempos
+                        self.segment_table = replace_texts(path, self.segment_table, texts)
+                    transcript_data['original_text'] = " ".join(texts)
+                    transcript_data['segments_file'] = path.name
                 with open(transcript_path, 'w', encoding='utf-8') as f:
                     json.dump(transcript_data, f, ensure_ascii=False, indent=2)
                 
@@ -535,6 +590,7 @@ class MainWindow(QMainWindow):
                 self.log_message(f"Idioma selecionado: {self.language_combo.currentText()} ({selected_language})", "info")
 
                 # Configurar e iniciar o worker
+                from src.worker.worker import AudioProcessingWorker
                 self.worker = AudioProcessingWorker(self.selected_video, selected_language)
                 self.worker.progress.connect(self.update_progress)
                 self.worker.status.connect(lambda msg: self.log_message(msg, "progress"))
@@ -609,6 +665,7 @@ class MainWindow(QMainWindow):
     def play_segment(self, item):
         segment_path = Path(item.data(Qt.UserRole))
         if segment_path.exists():
+            from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
             if not hasattr(self, 'segment_player'):
                 self.segment_player = QMediaPlayer()
             self.segment_player.setMedia(QMediaContent(QUrl.fromLocalFile(str(segment_path))))
@@ -654,6 +711,7 @@ class MainWindow(QMainWindow):
         reply = QMessageBox.question(self, "Confirmar", "Deseja limpar a transcrição atual?",
                                    QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
+            self.segment_table = None
             self.original_text_area.clear()
             self.transcript_area.clear()
 
@@ -661,12 +719,22 @@ class MainWindow(QMainWindow):
         try:
             if self.current_project:
                 transcript_path = Path(self.current_project['transcripts_dir']) / 'full_audio.json'
+                texts = self._edited_segment_texts()
+                # Os tempos exibidos ficam fora do JSON (estão no .npz)
                 transcript_data = {
                     'audio_file': 'full_audio.wav',
                     'language': self.language_combo.currentText(),
-                    'original_text': self.original_text_area.toPlainText(),
-                    'translated_text': self.transcript_area.toPlainText()
+                    'original_text': strip_timestamps(self.original_text_area.toPlainText()),
+                    'translated_text': strip_timestamps(self.transcript_area.toPlainText())
                 }
+                if texts is not None:
+                    from src.audio_processing.segment_store import segments_path, replace_texts
+                    path = segments_path(self.current_project['transcripts_dir'], 'full_audio')
+                    if texts != self.segment_table.texts:
+                        # Edições no texto original vão para os segmentos, com os mesmos tempos
+                        self.segment_table = replace_texts(path, self.segment_table, texts)
+                    transcript_data['original_text'] = " ".join(texts)
+                    transcript_data['segments_file'] = path.name
                 with open(transcript_path, 'w', encoding='utf-8') as f:
                     json.dump(transcript_data, f, ensure_ascii=False, indent=2)
                 
@@ -716,15 +784,12 @@ class MainWindow(QMainWindow):
                 if not dir_path.exists():
                     raise Exception(f"Pasta necessária não encontrada: {dir_path}")
 
-            # Procurar vídeo original e áudio
-            video_files = list(original_dir.glob('*.*'))
-            video_files = [f for f in video_files if f.suffix.lower() in 
-                          ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv']]
+            # Procurar vídeo original (importado ou referenciado) e áudio
+            video_file = resolve_source_video(original_dir)
             
-            if not video_files:
+            if not video_file:
                 raise Exception("Vídeo original não encontrado")
                 
-            video_file = video_files[0]  # Usar o primeiro vídeo encontrado
             audio_file = segments_dir / 'full_audio.wav'
 
             if not video_file.exists() or not audio_file.exists():
@@ -756,6 +821,7 @@ class MainWindow(QMainWindow):
 
     def handle_media_error(self, error):
         """Trata erros do media player"""
+        from PyQt5.QtMultimedia import QMediaPlayer
         error_msg = "Erro desconhecido"
         if error == QMediaPlayer.FormatError:
             error_msg = "Formato de mídia não suportado"
@@ -768,6 +834,7 @@ class MainWindow(QMainWindow):
     def open_editor(self):
         """Abre o editor de vídeo com o projeto atual"""
         # Iniciar editor sem passar arquivos automaticamente
+        from .editor_window import VideoEditor
         self.editor = VideoEditor()
         self.editor.show()
         
@@ -789,6 +856,7 @@ class MainWindow(QMainWindow):
             for btn in [self.segment_play_btn, self.segment_stop_btn, self.segment_delete_btn]:
                 btn.setEnabled(True)
 
+            from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
             if not hasattr(self, 'segment_player'):
                 self.segment_player = QMediaPlayer()
             self.segment_player.setMedia(QMediaContent(QUrl.fromLocalFile(str(segment_path))))
@@ -796,6 +864,7 @@ class MainWindow(QMainWindow):
     def toggle_segment_playback(self):
         """Alterna entre play/pause do segmento"""
         if hasattr(self, 'segment_player'):
+            from PyQt5.QtMultimedia import QMediaPlayer
             if self.segment_player.state() == QMediaPlayer.PlayingState:
                 self.segment_player.pause()
                 self.segment_play_btn.setText("⏵")
@@ -941,6 +1010,7 @@ class MainWindow(QMainWindow):
     def show_video_editor(self):
         """Abre o editor de vídeo com o projeto atual"""
         if self.current_project:
+            from src.video_editor.clipchamp_editor import ClipchampEditor
             self.editor_window = ClipchampEditor(self.current_project)
             self.editor_window.show()
         else:
@@ -963,6 +1033,12 @@ class MainWindow(QMainWindow):
     def update_status(self, message):
         self.status_label.setText(message)
 
+    def start_warmup(self):
+        """Inicia o pré-carregamento dos modelos em segundo plano (após a janela aparecer)"""
+        self.warmup_worker = WarmupWorker()
+        self.warmup_worker.status.connect(lambda msg: self.log_message(msg, "info"))
+        self.warmup_worker.start()
+
 class LanguageSelectionDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -0,0 +1,28 @@
+import re
+
+# Linha da área de transcrição com o início do segmento: "[mm:ss] texto"
+_TIMESTAMPED_LINE = re.compile(r'^\[(\d+):(\d{2})\] ?(.*)$')
+
+def timestamped_text(starts, texts):
+    """Uma linha por segmento, prefixada pelo instante de início (mm:ss)"""
+    return "\n".join(f"[{int(start) // 60:02d}:{int(start) % 60:02d}] {text}" for start, text in zip(starts, texts))
+
+def strip_timestamps(text):
+    """Remove o prefixo [mm:ss] das linhas que o tiverem"""
+    lines = []
+    for line in text.splitlines():
+        match = _TIMESTAMPED_LINE.match(line)
+        lines.append(match.group(3) if match else line)
+    return "\n".join(lines)
+
+def segment_texts(text, count):
+    """
+    Textos das linhas [mm:ss] (possivelmente editadas), na ordem dos segmentos.
+    Retorna None se as linhas não correspondem mais a count segmentos
+    (linhas juntadas, divididas ou sem o prefixo de tempo).
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    matches = [_TIMESTAMPED_LINE.match(line) for line in lines]
+    if len(lines) != count or not all(matches):
+        return None
+    return [match.group(3).strip() for match in matches]
@@ -3,7 +3,6 @@ from PyQt5.QtWidgets import (QFrame, QVBoxLayout, QHBoxLayout, QPushButton,
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QSize, QUrl
 from PyQt5.QtGui import QImage, QPalette, QColor
 from pathlib import Path
-from src.video_editor.vlc_player import VLCPlayer
 import traceback
 
 def load_stylesheet(filename):
@@ -180,7 +179,8 @@ class VideoPlayer(QFrame):
                 self.player.stop()
                 self.player = None
             
-            # Criar novo player
+            # Criar novo player (a libvlc só é carregada no primeiro vídeo)
+            from src.video_editor.vlc_player import VLCPlayer
             self.player = VLCPlayer(self.video_widget)
             success = self.player.load(video_path)
             
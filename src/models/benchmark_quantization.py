@@ -0,0 +1,85 @@
+"""
+Compara o Whisper float32 e int8 (quantização dinâmica) na CPU.
+
+Uso:
+    python -m src.models.benchmark_quantization audio.wav --model small --seconds 120
+    python -m src.models.benchmark_quantization audio.wav --reference transcricao.txt
+
+Em máquinas com GPU, rode com CUDA_VISIBLE_DEVICES= para medir a CPU.
+Para cada precisão mostra o tempo de carga, o tempo de transcrição, o fator
+de tempo real (RTF) e a taxa de erro de palavras (WER) em relação à
+referência (ou ao resultado float32, se não houver referência).
+"""
+import argparse
+import re
+import time
+import torch
+import whisper
+from src.models.models_handler import load_whisper_model, ModelManager
+from src.audio_processing.audio_stream import load_audio_stream
+
+def _words(text):
+    return re.sub(r'[^\w\s]', '', text.lower()).split()
+
+def word_error_rate(reference, hypothesis):
+    """WER por distância de edição entre as palavras normalizadas"""
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / len(ref)
+
+def run(audio_file, model_size="small", seconds=120, reference=None, language=None, threads=None):
+    if threads:
+        torch.set_num_threads(threads)
+    audio = load_audio_stream(audio_file)[:int(seconds * whisper.audio.SAMPLE_RATE)]
+    duration = len(audio) / whisper.audio.SAMPLE_RATE
+    options = {"language": language, "temperature": 0.0, "beam_size": 3, "fp16": False, "verbose": None}
+
+    results = {}
+    for precision in ("fp32", "int8"):
+        start = time.perf_counter()
+        model = load_whisper_model(model_size, cpu_precision=precision)
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with torch.no_grad():
+            text = model.transcribe(audio, **options)["text"]
+        elapsed = time.perf_counter() - start
+
+        results[precision] = {'load': load_seconds, 'time': elapsed, 'rtf': elapsed / duration, 'text': text}
+        del model
+        ModelManager.clear_cache()  # Não manter as duas versões em memória
+
+    baseline = reference if reference is not None else results["fp32"]["text"]
+    print(f"\nÁudio: {audio_file} ({duration:.1f}s), modelo {model_size}, {torch.get_num_threads()} threads")
+    print(f"{'precisão':<10}{'carga (s)':>12}{'transcrição (s)':>18}{'RTF':>8}{'WER':>8}")
+    for precision, r in results.items():
+        wer = word_error_rate(baseline, r['text'])
+        print(f"{precision:<10}{r['load']:>12.1f}{r['time']:>18.1f}{r['rtf']:>8.3f}{wer:>8.3f}")
+    print(f"\nGanho de velocidade int8: {results['fp32']['time'] / results['int8']['time']:.2f}x")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara Whisper fp32 e int8 na CPU")
+    parser.add_argument("audio")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--reference", help="Arquivo de texto com a transcrição correta")
+    parser.add_argument("--language")
+    parser.add_argument("--threads", type=int)
+    args = parser.parse_args()
+
+    reference = None
+    if args.reference:
+        with open(args.reference, 'r', encoding='utf-8') as f:
+            reference = f.read()
+    run(args.audio, args.model, args.seconds, reference, args.language, args.threads)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+import whisper
+from whisper.model import ModelDimensions, Whisper
+
+# Versão do formato convertido: mudar invalida os arquivos já gerados
+FORMAT_VERSION = 1
+
+def mmap_checkpoint_path(name, dtype, cache_dir):
+    dtype_name = str(dtype).replace('torch.', '')
+    return Path(cache_dir) / f"{Path(name).stem}-{dtype_name}.v{FORMAT_VERSION}.mmap.pt"
+
+def _source_checkpoint(name, download_root):
+    """Caminho do .pt original do Whisper, baixando se necessário"""
+    if name in whisper._MODELS:
+        return whisper._download(whisper._MODELS[name], download_root, in_memory=False)
+    if os.path.isfile(name):
+        return name
+    raise RuntimeError(f"Modelo {name} não encontrado; disponíveis: {whisper.available_models()}")
+
+def convert_checkpoint(source, target, dtype):
+    """
+    Converte um checkpoint do Whisper para um arquivo que pode ser mapeado em
+    memória: tensores contíguos, já no dtype final (float32 por padrão),
+    salvos no formato zip do torch (um registro por tensor, com
+    alinhamento de página, lido com torch.load(mmap=True)).
+    """
+    start = time.perf_counter()
+    checkpoint = torch.load(source, map_location='cpu', weights_only=True)
+    state = {
+        key: (value.to(dtype) if value.is_floating_point() else value).contiguous()
+        for key, value in checkpoint['model_state_dict'].items()
+    }
+
+    # Gravar em arquivo temporário e renomear: outro processo nunca mapeia um arquivo pela metade
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_suffix(f'.{os.getpid()}.tmp')
+    torch.save({'dims': checkpoint['dims'], 'model_state_dict': state}, tmp_path)
+    os.replace(tmp_path, target)
+    print(f"Checkpoint convertido para {target.name} em {time.perf_counter() - start:.1f}s")
+
+def _restore_runtime_buffers(model, name):
+    """Recria os buffers não persistentes (não estão no checkpoint) fora do device meta"""
+    n_ctx = model.dims.n_text_ctx
+    model.decoder.mask = torch.empty(n_ctx, n_ctx).fill_(-np.inf).triu_(1)
+
+    if name in whisper._ALIGNMENT_HEADS:
+        model.set_alignment_heads(whisper._ALIGNMENT_HEADS[name])
+    else:
+        all_heads = torch.zeros(model.dims.n_text_layer, model.dims.n_text_head, dtype=torch.bool)
+        all_heads[model.dims.n_text_layer // 2:] = True
+        model.register_buffer("alignment_heads", all_heads.to_sparse(), persistent=False)
+
+def _layer_norms_to_float32(model):
+    """
+    O LayerNorm do Whisper normaliza a entrada em float32 (x.float()); com
+    pesos float16 a chamada falha por tipos diferentes. O whisper.load_model
+    mantém tudo em float32 pelo mesmo motivo.
+    """
+    for module in model.modules():
+        if isinstance(module, torch.nn.LayerNorm):
+            module.float()
+
+def load_mmap_whisper(name, device, cache_dir, download_root=None, dtype=torch.float32):
+    """
+    Carrega o Whisper a partir de um checkpoint mapeado em memória.
+
+    Na primeira chamada o .pt original é convertido para cache_dir. Depois,
+    o modelo é criado no device meta (sem alocar pesos) e recebe os tensores
+    mapeados do arquivo com load_state_dict(assign=True): a carga é quase
+    instantânea e processos diferentes compartilham as mesmas páginas do
+    page cache do sistema operacional. Na GPU os pesos são copiados do
+    mapeamento direto para a memória de vídeo.
+
+    Os pesos ficam em float32, como no whisper.load_model (o fp16 da GPU é
+    aplicado pelo decode). Com dtype=torch.float16 o arquivo ocupa metade do
+    espaço, mas os LayerNorm voltam para float32 depois da carga.
+    """
+    download_root = download_root or str(Path.home() / ".cache" / "whisper")
+    target = mmap_checkpoint_path(name, dtype, cache_dir)
+    if not target.exists():
+        convert_checkpoint(_source_checkpoint(name, download_root), target, dtype)
+
+    start = time.perf_counter()
+    checkpoint = torch.load(target, map_location='cpu', mmap=True, weights_only=True)
+    with torch.device('meta'):
+        model = Whisper(ModelDimensions(**checkpoint['dims']))
+    model.load_state_dict(checkpoint['model_state_dict'], assign=True)
+    _restore_runtime_buffers(model, name)
+    if dtype != torch.float32:
+        _layer_norms_to_float32(model)
+
+    leftover = [key for key, tensor in list(model.named_parameters()) + list(model.named_buffers()) if tensor.is_meta]
+    if leftover:
+        raise RuntimeError(f"Tensores não carregados do checkpoint: {leftover}")
+
+    for param in model.parameters():
+        param.requires_grad = False
+    model = model.to(device).eval()
+    print(f"Modelo {name} mapeado de {target.name} em {time.perf_counter() - start:.2f}s")
+    return model
@@ -11,10 +11,14 @@ from urllib.request import urlretrieve
 import json
 from tqdm import tqdm
 import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from functools import lru_cache
 import time
 import socket  # Adicionando importação do socket
 import logging
+from src.models.quantization import CPU_PRECISION, load_quantized_whisper
+from src.models.checkpoint_cache import load_mmap_whisper
 
 class DownloadProgressBar:
     def __init__(self):
@@ -363,12 +367,82 @@ def download_model(name="medium", force=False):
             model_path.unlink()
         raise
 
+def load_whisper_weights(name, device, download_root=None):
+    """
+    Carrega o Whisper pelo checkpoint mapeado em memória (convertido uma vez
+    para data/cache/whisper). Se a conversão ou o mapeamento falhar (ex.:
+    torch sem suporte a mmap), usa o carregamento padrão do whisper.
+    """
+    try:
+        return load_mmap_whisper(name, device, get_cache_dir(), download_root=download_root)
+    except Exception as e:
+        print(f"Aviso: checkpoint mapeado indisponível ({e}), usando whisper.load_model")
+        return whisper.load_model(name, device=device, download_root=download_root)
+
+def _model_size_bytes(model):
+    """Bytes ocupados pelos pesos (inclui pesos int8 empacotados, que não aparecem em parameters())"""
+    def tensor_bytes(value):
+        if isinstance(value, torch.Tensor):
+            if value.is_sparse:
+                return 0
+            return value.numel() * value.element_size()
+        if isinstance(value, (tuple, list)):
+            return sum(tensor_bytes(v) for v in value)
+        return 0
+    return sum(tensor_bytes(v) for v in model.state_dict().values())
+
+def _default_budget(device_kind):
+    """Orçamento padrão: MODEL_CACHE_RAM_MB/MODEL_CACHE_VRAM_MB ou uma fração da memória total"""
+    if device_kind == "cuda":
+        if os.getenv("MODEL_CACHE_VRAM_MB"):
+            return int(os.getenv("MODEL_CACHE_VRAM_MB")) * 1024 * 1024
+        if torch.cuda.is_available():
+            return int(torch.cuda.get_device_properties(0).total_memory * 0.8)
+        return 0
+    if os.getenv("MODEL_CACHE_RAM_MB"):
+        return int(os.getenv("MODEL_CACHE_RAM_MB")) * 1024 * 1024
+    import psutil
+    return int(psutil.virtual_memory().total * 0.5)
+
+def _load_uncached(name, device, cpu_precision):
+    """Carrega um modelo sem passar pelo cache do ModelManager"""
+    download_root = str(Path.home() / ".cache" / "whisper")
+    if device == "cpu" and cpu_precision == "int8":
+        return load_quantized_whisper(name, lambda: _load_uncached(name, "cpu", "fp32"), get_cache_dir())
+
+    model = load_whisper_weights(name, device, download_root=download_root)
+    if device == "cpu":
+        model = model.float()  # FP32 na CPU (sem cópia se o checkpoint já for float32)
+    for param in model.parameters():
+        param.requires_grad = False
+    return model.eval()
+
+class _CacheEntry:
+    def __init__(self, key, model, size_bytes, device_kind):
+        self.key = key
+        self.model = model
+        self.size_bytes = size_bytes
+        self.device_kind = device_kind
+        self.refs = 0
+
 class ModelManager:
+    """
+    Cache de modelos Whisper compartilhado pelo aplicativo.
+
+    A chave identifica apenas os pesos (nome, dispositivo, precisão): trocar
+    o idioma alvo não recarrega o modelo. Cada tipo de memória (RAM/VRAM)
+    tem um orçamento em bytes; ao passar do limite, os modelos usados há
+    mais tempo são removidos, exceto os que estão em uso (contagem de
+    referências via acquire/release ou use()). Carregamentos simultâneos da
+    mesma chave esperam pelo primeiro em vez de carregar duas vezes.
+    """
     _instance = None
-    _lock = threading.Lock()
-    _models = {}
-    _last_used = {}
-    _max_cached_models = 1
+    _lock = threading.RLock()
+    _entries = OrderedDict()  # chave -> _CacheEntry, do menos para o mais recente
+    _loading = {}  # chave -> threading.Event de um carregamento em andamento
+    _known_sizes = {}  # chave -> bytes, para liberar espaço antes de recarregar
+    _budgets = {}
+    _metrics = {'hits': 0, 'misses': 0, 'evictions': 0, 'load_seconds': 0.0, 'over_budget': 0}
     
     def __new__(cls):
         if cls._instance is None:
@@ -378,56 +452,140 @@ class ModelManager:
         return cls._instance
     
     @staticmethod
-    def _cleanup_old_models():
+    def model_key(name, device, cpu_precision=None):
+        device_kind = "cuda" if str(device).startswith("cuda") else "cpu"
+        precision = (cpu_precision or CPU_PRECISION) if device_kind == "cpu" else "fp32"
+        return f"{name}|{device}|{precision}"
+    
+    @staticmethod
+    def set_budget(device_kind, max_bytes):
+        """Define o orçamento em bytes de 'cpu' (RAM) ou 'cuda' (VRAM)"""
         with ModelManager._lock:
-            while len(ModelManager._models) > ModelManager._max_cached_models:
-                oldest_key = min(ModelManager._last_used.items(), key=lambda x: x[1])[0]
-                del ModelManager._models[oldest_key]
-                del ModelManager._last_used[oldest_key]
-                torch.cuda.empty_cache() if torch.cuda.is_available() else None
+            ModelManager._budgets[device_kind] = max_bytes
+            ModelManager._evict(device_kind, 0)
     
     @staticmethod
-    def get_model(name, device, target_language="pt"):
-        """Get or load a model for the specified device and language"""
-        key = f"{name}_{device}_{target_language}"
-        current_time = time.time()
+    def _budget(device_kind):
+        if device_kind not in ModelManager._budgets:
+            ModelManager._budgets[device_kind] = _default_budget(device_kind)
+        return ModelManager._budgets[device_kind]
+    
+    @staticmethod
+    def _evict(device_kind, incoming_bytes):
+        """Remove modelos livres (LRU) até incoming_bytes caber no orçamento. Chamar com _lock"""
+        budget = ModelManager._budget(device_kind)
+        used = sum(e.size_bytes for e in ModelManager._entries.values() if e.device_kind == device_kind)
+        for entry in list(ModelManager._entries.values()):
+            if used + incoming_bytes <= budget:
+                break
+            if entry.device_kind != device_kind or entry.refs > 0:
+                continue
+            del ModelManager._entries[entry.key]
+            used -= entry.size_bytes
+            ModelManager._metrics['evictions'] += 1
+            print(f"Modelo removido do cache: {entry.key} ({entry.size_bytes / 1024**2:.0f} MB)")
+        if device_kind == "cuda" and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        return used + incoming_bytes <= budget
+    
+    @staticmethod
+    def acquire(name, device, cpu_precision=None):
+        """Retorna o modelo e marca como em uso; cada acquire precisa de um release"""
+        key = ModelManager.model_key(name, device, cpu_precision)
+        device_kind = "cuda" if str(device).startswith("cuda") else "cpu"
         
-        with ModelManager._lock:
-            ModelManager._cleanup_old_models()
-            
-            if key not in ModelManager._models:
-                print(f"Carregando modelo {name} para {device} (idioma alvo: {target_language})...")
-                model = whisper.load_model(name, device=device)
-                
-                # Configurar modelo para português
-                if target_language == "pt":
-                    import warnings
-                    with warnings.catch_warnings():
-                        warnings.simplefilter("ignore")
-                        # Força o modelo a usar vocabulário português
-                        model.tokenizer.language = "pt"
-                        model.tokenizer.task = "translate"
-                
-                # Usar half precision apenas se estiver na GPU
-                if device == "cuda":
-                    model = model.half()  # FP16 apenas na GPU
-                else:
-                    model = model.float()  # FP32 na CPU
-                
-                ModelManager._models[key] = model
+        while True:
+            with ModelManager._lock:
+                entry = ModelManager._entries.get(key)
+                if entry is not None:
+                    entry.refs += 1
+                    ModelManager._entries.move_to_end(key)
+                    ModelManager._metrics['hits'] += 1
+                    return entry.model
+                loading = ModelManager._loading.get(key)
+                if loading is None:
+                    ModelManager._loading[key] = threading.Event()
+                    ModelManager._metrics['misses'] += 1
+                    # Liberar espaço antes de carregar quando o tamanho já é conhecido
+                    ModelManager._evict(device_kind, ModelManager._known_sizes.get(key, 0))
+                    break
+            loading.wait()
+        
+        try:
+            print(f"Carregando modelo {name} para {device}...")
+            start = time.perf_counter()
+            model = _load_uncached(name, device, cpu_precision or CPU_PRECISION)
+            elapsed = time.perf_counter() - start
+            size_bytes = _model_size_bytes(model)
             
-            ModelManager._last_used[key] = current_time
-            return ModelManager._models[key]
+            with ModelManager._lock:
+                ModelManager._metrics['load_seconds'] += elapsed
+                ModelManager._known_sizes[key] = size_bytes
+                if not ModelManager._evict(device_kind, size_bytes):
+                    ModelManager._metrics['over_budget'] += 1
+                    print(f"Aviso: orçamento de memória excedido por {key} (modelos em uso não são removidos)")
+                entry = _CacheEntry(key, model, size_bytes, device_kind)
+                entry.refs = 1
+                ModelManager._entries[key] = entry
+            print(f"Modelo {key} carregado em {elapsed:.1f}s ({size_bytes / 1024**2:.0f} MB)")
+            return model
+        finally:
+            with ModelManager._lock:
+                ModelManager._loading.pop(key).set()
+    
+    @staticmethod
+    def release(model):
+        """Libera uma referência obtida com acquire"""
+        with ModelManager._lock:
+            for entry in ModelManager._entries.values():
+                if entry.model is model:
+                    entry.refs = max(0, entry.refs - 1)
+                    return
+    
+    @staticmethod
+    @contextmanager
+    def use(name, device, cpu_precision=None):
+        """with ModelManager.use(...) as model: o modelo não é removido dentro do bloco"""
+        model = ModelManager.acquire(name, device, cpu_precision)
+        try:
+            yield model
+        finally:
+            ModelManager.release(model)
+    
+    @staticmethod
+    def get_model(name, device, target_language="pt", cpu_precision=None):
+        """
+        Retorna o modelo sem mantê-lo reservado. target_language é aceito por
+        compatibilidade: os pesos são os mesmos para qualquer idioma.
+        """
+        model = ModelManager.acquire(name, device, cpu_precision)
+        ModelManager.release(model)
+        return model
+    
+    @staticmethod
+    def metrics():
+        """Contadores de acerto/falta/remoção, tempo de carga e modelos em cache"""
+        with ModelManager._lock:
+            return dict(
+                ModelManager._metrics,
+                models=[{
+                    'key': e.key,
+                    'size_mb': e.size_bytes / 1024**2,
+                    'refs': e.refs
+                } for e in ModelManager._entries.values()],
+                budgets_mb={kind: budget / 1024**2 for kind, budget in ModelManager._budgets.items()}
+            )
 
     @staticmethod
     def clear_cache():
-        """Clear model cache and free memory"""
+        """Clear model cache and free memory (modelos em uso são mantidos)"""
         with ModelManager._lock:
-            ModelManager._models.clear()
-            ModelManager._last_used.clear()
+            for key in [k for k, e in ModelManager._entries.items() if e.refs == 0]:
+                del ModelManager._entries[key]
             if torch.cuda.is_available():
                 torch.cuda.empty_cache()
 
+
 class MemoryManager:
     @staticmethod
     def clear_memory():
@@ -438,8 +596,15 @@ class MemoryManager:
         import gc
         gc.collect()
 
-def load_whisper_model(model_size="small", target_language=None):
-    """Carrega o modelo Whisper com otimizações e suporte a detecção automática de idioma"""
+def load_whisper_model(model_size="small", target_language=None, cpu_precision=None, reserve=False):
+    """
+    Carrega o modelo Whisper com otimizações e suporte a detecção automática de idioma.
+    Na CPU, cpu_precision='int8' (ou WHISPER_CPU_PRECISION=int8) usa o modelo
+    com quantização dinâmica int8, salvo em cache após a primeira quantização.
+    O modelo vem do ModelManager, então chamadas seguintes não recarregam os
+    pesos. Com reserve=True o modelo fica marcado em uso (não pode ser
+    removido do cache) até ModelManager.release(model).
+    """
     try:
         # Configurar device
         device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -448,25 +613,9 @@ def load_whisper_model(model_size="small", target_language=None):
         else:
             print(f"Usando GPU: {torch.cuda.get_device_name(0)}")
 
-        # Carregar modelo com otimizações
-        model = whisper.load_model(
-            model_size,
-            device=device,
-            download_root=str(Path.home() / ".cache" / "whisper"),
-            in_memory=True
-        )
-        
-        # Otimizações gerais
-        if device == "cpu":
-            # Forçar o modelo para float32 para evitar problemas de precisão
-            model = model.float()
-            # Desabilitar gradient para economizar memória
-            for param in model.parameters():
-                param.requires_grad = False
-            # Limpar cache CUDA
-            torch.cuda.empty_cache()
-        
-        return model
+        if reserve:
+            return ModelManager.acquire(model_size, device, cpu_precision)
+        return ModelManager.get_model(model_size, device, target_language, cpu_precision)
 
     except Exception as e:
         logging.error(f"Erro ao carregar modelo Whisper: {e}")
@@ -0,0 +1,63 @@
+import os
+import time
+import torch
+from torch import nn
+
+# Precisão do Whisper na CPU: 'fp32' (padrão) ou 'int8' (quantização dinâmica das camadas lineares)
+CPU_PRECISION = os.getenv('WHISPER_CPU_PRECISION', 'fp32').lower()
+CPU_PRECISIONS = ('fp32', 'int8')
+
+def _as_plain_linear(module):
+    """
+    Converte whisper.model.Linear em nn.Linear reaproveitando os mesmos
+    parâmetros. quantize_dynamic só reconhece o tipo exato nn.Linear.
+    """
+    linear = nn.Linear(module.in_features, module.out_features, bias=module.bias is not None)
+    linear.weight = module.weight
+    linear.bias = module.bias
+    return linear
+
+def quantize_whisper_int8(model):
+    """
+    Aplica quantização dinâmica int8 às camadas lineares (atenção e MLP do
+    encoder e do decoder). Convoluções, embeddings e a projeção final de
+    tokens continuam em float32. O modelo deve estar na CPU.
+    """
+    model = model.float().cpu().eval()
+    for parent in list(model.modules()):
+        for name, child in list(parent.named_children()):
+            if isinstance(child, nn.Linear) and type(child) is not nn.Linear:
+                setattr(parent, name, _as_plain_linear(child))
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+def quantized_model_path(model_size, cache_dir):
+    """Arquivo do modelo quantizado; inclui a versão do torch porque o pickle depende dela"""
+    version = torch.__version__.split('+')[0]
+    return cache_dir / f"{model_size}-int8-torch{version}.pt"
+
+def load_quantized_whisper(model_size, load_fp32, cache_dir):
+    """
+    Retorna o modelo int8 de model_size. Na primeira vez o modelo float32 é
+    carregado com load_fp32(), quantizado e salvo em cache_dir; nas próximas
+    o arquivo quantizado é carregado diretamente.
+    """
+    path = quantized_model_path(model_size, cache_dir)
+    if path.exists():
+        try:
+            print(f"Carregando modelo quantizado (int8): {path}")
+            model = torch.load(path, map_location='cpu', weights_only=False)
+            return model.eval()
+        except Exception as e:
+            print(f"Modelo quantizado inválido ({e}), quantizando novamente...")
+            path.unlink()
+
+    start = time.perf_counter()
+    model = quantize_whisper_int8(load_fp32())
+    print(f"Modelo {model_size} quantizado para int8 em {time.perf_counter() - start:.1f}s")
+
+    # Escrever em arquivo temporário e renomear: outro processo nunca lê um arquivo pela metade
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    torch.save(model, tmp_path)
+    os.replace(tmp_path, path)
+    print(f"Modelo quantizado salvo em: {path}")
+    return model
@@ -0,0 +1,122 @@
+import builtins
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Meta de tempo até a janela principal aparecer (cold start), em segundos
+STARTUP_TARGET_SECONDS = float(os.getenv('STARTUP_TARGET_SECONDS', '1.0'))
+PROFILE_FLAG = '--profile-startup'
+QUIT_FLAG = '--quit-after-startup'
+
+class StartupProfiler:
+    """
+    Mede o tempo de inicialização do aplicativo: tempo de cada import (total
+    e próprio, sem os imports aninhados) e marcos nomeados (QApplication,
+    janela criada, janela exibida). Ativado com --profile-startup ou
+    STARTUP_PROFILE=1; o relatório é impresso e acrescentado a
+    data/startup_profile.jsonl para acompanhar a evolução entre versões.
+
+    O import é medido substituindo builtins.__import__ apenas na thread que
+    instalou o profiler, até stop().
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = []
+        self.imports = {}  # nome -> [total, próprio]
+        self._stack = []
+        self._thread = threading.get_ident()
+        self._original_import = None
+
+    @classmethod
+    def from_args(cls, argv):
+        """Cria e instala o profiler se a medição foi pedida; senão retorna None"""
+        if PROFILE_FLAG not in argv and os.getenv('STARTUP_PROFILE', '0') != '1':
+            return None
+        return cls().install()
+
+    def install(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        return self
+
+    def stop(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - self.start))
+
+    def _module_name(self, name, globals, level, fromlist):
+        """Nome do módulo carregado pelo import (ou dos submódulos em 'from pacote import x')"""
+        base = name
+        if level:
+            try:
+                base = importlib.util.resolve_name('.' * level + name, (globals or {}).get('__package__'))
+            except (ImportError, ValueError):
+                base = '.' * level + name
+        if fromlist and base in sys.modules:
+            pending = [f"{base}.{item}" for item in fromlist if item != '*' and f"{base}.{item}" not in sys.modules]
+            if pending:
+                return ", ".join(pending)
+        return base
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import or builtins.__import__
+        if threading.get_ident() != self._thread or (level == 0 and not fromlist and name in sys.modules):
+            return original(name, globals, locals, fromlist, level)
+
+        module_name = self._module_name(name, globals, level, fromlist)
+        loaded = len(sys.modules)
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += total
+            if len(sys.modules) > loaded:
+                entry = self.imports.setdefault(module_name, [0.0, 0.0])
+                entry[0] += total
+                entry[1] += total - children
+
+    def report(self, top=15):
+        """Texto com os marcos e os imports mais lentos (por tempo total)"""
+        lines = ["=== Perfil de inicialização ==="]
+        for label, elapsed in self.marks:
+            lines.append(f"{elapsed * 1000:8.1f} ms  {label}")
+
+        lines.append(f"--- {top} imports mais lentos (total / próprio) ---")
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        for name, (total, own) in slowest:
+            lines.append(f"{total * 1000:8.1f} ms  {own * 1000:8.1f} ms  {name}")
+
+        if self.marks:
+            elapsed = self.marks[-1][1]
+            status = "OK" if elapsed <= STARTUP_TARGET_SECONDS else "ACIMA DA META"
+            lines.append(f"Janela em {elapsed:.2f}s (meta {STARTUP_TARGET_SECONDS:.2f}s): {status}")
+        return "\n".join(lines)
+
+    def save(self, path):
+        """Acrescenta uma linha JSON com o resultado desta inicialização"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        record = {
+            'timestamp': time.time(),
+            'python': sys.version.split()[0],
+            'marks': {label: round(elapsed, 4) for label, elapsed in self.marks},
+            'imports': {
+                name: {'total': round(total, 4), 'self': round(own, 4)}
+                for name, (total, own) in sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+            }
+        }
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return path
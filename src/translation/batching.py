@@ -0,0 +1,43 @@
+import re
+
+# Separador entre segmentos de um lote: o Google Translate preserva quebras de linha
+BATCH_DELIMITER = "\n"
+# Limite de caracteres por requisição (a API recusa textos acima de ~5000)
+MAX_BATCH_CHARS = 4500
+MAX_BATCH_ITEMS = 128
+
+def clean_segment(text):
+    """Remove quebras de linha internas para que o separador seja inequívoco"""
+    return re.sub(r'\s*[\r\n]+\s*', ' ', text).strip()
+
+def pack_batches(texts, max_chars=MAX_BATCH_CHARS, max_items=MAX_BATCH_ITEMS):
+    """
+    Agrupa os índices de texts em lotes cujo texto unido (com o separador)
+    cabe em max_chars. Um texto maior que o limite sozinho vira um lote
+    próprio.
+    """
+    batches = []
+    current, size = [], 0
+    for i, text in enumerate(texts):
+        length = len(clean_segment(text)) + len(BATCH_DELIMITER)
+        if current and (size + length > max_chars or len(current) >= max_items):
+            batches.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += length
+    if current:
+        batches.append(current)
+    return batches
+
+def join_batch(texts):
+    return BATCH_DELIMITER.join(clean_segment(text) for text in texts)
+
+def split_batch(translated, expected):
+    """
+    Separa a resposta de um lote de volta em expected segmentos. Retorna None
+    se a quantidade não bate (o tradutor juntou ou quebrou linhas).
+    """
+    parts = [part.strip() for part in translated.strip().split(BATCH_DELIMITER)]
+    if len(parts) != expected:
+        return None
+    return parts
@@ -0,0 +1,209 @@
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from src.cache.translation_cache import get_translation_cache, normalize_text
+
+# Modelo local: modelo Marian por par de idiomas ({source}/{target} no nome) ou um
+# modelo multilíngue NLLB (ex.: facebook/nllb-200-distilled-600M)
+LOCAL_MODEL = os.getenv('LOCAL_TRANSLATION_MODEL', 'Helsinki-NLP/opus-mt-{source}-{target}')
+LOCAL_MODELS_DIR = Path(os.getenv(
+    'LOCAL_TRANSLATION_MODELS_DIR',
+    Path(__file__).parent.parent.parent / 'data' / 'models' / 'translation'
+))
+LOCAL_BATCH_SIZE = int(os.getenv('LOCAL_TRANSLATION_BATCH', 16))  # Frases por chamada ao generate
+LOCAL_NUM_BEAMS = int(os.getenv('LOCAL_TRANSLATION_BEAMS', 1))  # 1 = greedy (mais rápido na CPU)
+LOCAL_THREADS = int(os.getenv('LOCAL_TRANSLATION_THREADS', 0))  # 0 = padrão do torch
+# Só usar arquivos já baixados (máquinas sem rede)
+LOCAL_FILES_ONLY = os.getenv('LOCAL_TRANSLATION_OFFLINE', os.getenv('HF_HUB_OFFLINE', '0')) == '1'
+MAX_TOKENS = 512
+
+# Códigos FLORES-200 usados pelo NLLB para os idiomas mais comuns
+NLLB_CODES = {
+    'pt': 'por_Latn', 'en': 'eng_Latn', 'es': 'spa_Latn', 'fr': 'fra_Latn',
+    'de': 'deu_Latn', 'it': 'ita_Latn', 'nl': 'nld_Latn', 'ru': 'rus_Cyrl',
+    'ja': 'jpn_Jpan', 'ko': 'kor_Hang', 'zh': 'zho_Hans', 'ar': 'arb_Arab',
+    'hi': 'hin_Deva', 'tr': 'tur_Latn', 'pl': 'pol_Latn', 'uk': 'ukr_Cyrl'
+}
+
+_SENTENCE_END = re.compile(r'(?<=[.!?…])\s+')
+
+def split_units(text):
+    """
+    Divide um texto nas unidades traduzidas pelo modelo: linhas e, dentro de
+    cada linha, frases. Retorna a lista de linhas, cada uma com suas frases.
+    """
+    return [[s for s in _SENTENCE_END.split(line.strip()) if s] for line in text.split('\n')]
+
+def join_units(lines):
+    return '\n'.join(' '.join(sentences) for sentences in lines)
+
+def detect_source_language(texts):
+    """Idioma predominante de texts (langdetect); None se não der para detectar"""
+    try:
+        from langdetect import detect
+        return detect(' '.join(texts[:50]))[:2]
+    except Exception:
+        return None
+
+class LocalTranslator:
+    """
+    Tradução offline com um modelo seq2seq local (MarianMT ou NLLB), com a
+    mesma interface do GoogleTranslator (translate/translate_batch).
+
+    As frases são ordenadas pelo número de tokens e traduzidas em lotes de
+    batch_size, o que reduz o padding e mantém a vazão previsível na CPU.
+    Os modelos são carregados uma vez por processo e compartilhados entre
+    instâncias.
+    """
+
+    _models = {}
+    _models_lock = threading.Lock()
+
+    def __init__(self, cache=None, use_cache=True, model=LOCAL_MODEL, device='cpu',
+                 batch_size=LOCAL_BATCH_SIZE, num_beams=LOCAL_NUM_BEAMS, local_files_only=LOCAL_FILES_ONLY):
+        """
+        Args:
+            cache: TranslationCache usado (default: cache compartilhado em data/cache/translations)
+            use_cache: False desativa a memória de traduções
+            model: Nome ou caminho do modelo; {source} e {target} são trocados pelos idiomas
+            device: Dispositivo do torch ('cpu', 'cuda')
+            batch_size: Frases por chamada ao generate
+            num_beams: Largura do beam search (1 = greedy)
+            local_files_only: Não acessar a rede, apenas modelos já em LOCAL_MODELS_DIR
+        """
+        self.cache = None
+        if use_cache:
+            try:
+                self.cache = cache or get_translation_cache()
+            except Exception as e:
+                print(f"Aviso: cache de traduções indisponível: {e}")
+        self.model = model
+        self.device = device
+        self.batch_size = max(1, batch_size)
+        self.num_beams = max(1, num_beams)
+        self.local_files_only = local_files_only
+
+    def model_name(self, source_lang, target_lang):
+        return self.model.format(source=source_lang, target=target_lang)
+
+    def _is_nllb(self, name):
+        return 'nllb' in name.lower()
+
+    def _load(self, name):
+        """Tokenizer e modelo de name, carregados uma única vez por processo"""
+        with LocalTranslator._models_lock:
+            key = (name, self.device)
+            if key not in LocalTranslator._models:
+                import torch
+                from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+                if LOCAL_THREADS:
+                    torch.set_num_threads(LOCAL_THREADS)
+                start = time.perf_counter()
+                options = {'cache_dir': str(LOCAL_MODELS_DIR), 'local_files_only': self.local_files_only}
+                tokenizer = AutoTokenizer.from_pretrained(name, **options)
+                model = AutoModelForSeq2SeqLM.from_pretrained(name, **options).to(self.device).eval()
+                LocalTranslator._models[key] = (tokenizer, model)
+                print(f"Modelo de tradução {name} carregado em {time.perf_counter() - start:.1f}s")
+            return LocalTranslator._models[key]
+
+    def translate(self, text: str, target_lang: str, source_lang: Optional[str] = 'auto') -> str:
+        """Traduz um texto (linhas e frases são traduzidas separadamente e remontadas)"""
+        return self.translate_batch([text], target_lang, source_lang)[0]
+
+    def translate_batch(self, texts: list[str], target_lang: str, source_lang: Optional[str] = 'auto',
+                        on_progress=None) -> list[str]:
+        """
+        Traduz uma lista de textos com o modelo local
+
+        Args:
+            texts: Lista de textos para traduzir
+            target_lang: Código do idioma alvo
+            source_lang: Código do idioma fonte ('auto' detecta com langdetect)
+            on_progress: Chamado com (concluídas, total) de frases a cada lote
+
+        Returns:
+            list[str]: Lista de textos traduzidos (o original onde a tradução falhou)
+        """
+        translated = [None] * len(texts)
+        if self.cache is not None:
+            try:
+                translated = self.cache.get_many(texts, target_lang, source_lang)
+            except Exception as e:
+                print(f"Aviso: erro ao ler o cache de traduções: {e}")
+
+        pending = [i for i, text in enumerate(texts) if translated[i] is None and normalize_text(text)]
+        if not pending:
+            return [text if result is None else result for text, result in zip(texts, translated)]
+
+        model_source = source_lang
+        if not source_lang or source_lang == 'auto':
+            model_source = detect_source_language([texts[i] for i in pending])
+            if model_source is None:
+                print("Aviso: idioma fonte não detectado; tradução local ignorada")
+                return [text if result is None else result for text, result in zip(texts, translated)]
+
+        if model_source == target_lang[:2]:
+            results = {i: texts[i] for i in pending}
+        else:
+            structure = {i: split_units(texts[i]) for i in pending}
+            sentences = sorted({s for lines in structure.values() for line in lines for s in line})
+            try:
+                done = self._generate(sentences, model_source, target_lang[:2], on_progress)
+            except Exception as e:
+                print(f"Erro na tradução local: {str(e)}")
+                done = {}
+            results = {
+                i: join_units([[done[s] for s in line] for line in lines])
+                for i, lines in structure.items()
+                if all(s in done for line in lines for s in line)
+            }
+
+        new_pairs = [(texts[i], results[i]) for i in pending if i in results]
+        if self.cache is not None and new_pairs:
+            try:
+                self.cache.put_many(new_pairs, target_lang, source_lang)
+            except Exception as e:
+                print(f"Aviso: erro ao salvar no cache de traduções: {e}")
+
+        for i in pending:
+            translated[i] = results.get(i, texts[i])
+        return [text if result is None else result for text, result in zip(texts, translated)]
+
+    def _generate(self, sentences, source_lang, target_lang, on_progress=None):
+        """Traduz frases únicas em lotes ordenados por tamanho; retorna {frase: tradução}"""
+        import torch
+
+        name = self.model_name(source_lang, target_lang)
+        tokenizer, model = self._load(name)
+        generate_options = {'num_beams': self.num_beams, 'max_new_tokens': MAX_TOKENS}
+        if self._is_nllb(name):
+            tokenizer.src_lang = NLLB_CODES.get(source_lang, source_lang)
+            generate_options['forced_bos_token_id'] = tokenizer.convert_tokens_to_ids(
+                NLLB_CODES.get(target_lang, target_lang)
+            )
+
+        # Frases de tamanho parecido no mesmo lote: menos padding por chamada
+        lengths = [len(ids) for ids in tokenizer(sentences, truncation=True, max_length=MAX_TOKENS)['input_ids']]
+        order = sorted(range(len(sentences)), key=lambda i: lengths[i], reverse=True)
+
+        results = {}
+        start = time.perf_counter()
+        for offset in range(0, len(order), self.batch_size):
+            batch = [sentences[i] for i in order[offset:offset + self.batch_size]]
+            inputs = tokenizer(batch, return_tensors='pt', padding=True, truncation=True,
+                               max_length=MAX_TOKENS).to(self.device)
+            with torch.inference_mode():
+                output = model.generate(**inputs, **generate_options)
+            for sentence, result in zip(batch, tokenizer.batch_decode(output, skip_special_tokens=True)):
+                results[sentence] = result.strip()
+            if on_progress:
+                on_progress(len(results), len(sentences))
+
+        elapsed = time.perf_counter() - start
+        print(f"{len(sentences)} frases traduzidas localmente em {elapsed:.1f}s "
+              f"({len(sentences) / max(elapsed, 1e-6):.1f} frases/s)")
+        return results
@@ -0,0 +1,115 @@
+import os
+import queue
+import threading
+import time
+from src.translation.batching import MAX_BATCH_CHARS
+
+# Tempo que o consumidor espera por mais textos antes de traduzir o que já chegou
+PIPELINE_MAX_WAIT = float(os.getenv('TRANSLATION_PIPELINE_WAIT', 0.5))
+
+_CLOSE = object()
+
+class TranslationPipeline:
+    """
+    Estágio de tradução que roda junto com a transcrição (produtor/consumidor).
+
+    O produtor (Whisper) entrega cada trecho com submit() assim que ele é
+    decodificado. Uma thread consumidora junta o que está na fila (até
+    max_chars caracteres ou max_wait segundos sem novos textos) e chama
+    translate_batch enquanto o Whisper segue com os próximos trechos. Assim
+    o tempo total fica perto de max(transcrição, tradução) em vez da soma.
+
+    submit() deve ser chamado por um produtor de cada vez; close() espera a
+    fila esvaziar e devolve as traduções na ordem de envio.
+    """
+
+    def __init__(self, translator, target_lang, source_lang='auto', on_translated=None, on_progress=None,
+                 max_chars=MAX_BATCH_CHARS, max_wait=PIPELINE_MAX_WAIT):
+        """
+        Args:
+            translator: GoogleTranslator ou LocalTranslator (usa translate_batch)
+            target_lang: Código do idioma alvo
+            source_lang: Código do idioma fonte ('auto' para detectar)
+            on_translated: Chamado com [(índice, tradução)] a cada lote traduzido
+            on_progress: Chamado com (traduzidos, total) depois de close(), quando o total é conhecido
+            max_chars: Caracteres acumulados que disparam um lote sem esperar max_wait
+            max_wait: Segundos esperando novos textos antes de traduzir o que chegou
+        """
+        self.translator = translator
+        self.target_lang = target_lang
+        self.source_lang = source_lang
+        self.on_translated = on_translated
+        self.on_progress = on_progress
+        self.max_chars = max_chars
+        self.max_wait = max_wait
+        self.texts = []
+        self.results = []
+        self.error = None
+        self._closing = False
+        self._aborted = False
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='translation-pipeline', daemon=True)
+        self._thread.start()
+
+    def submit(self, texts):
+        """Enfileira textos para tradução (índices seguem a ordem de envio)"""
+        for text in texts:
+            self._queue.put((len(self.texts), text))
+            self.texts.append(text)
+
+    def close(self) -> list:
+        """Espera a tradução de tudo que foi enviado e retorna as traduções em ordem"""
+        self._closing = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.results
+
+    def abort(self):
+        """Descarta o que ainda está na fila (a transcrição falhou)"""
+        self._aborted = True
+        self._queue.put(_CLOSE)
+
+    def _next_batch(self):
+        """Bloqueia até o primeiro texto e junta os que chegarem em seguida"""
+        batch = [self._queue.get()]
+        size = 0
+        deadline = time.monotonic() + self.max_wait
+        while batch[-1] is not _CLOSE:
+            size += len(batch[-1][1])
+            if size >= self.max_chars:
+                break
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        closed = False
+        while not closed:
+            batch = self._next_batch()
+            if batch[-1] is _CLOSE:
+                closed = True
+                batch.pop()
+            if self._aborted:
+                return
+            if batch and self.error is None:
+                self._translate(batch)
+
+    def _translate(self, batch):
+        indexes = [index for index, _ in batch]
+        try:
+            translated = self.translator.translate_batch(
+                [text for _, text in batch], self.target_lang, self.source_lang
+            )
+            self.results.extend(translated)
+
+            if self.on_translated:
+                self.on_translated(list(zip(indexes, translated)))
+            if self.on_progress and self._closing:
+                self.on_progress(len(self.results), len(self.texts))
+        except Exception as e:
+            # Repassado ao produtor em close()
+            self.error = e
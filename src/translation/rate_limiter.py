@@ -0,0 +1,65 @@
+import threading
+import time
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket com taxa adaptativa (AIMD), compartilhado pelas threads de
+    tradução.
+
+    acquire() bloqueia até haver um token. Cada sucesso aumenta a taxa em
+    increase requisições/s, até max_rate; cada resposta 429/5xx divide a
+    taxa por 2 (até min_rate) e, com Retry-After, suspende todas as
+    requisições pelo tempo pedido.
+    """
+
+    def __init__(self, rate=5.0, burst=5, min_rate=0.5, max_rate=20.0, increase=0.5, decrease=0.5):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.tokens = self.burst
+        self.paused_until = 0.0
+        self.successes = 0
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Espera um token; retorna o tempo esperado em segundos"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+            waited += wait
+
+    def on_success(self):
+        with self._lock:
+            self.successes += 1
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        """Resposta 429/5xx: reduz a taxa e esvazia o bucket"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = 0.0
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+
+    def stats(self):
+        with self._lock:
+            return {'rate': self.rate, 'successes': self.successes, 'throttled': self.throttled}
@@ -1,21 +1,98 @@
+import os
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from typing import Optional
-import time
-from functools import lru_cache
+from src.cache.translation_cache import get_translation_cache, normalize_text
+from src.translation.batching import pack_batches, join_batch, split_batch
+from src.translation.rate_limiter import AdaptiveRateLimiter
+
+# Endpoint e limites configuráveis (ex.: apontar para um servidor local nos testes)
+TRANSLATE_BASE_URL = os.getenv('TRANSLATE_BASE_URL', "https://translate.googleapis.com/translate_a/single")
+TRANSLATE_WORKERS = int(os.getenv('TRANSLATE_WORKERS', 4))  # Requisições simultâneas
+TRANSLATE_RATE = float(os.getenv('TRANSLATE_RATE', 5))  # Requisições/s iniciais (ajustadas pelo limitador)
+# Backend de tradução: 'google' (API web) ou 'local' (modelo MarianMT/NLLB, sem rede)
+TRANSLATION_BACKEND = os.getenv('TRANSLATION_BACKEND', 'google').lower()
+MAX_RETRIES = 4
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After', 0)) or None
+    except ValueError:
+        return None
+
+def create_translator(backend=None, **kwargs):
+    """
+    Cria o tradutor do backend configurado (TRANSLATION_BACKEND). Os dois
+    backends têm a mesma interface: translate(texto, alvo, fonte) e
+    translate_batch(textos, alvo, fonte, on_progress).
+    """
+    backend = (backend or TRANSLATION_BACKEND).lower()
+    if backend == 'google':
+        return GoogleTranslator(**kwargs)
+    if backend == 'local':
+        from src.translation.local_translator import LocalTranslator
+        return LocalTranslator(cache=kwargs.get('cache'), use_cache=kwargs.get('use_cache', True))
+    raise ValueError(f"Backend de tradução desconhecido: {backend} (use 'google' ou 'local')")
 
 class GoogleTranslator:
     """Classe para tradução usando a API do Google Translate"""
     
-    BASE_URL = "https://translate.googleapis.com/translate_a/single"
+    BASE_URL = TRANSLATE_BASE_URL
     
-    def __init__(self):
+    def __init__(self, cache=None, use_cache=True, base_url=None, max_workers=TRANSLATE_WORKERS,
+                 rate_limiter=None, timeout=30):
+        """
+        Args:
+            cache: TranslationCache usado (default: cache compartilhado em data/cache/translations)
+            use_cache: False desativa a memória de traduções
+            base_url: Endpoint da API (default: TRANSLATE_BASE_URL)
+            max_workers: Número máximo de requisições simultâneas
+            rate_limiter: AdaptiveRateLimiter compartilhado (default: um novo com TRANSLATE_RATE)
+            timeout: Timeout de cada requisição, em segundos
+        """
+        self.cache = None
+        if use_cache:
+            try:
+                self.cache = cache or get_translation_cache()
+            except Exception as e:
+                print(f"Aviso: cache de traduções indisponível: {e}")
+        self.base_url = base_url or self.BASE_URL
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(rate=TRANSLATE_RATE, burst=self.max_workers)
+        self.timeout = timeout
+        self.requests_made = 0
+        # Textos sendo traduzidos agora: chamadas simultâneas com o mesmo texto esperam a mesma resposta
+        self._inflight = {}
+        self._lock = threading.Lock()
         self.session = requests.Session()
         # Configurar headers para simular um navegador
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        adapter = HTTPAdapter(pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
     
-    @lru_cache(maxsize=1000)  # Cache para evitar traduções repetidas
+    def _cached(self, texts, target_lang, source_lang):
+        if self.cache is None:
+            return [None] * len(texts)
+        try:
+            return self.cache.get_many(texts, target_lang, source_lang)
+        except Exception as e:
+            print(f"Aviso: erro ao ler o cache de traduções: {e}")
+            return [None] * len(texts)
+
+    def _store(self, pairs, target_lang, source_lang):
+        if self.cache is None or not pairs:
+            return
+        try:
+            self.cache.put_many(pairs, target_lang, source_lang)
+        except Exception as e:
+            print(f"Aviso: erro ao salvar no cache de traduções: {e}")
+
     def translate(self, text: str, target_lang: str, source_lang: Optional[str] = 'auto') -> str:
         """
         Traduz o texto usando a API do Google Translate
@@ -28,54 +105,149 @@ class GoogleTranslator:
         Returns:
             str: Texto traduzido
         """
-        try:
-            # Parâmetros da requisição
-            params = {
-                'client': 'gtx',
-                'sl': source_lang,
-                'tl': target_lang,
-                'dt': 't',
-                'q': text
-            }
-            
-            # Fazer a requisição
-            response = self.session.get(self.BASE_URL, params=params)
+        return self.translate_batch([text], target_lang, source_lang)[0]
+
+    def _request(self, text: str, target_lang: str, source_lang: Optional[str] = 'auto') -> str:
+        """
+        Uma chamada à API, passando pelo limitador de taxa. Respostas 429/5xx e
+        falhas de conexão reduzem a taxa e são repetidas até MAX_RETRIES vezes;
+        outros erros são propagados.
+        """
+        # Parâmetros da requisição
+        params = {
+            'client': 'gtx',
+            'sl': source_lang,
+            'tl': target_lang,
+            'dt': 't'
+        }
+
+        for attempt in range(MAX_RETRIES + 1):
+            self.rate_limiter.acquire()
+            with self._lock:
+                self.requests_made += 1
+            try:
+                # Texto no corpo: lotes grandes não cabem na URL
+                response = self.session.post(self.base_url, params=params, data={'q': text}, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == MAX_RETRIES:
+                    raise
+                self.rate_limiter.on_throttle()
+                continue
+            if response.status_code in RETRY_STATUS and attempt < MAX_RETRIES:
+                self.rate_limiter.on_throttle(_retry_after(response))
+                continue
             response.raise_for_status()
-            
-            # Parse da resposta
-            result = response.json()
-            
-            if not result or not result[0]:
-                return text
-            
-            # Juntar todas as partes traduzidas
-            translated_text = ''.join(part[0] for part in result[0] if part[0])
-            
-            # Aguardar um pouco para não sobrecarregar a API
-            time.sleep(0.5)
-            
-            return translated_text
-            
-        except Exception as e:
-            print(f"Erro na tradução: {str(e)}")
-            return text  # Retorna texto original em caso de erro
+            self.rate_limiter.on_success()
+            break
+
+        # Parse da resposta
+        result = response.json()
+
+        if not result or not result[0]:
+            return text
+
+        # Juntar todas as partes traduzidas
+        return ''.join(part[0] for part in result[0] if part[0])
     
-    def translate_batch(self, texts: list[str], target_lang: str, source_lang: Optional[str] = 'auto') -> list[str]:
+    def translate_batch(self, texts: list[str], target_lang: str, source_lang: Optional[str] = 'auto',
+                        on_progress=None) -> list[str]:
         """
-        Traduz uma lista de textos em lote
+        Traduz uma lista de textos em lote. Os textos fora do cache são
+        deduplicados, unidos em requisições de até MAX_BATCH_CHARS caracteres
+        e enviados em paralelo (até max_workers). Um texto que outra chamada
+        já está traduzindo não é enviado de novo: espera a mesma resposta.
         
         Args:
             texts: Lista de textos para traduzir
             target_lang: Código do idioma alvo
             source_lang: Código do idioma fonte (default: 'auto')
+            on_progress: Chamado com (concluídos, total) de textos únicos a cada requisição
             
         Returns:
-            list[str]: Lista de textos traduzidos
+            list[str]: Lista de textos traduzidos (o original onde a tradução falhou)
         """
-        translated = []
-        for text in texts:
-            translated_text = self.translate(text, target_lang, source_lang)
-            translated.append(translated_text)
-            # Pequena pausa entre traduções para não sobrecarregar
-            time.sleep(0.2)
-        return translated
\ No newline at end of file
+        # Só os textos que não estão na memória de traduções vão para a API
+        translated = self._cached(texts, target_lang, source_lang)
+        keys = [(source_lang, target_lang, normalize_text(text)) for text in texts]
+        owned, waiting = {}, {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                key = keys[i]
+                if translated[i] is not None or not key[2] or key in owned or key in waiting:
+                    continue
+                if key in self._inflight:
+                    waiting[key] = self._inflight[key]
+                else:
+                    self._inflight[key] = Future()
+                    owned[key] = text
+
+        results = {}
+        requests_before = self.requests_made
+        try:
+            results.update(self._translate_owned(owned, target_lang, source_lang, on_progress))
+        finally:
+            # Liberar quem espera por estes textos, mesmo se algo falhou
+            with self._lock:
+                for key in owned:
+                    self._inflight.pop(key).set_result(results.get(key))
+        for key, future in waiting.items():
+            results[key] = future.result()
+
+        for i, text in enumerate(texts):
+            if translated[i] is None:
+                translated[i] = results.get(keys[i]) or text
+
+        if len(owned) > 1:
+            print(f"{len(owned)} textos traduzidos em {self.requests_made - requests_before} requisições "
+                  f"(taxa atual {self.rate_limiter.rate:.1f}/s)")
+        return translated
+
+    def _translate_owned(self, owned, target_lang, source_lang, on_progress=None):
+        """Traduz os textos únicos de owned (chave -> texto) em lotes paralelos"""
+        if not owned:
+            return {}
+        keys = list(owned)
+        batches = pack_batches([owned[key] for key in keys])
+        results = {}
+        done = 0
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as pool:
+            futures = {
+                pool.submit(self._translate_packed, [owned[keys[j]] for j in batch], target_lang, source_lang): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                new_pairs = []
+                for j, result in zip(batch, future.result()):
+                    results[keys[j]] = result
+                    if result is not None:
+                        new_pairs.append((owned[keys[j]], result))
+                self._store(new_pairs, target_lang, source_lang)
+                done += len(batch)
+                if on_progress:
+                    on_progress(done, len(keys))
+        return results
+
+    def _translate_packed(self, texts, target_lang, source_lang):
+        """
+        Traduz texts em uma requisição e separa a resposta. Se a quantidade de
+        linhas não bate, divide o lote ao meio e tenta de novo. Retorna a lista
+        de traduções (None onde falhou).
+        """
+        # Um texto sozinho vai como está (preserva as quebras de linha)
+        payload = texts[0] if len(texts) == 1 else join_batch(texts)
+        try:
+            response = self._request(payload, target_lang, source_lang)
+        except Exception as e:
+            print(f"Erro na tradução em lote: {str(e)}")
+            return [None] * len(texts)
+
+        if len(texts) == 1:
+            return [response.strip()]
+        parts = split_batch(response, len(texts))
+        if parts is not None:
+            return parts
+
+        middle = len(texts) // 2
+        return (self._translate_packed(texts[:middle], target_lang, source_lang) +
+                self._translate_packed(texts[middle:], target_lang, source_lang))
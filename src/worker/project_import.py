@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+# Modos de importação do vídeo original para a pasta do projeto:
+#   auto      - tenta reflink, depois hardlink e por fim referência (nunca copia)
+#   reflink   - cópia copy-on-write (Btrfs/XFS/APFS/ReFS), independente do original
+#   hardlink  - mesmo arquivo em disco com outro nome (mesmo volume)
+#   reference - apenas registra caminho + impressão digital em source.json
+#   copy      - cópia completa (comportamento antigo)
+IMPORT_MODES = ('auto', 'reflink', 'hardlink', 'reference', 'copy')
+DEFAULT_IMPORT_MODE = os.getenv('PROJECT_IMPORT_MODE', 'auto')
+
+REFERENCE_FILE = 'source.json'
+FINGERPRINT_SAMPLE = 1024 * 1024  # Bytes lidos em cada ponto amostrado
+FINGERPRINT_POINTS = 8
+FICLONE = 0x40049409  # ioctl de reflink do Linux
+
+def file_fingerprint(path, sample_size=FINGERPRINT_SAMPLE, points=FINGERPRINT_POINTS):
+    """
+    Impressão digital do conteúdo em tempo constante: blake2b do tamanho e de
+    trechos de sample_size bytes em pontos igualmente espaçados do arquivo
+    (incluindo início e fim). Arquivos pequenos são lidos por inteiro.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+
+    with open(path, 'rb') as f:
+        if size <= sample_size * points:
+            for block in iter(lambda: f.read(sample_size), b''):
+                digest.update(block)
+        else:
+            step = (size - sample_size) // (points - 1)
+            for i in range(points):
+                f.seek(i * step)
+                digest.update(f.read(sample_size))
+
+    return f"blake2b:{digest.hexdigest()}"
+
+def _reflink(source, target):
+    """Cria uma cópia copy-on-write; levanta OSError se o sistema não suportar"""
+    if sys.platform.startswith('linux'):
+        import fcntl
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            except OSError:
+                dst.close()
+                os.unlink(target)
+                raise
+    elif sys.platform == 'darwin':
+        result = subprocess.run(['cp', '-c', str(source), str(target)], capture_output=True)
+        if result.returncode != 0:
+            raise OSError(result.stderr.decode('utf-8', errors='replace').strip() or "cp -c falhou")
+    else:
+        raise OSError(f"Reflink não suportado em {sys.platform}")
+    shutil.copystat(source, target)
+
+def _write_reference(source, original_dir):
+    stat = source.stat()
+    reference = {
+        'path': str(source),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'fingerprint': file_fingerprint(source)
+    }
+    with open(original_dir / REFERENCE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(reference, f, ensure_ascii=False, indent=2)
+
+def import_source_video(video_file, original_dir, mode=None):
+    """
+    Importa o vídeo original para original_dir sem copiar os dados sempre que
+    possível. Retorna um dicionário com 'path' (caminho a ser usado pelo
+    projeto) e 'mode' (modo efetivamente usado).
+
+    No modo referência o vídeo continua no lugar de origem e 'path' aponta
+    para ele; source.json guarda o caminho e a impressão digital, verificados
+    por resolve_source_video ao reabrir o projeto.
+    """
+    mode = mode or DEFAULT_IMPORT_MODE
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Modo de importação inválido: {mode}")
+
+    source = Path(video_file).absolute()
+    original_dir = Path(original_dir)
+    original_dir.mkdir(parents=True, exist_ok=True)
+    target = original_dir / source.name
+
+    if target.exists():
+        return {'path': str(target), 'mode': 'existing'}
+
+    attempts = {
+        'auto': ['reflink', 'hardlink', 'reference'],
+        'reflink': ['reflink', 'copy'],
+        'hardlink': ['hardlink', 'copy'],
+        'reference': ['reference'],
+        'copy': ['copy']
+    }[mode]
+
+    for attempt in attempts:
+        try:
+            if attempt == 'reflink':
+                _reflink(source, target)
+            elif attempt == 'hardlink':
+                os.link(source, target)
+            elif attempt == 'reference':
+                _write_reference(source, original_dir)
+                print(f"Vídeo original referenciado em: {source}")
+                return {'path': str(source), 'mode': attempt}
+            else:
+                shutil.copy2(source, target)
+            print(f"Vídeo original importado ({attempt}): {target}")
+            return {'path': str(target), 'mode': attempt}
+        except OSError as e:
+            print(f"Importação por {attempt} indisponível: {str(e)}")
+
+    raise OSError(f"Não foi possível importar o vídeo: {source}")
+
+def resolve_source_video(original_dir, verify=True):
+    """
+    Retorna o caminho do vídeo original de um projeto: o arquivo dentro de
+    original_dir ou, no modo referência, o caminho salvo em source.json.
+    Com verify, confere tamanho e impressão digital do arquivo referenciado.
+    Retorna None se não houver vídeo.
+    """
+    original_dir = Path(original_dir)
+    video_files = [f for f in original_dir.glob('*.*') if f.suffix.lower() in
+                   ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv']]
+    if video_files:
+        return video_files[0]
+
+    reference_path = original_dir / REFERENCE_FILE
+    if not reference_path.exists():
+        return None
+
+    with open(reference_path, 'r', encoding='utf-8') as f:
+        reference = json.load(f)
+
+    source = Path(reference['path'])
+    if not source.exists():
+        raise FileNotFoundError(f"Vídeo referenciado não encontrado: {source}")
+
+    if verify:
+        stat = source.stat()
+        # mtime e tamanho iguais dispensam reler as amostras do arquivo
+        unchanged = stat.st_size == reference['size'] and stat.st_mtime == reference['mtime']
+        if not unchanged and (stat.st_size != reference['size'] or
+                              file_fingerprint(source) != reference['fingerprint']):
+            raise ValueError(f"O vídeo referenciado foi alterado: {source}")
+
+    return source
@@ -10,6 +10,7 @@ class SubtitleExtractionWorker(QThread):
     finished = pyqtSignal(str)  # Emite o caminho do arquivo de legendas
     error = pyqtSignal(str)
     logMessage = pyqtSignal(str)  # Novo sinal para logs
+    partialSubtitles = pyqtSignal(list)  # Legendas já decodificadas durante o processamento
 
     def __init__(self, video_path: str, output_dir: Path, target_language: str = "pt-BR"):
         super().__init__()
@@ -37,9 +38,12 @@ class SubtitleExtractionWorker(QThread):
             self.statusChanged.emit("Extraindo áudio do vídeo...")
             
             # Extrair legendas
+            # O progresso do servidor ocupa a faixa de 10 a 95%
             subtitles = self.extractor.extract_subtitles(
                 self.video_path,
-                self.output_dir
+                self.output_dir,
+                on_progress=lambda progress: self.progressChanged.emit(int(10 + 0.85 * progress)),
+                on_partial=self.partialSubtitles.emit
             )
             
             if not subtitles:
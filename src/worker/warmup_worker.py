@@ -0,0 +1,84 @@
+import threading
+import time
+import traceback
+from PyQt5.QtCore import QThread, pyqtSignal
+
+class WarmupWorker(QThread):
+    """
+    Pré-carrega em segundo plano, depois que a janela aparece, os modelos
+    usados pelo processamento: baixa/carrega o Silero VAD, carrega o Whisper
+    no ModelManager e roda uma inferência curta em silêncio para alocar os
+    buffers. Um processamento iniciado antes do fim não carrega o modelo de
+    novo: o ModelManager espera pelo carregamento em andamento.
+    """
+    status = pyqtSignal(str)
+    finished = pyqtSignal(dict)  # Tempo de cada etapa, em segundos
+
+    _ready = threading.Event()
+    _started = threading.Event()
+
+    @classmethod
+    def is_ready(cls):
+        return cls._ready.is_set()
+
+    @classmethod
+    def is_running(cls):
+        return cls._started.is_set() and not cls._ready.is_set()
+
+    @classmethod
+    def wait_ready(cls, timeout=None):
+        """Espera o pré-carregamento terminar; retorna False se ainda não terminou"""
+        return cls._ready.wait(timeout)
+
+    def run(self):
+        WarmupWorker._started.set()
+        timings = {}
+        try:
+            self._stage("Preparando detecção de fala (VAD)...", timings, 'vad', self.warm_vad)
+            self._stage("Carregando modelo de transcrição em segundo plano...", timings, 'whisper', self.warm_whisper)
+            self.status.emit(f"Modelos prontos ({sum(timings.values()):.1f}s)")
+        except Exception as e:
+            print(f"Erro no pré-carregamento: {str(e)}")
+            print(traceback.format_exc())
+            self.status.emit(f"Pré-carregamento falhou, os modelos serão carregados no primeiro uso: {str(e)}")
+        finally:
+            WarmupWorker._ready.set()
+            self.finished.emit(timings)
+
+    def _stage(self, message, timings, name, func):
+        self.status.emit(message)
+        start = time.perf_counter()
+        func()
+        timings[name] = time.perf_counter() - start
+        print(f"Pré-carregamento '{name}': {timings[name]:.1f}s")
+
+    def warm_vad(self):
+        import numpy as np
+        from src.audio_processing.vad import detect_speech_regions, SAMPLE_RATE
+        detect_speech_regions(np.zeros(SAMPLE_RATE, dtype=np.float32))
+
+    def warm_whisper(self):
+        import numpy as np
+        import torch
+        import whisper
+        from src.audio_processing.transcribe import MODEL_SIZE, TRANSCRIBE_WORKERS
+        from src.models.models_handler import load_whisper_model, ModelManager
+
+        if TRANSCRIBE_WORKERS > 1 and not torch.cuda.is_available():
+            # No modo paralelo cada processo do pool carrega o próprio modelo
+            return
+
+        model = load_whisper_model(MODEL_SIZE, reserve=True)
+        try:
+            with torch.no_grad():
+                audio = whisper.pad_or_trim(np.zeros(whisper.audio.SAMPLE_RATE, dtype=np.float32))
+                mel = whisper.log_mel_spectrogram(audio, model.dims.n_mels).to(model.device)
+                model.detect_language(mel)
+                whisper.decode(model, mel, whisper.DecodingOptions(
+                    language="en",
+                    without_timestamps=True,
+                    sample_len=4,
+                    fp16=False
+                ))
+        finally:
+            ModelManager.release(model)
@@ -1,27 +1,38 @@
 from PyQt5.QtCore import QThread, pyqtSignal
+import gc
+import sys
 import traceback
-import torch  # Adicionando importação do torch
-from src.audio_processing.audio_processing import extract_audio
-from src.audio_processing.transcribe import transcribe_audio
+from src.worker.project_import import import_source_video
+from src.worker.warmup_worker import WarmupWorker
 import os
 import uuid
 from pathlib import Path
 import shutil
 import subprocess  # Add subprocess import
 
+def free_memory():
+    """Coleta de lixo e, se o torch já foi carregado, libera o cache da GPU"""
+    gc.collect()
+    torch = sys.modules.get('torch')  # Não importar o torch só para isso
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
 class AudioProcessingWorker(QThread):
     progress = pyqtSignal(int)
     finished = pyqtSignal(dict)  # Mudando para emitir um dicionário com os resultados
     error = pyqtSignal(str)
     status = pyqtSignal(str)
 
-    def __init__(self, video_path, target_language):
+    def __init__(self, video_path, target_language, parallel_workers=None):
         super().__init__()
         self.video_path = video_path
         self.target_language = target_language
         self.transcription_text = ""
+        self.original_video = None  # Caminho do vídeo original usado pelo projeto
+        self.audio = None  # Áudio decodificado (float32, 16 kHz) reutilizado na transcrição
         # Ajustando chunk_size para 2 minutos para combinar com a transcrição
         self.chunk_size = 120
+        self.parallel_workers = parallel_workers  # None = TRANSCRIBE_WORKERS (.env)
 
     def run(self):
         try:
@@ -46,6 +57,9 @@ class AudioProcessingWorker(QThread):
 
             # Etapa 4: Verificar modelo
             self.emit_status("Verificando modelo de transcrição...", 35)
+            if WarmupWorker.is_running():
+                # O carregamento em segundo plano continua; a transcrição espera por ele
+                self.emit_status("Modelo ainda sendo carregado em segundo plano...", 35)
             print("\nVerificando cache do Whisper...")
             cache_dir = Path.home() / ".cache" / "whisper"
             if cache_dir.exists():
@@ -57,16 +71,18 @@ class AudioProcessingWorker(QThread):
             self.emit_status("Iniciando transcrição do áudio...", 45)
             
             # Forçar coleta de lixo antes da transcrição
-            import gc
-            gc.collect()
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-            
+            free_memory()
+
+            # Importado no primeiro uso: torch e whisper não atrasam a abertura da janela
+            from src.audio_processing.transcribe import transcribe_audio
             text, error = transcribe_audio(
                 str(audio_path),
+                audio=self.audio,
                 target_language=self.target_language,
                 transcripts_dir=str(transcription_dir),
-                chunk_size=self.chunk_size
+                chunk_size=self.chunk_size,
+                parallel_workers=self.parallel_workers,
+                on_progress=self.on_chunk_progress
             )
 
             if error:
@@ -82,7 +98,7 @@ class AudioProcessingWorker(QThread):
             # Preparar resultado com informações do projeto
             result = {
                 'project_id': project_id,
-                'original_video': str(project_dir / "original" / Path(self.video_path).name),
+                'original_video': self.original_video,
                 'audio_file': str(audio_path),
                 'segments_dir': str(project_dir / "segments"),
                 'transcripts_dir': str(transcription_dir),
@@ -91,9 +107,8 @@ class AudioProcessingWorker(QThread):
             }
             
             # Forçar limpeza final
-            gc.collect()
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+            self.audio = None
+            free_memory()
             
             self.finished.emit(result)
 
@@ -105,10 +120,12 @@ class AudioProcessingWorker(QThread):
             self.error.emit(error_msg)
             
             # Garantir limpeza mesmo em caso de erro
-            gc.collect()
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+            free_memory()
     
+    def on_chunk_progress(self, done, total):
+        """Progresso da transcrição por chunk (faixa de 45% a 95%)"""
+        self.emit_status(f"Transcrevendo chunk {done}/{total}...", 45 + int(50 * done / total))
+
     def emit_status(self, message, progress):
         """Emite status e progresso juntos"""
         print(f"\n[{progress}%] {message}")
@@ -139,10 +156,8 @@ class AudioProcessingWorker(QThread):
         (project_dir / "segments").mkdir(exist_ok=True)
         (project_dir / "transcripts").mkdir(exist_ok=True)
         
-        # Copiar arquivo original
-        original_dir = project_dir / "original"
-        video_filename = Path(self.video_path).name
-        shutil.copy2(self.video_path, original_dir / video_filename)
+        # Importar arquivo original sem copiar os dados quando possível
+        self.original_video = import_source_video(self.video_path, project_dir / "original")['path']
         
         return project_dir
 
@@ -155,27 +170,13 @@ class AudioProcessingWorker(QThread):
             print(f"\nExtraindo áudio para: {output_path}")
             print(f"Vídeo fonte: {self.video_path}")
             
-            # Use subprocess to call ffmpeg directly
-            command = [
-                'ffmpeg', '-i', str(self.video_path),
-                '-vn',  # No video
-                '-acodec', 'pcm_s16le',  # WAV format
-                '-ac', '1',  # Mono
-                '-ar', '16000',  # 16kHz
-                '-y',  # Overwrite output
-                str(output_path)
-            ]
-            
-            # Execute ffmpeg command
-            result = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
-            
-            if result.returncode != 0:
-                print(f"Erro do FFmpeg: {result.stderr}")
+            # Decodificar uma única vez pelo pipe do ffmpeg: as amostras ficam em
+            # memória para a transcrição e o WAV é gravado a partir do mesmo PCM
+            try:
+                from src.audio_processing.audio_stream import load_audio_stream
+                self.audio = load_audio_stream(self.video_path, wav_path=output_path)
+            except Exception as e:
+                print(f"Erro do FFmpeg: {str(e)}")
                 return None
             
             # Verify if file was created
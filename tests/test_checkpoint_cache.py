@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.checkpoint_cache import load_mmap_whisper
+
+DIMS = dict(n_mels=80, n_audio_ctx=16, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+            n_vocab=64, n_text_ctx=8, n_text_state=32, n_text_head=2, n_text_layer=1)
+
+class TestCheckpointCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source = Path(self.tmp_dir.name) / "tiny-test.pt"
+        self.reference = Whisper(ModelDimensions(**DIMS)).eval()
+        torch.save({'dims': DIMS, 'model_state_dict': self.reference.state_dict()}, self.source)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def forward(self, model):
+        mel = torch.randn(1, DIMS['n_mels'], DIMS['n_audio_ctx'] * 2, generator=torch.Generator().manual_seed(0))
+        tokens = torch.tensor([[1, 2, 3]])
+        with torch.no_grad():
+            return model(mel, tokens)
+
+    def test_forward_matches_original(self):
+        model = load_mmap_whisper(str(self.source), 'cpu', self.tmp_dir.name)
+        self.assertTrue(all(p.dtype == torch.float32 for p in model.parameters()))
+        torch.testing.assert_close(self.forward(model), self.forward(self.reference))
+
+    def test_half_checkpoint_keeps_layer_norm_in_float32(self):
+        model = load_mmap_whisper(str(self.source), 'cpu', self.tmp_dir.name, dtype=torch.float16)
+        layer_norms = [m for m in model.modules() if isinstance(m, torch.nn.LayerNorm)]
+        self.assertTrue(layer_norms)
+        self.assertTrue(all(m.weight.dtype == torch.float32 for m in layer_norms))
+        self.assertEqual(self.forward(model).shape, (1, 3, DIMS['n_vocab']))
+
+if __name__ == '__main__':
+    unittest.main()
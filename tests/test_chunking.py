@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio_processing.chunking import plan_chunks, split_audio, merge_chunk_segments, ChunkMerger, SAMPLE_RATE
+
+class TestChunking(unittest.TestCase):
+    def test_chunks_are_views_with_overlap(self):
+        audio = np.random.default_rng(0).standard_normal(SAMPLE_RATE * 100).astype(np.float32)
+        chunks, offsets = split_audio(audio, chunk_seconds=30, overlap_seconds=2.0)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertTrue(np.shares_memory(chunk, audio))
+        # Cada chunk começa antes do fim do anterior (sobreposição de ~2 s)
+        for (chunk, offset), next_offset in zip(zip(chunks, offsets), offsets[1:]):
+            self.assertAlmostEqual(offset + len(chunk) / SAMPLE_RATE - next_offset, 2.0, places=2)
+        self.assertEqual(offsets[0], 0)
+        self.assertAlmostEqual(offsets[-1] + len(chunks[-1]) / SAMPLE_RATE, 100)
+
+    def test_cut_at_vad_silence_without_overlap(self):
+        audio = np.zeros(SAMPLE_RATE * 70, dtype=np.float32)
+        regions = [{'start': 0.0, 'end': 27.0}, {'start': 33.0, 'end': 70.0}]
+        bounds = plan_chunks(audio, chunk_seconds=30, speech_regions=regions)
+        self.assertEqual(bounds[0], (0, SAMPLE_RATE * 30))
+        self.assertEqual(bounds[1][0], SAMPLE_RATE * 30)
+
+    def test_merge_drops_duplicates_in_overlap(self):
+        chunk_bounds = [(0.0, 31.0), (29.0, 60.0)]
+        first = [
+            {'start': 0.0, 'end': 10.0, 'text': 'Primeira frase.'},
+            {'start': 28.0, 'end': 30.5, 'text': 'Frase da fronteira'},
+        ]
+        second = [
+            {'start': 28.2, 'end': 30.4, 'text': 'frase da fronteira.'},
+            {'start': 31.0, 'end': 35.0, 'text': 'Depois.'},
+        ]
+        merged = merge_chunk_segments([first, second], chunk_bounds)
+        texts = [seg['text'] for kept in merged for seg in kept]
+        self.assertEqual(texts, ['Primeira frase.', 'Frase da fronteira', 'Depois.'])
+
+    def test_incremental_merge_waits_for_previous_chunks(self):
+        chunk_bounds = [(0.0, 31.0), (29.0, 60.0)]
+        first = [{'start': 28.0, 'end': 30.5, 'text': 'Frase da fronteira'}]
+        second = [{'start': 28.2, 'end': 30.4, 'text': 'frase da fronteira.'}]
+        merger = ChunkMerger(chunk_bounds)
+        self.assertEqual(merger.add(1, second), [])
+        self.assertEqual(merger.add(0, first), [first, []])
+        self.assertEqual(merger.merged, merge_chunk_segments([first, second], chunk_bounds))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.translation.rate_limiter import AdaptiveRateLimiter
+
+class FakeTranslateHandler(BaseHTTPRequestHandler):
+    """Imita o endpoint gtx: devolve cada linha de q em maiúsculas"""
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8')
+        text = parse_qs(body)['q'][0]
+        with server.lock:
+            server.requests.append(text)
+            throttle = server.throttle_next > 0
+            server.throttle_next -= 1
+        time.sleep(server.delay)
+
+        if throttle:
+            self.send_response(429)
+            self.send_header('Retry-After', '0.05')
+            self.end_headers()
+            return
+
+        lines = text.split("\n")
+        result = [[[line.upper() + ("\n" if i < len(lines) - 1 else ""), line] for i, line in enumerate(lines)]]
+        data = json.dumps(result).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+class TestRateLimiter(unittest.TestCase):
+    def test_throttle_halves_rate_and_success_raises_it(self):
+        limiter = AdaptiveRateLimiter(rate=8, min_rate=1, max_rate=10, increase=1)
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 4)
+        limiter.on_success()
+        self.assertEqual(limiter.rate, 5)
+
+    def test_acquire_respects_rate(self):
+        limiter = AdaptiveRateLimiter(rate=20, burst=1)
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+class TestConcurrentTranslator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from src.translation.translator import GoogleTranslator
+        cls.GoogleTranslator = GoogleTranslator
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeTranslateHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.throttle_next = 0
+        self.server.delay = 0.0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.translator = self.GoogleTranslator(
+            use_cache=False,
+            base_url=f"http://127.0.0.1:{self.server.server_address[1]}/translate",
+            max_workers=4,
+            rate_limiter=AdaptiveRateLimiter(rate=100, burst=4)
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_batch_packs_and_keeps_order(self):
+        texts = [f"segment {i} " + "x" * 90 for i in range(200)]
+        result = self.translator.translate_batch(texts, 'pt', 'en')
+        self.assertEqual(result, [text.upper() for text in texts])
+        self.assertLess(len(self.server.requests), 20)
+
+    def test_identical_texts_are_coalesced(self):
+        self.server.delay = 0.2
+        results = []
+
+        def worker():
+            results.append(self.translator.translate_batch(["hello", "hello ", "world"], 'pt', 'en'))
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [["HELLO", "HELLO", "WORLD"]] * 3)
+        sent = [line for request in self.server.requests for line in request.split("\n")]
+        self.assertEqual(sorted(sent), ["hello", "world"])
+
+    def test_retries_after_429_and_slows_down(self):
+        self.server.throttle_next = 2
+        self.assertEqual(self.translator.translate("bom dia", 'en', 'pt'), "BOM DIA")
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.translator.rate_limiter.throttled, 2)
+        self.assertLess(self.translator.rate_limiter.rate, 100)
+
+if __name__ == '__main__':
+    unittest.main()
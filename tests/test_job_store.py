@@ -0,0 +1,113 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar diretório da API ao path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+
+from job_store import JobStore, LeaseKeeper, STATUS_QUEUED, STATUS_PROCESSING, STATUS_COMPLETED, STATUS_ERROR
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / "jobs.db"
+        self.store = JobStore(self.db_path, lease_seconds=60, max_attempts=2)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_claim_is_exclusive(self):
+        """Uma tarefa reservada não pode ser reservada por outro worker"""
+        self.store.create("t1", {"file_path": "a.wav"})
+        other = JobStore(self.db_path)
+
+        job = self.store.claim("w1")
+        self.assertEqual(job["id"], "t1")
+        self.assertEqual(job["status"], STATUS_PROCESSING)
+        self.assertEqual(job["attempts"], 1)
+        self.assertIsNone(other.claim("w2"))
+
+    def test_status_visible_to_other_connections(self):
+        """O estado é compartilhado entre instâncias (workers diferentes)"""
+        self.store.create("t1", {})
+        self.store.claim("w1")
+        self.store.update_progress("t1", "w1", 42)
+
+        other = JobStore(self.db_path)
+        self.assertEqual(other.get("t1")["progress"], 42)
+        self.assertTrue(self.store.complete("t1", "w1"))
+        self.assertEqual(other.get("t1")["status"], STATUS_COMPLETED)
+
+    def test_expired_lease_is_requeued_with_checkpoint(self):
+        """Tarefa de worker morto volta para a fila mantendo o checkpoint"""
+        self.store.lease_seconds = 0.01
+        self.store.create("t1", {})
+        self.store.claim("w1")
+        self.store.save_checkpoint("t1", "w1", {"stage": "transcribed"})
+        time.sleep(0.05)
+
+        job = self.store.claim("w2")
+        self.assertEqual(job["id"], "t1")
+        self.assertEqual(job["lease_owner"], "w2")
+        self.assertEqual(job["attempts"], 2)
+        self.assertEqual(job["checkpoint"], {"stage": "transcribed"})
+        # O worker antigo não pode mais alterar a tarefa
+        self.assertFalse(self.store.complete("t1", "w1"))
+
+    def test_attempts_exhausted(self):
+        """Após o máximo de tentativas a tarefa termina em erro"""
+        self.store.create("t1", {})
+        self.store.claim("w1")
+        self.store.fail("t1", "w1", "falha 1")
+        self.assertEqual(self.store.get("t1")["status"], STATUS_QUEUED)
+
+        self.store.claim("w1")
+        self.store.fail("t1", "w1", "falha 2")
+        job = self.store.get("t1")
+        self.assertEqual(job["status"], STATUS_ERROR)
+        self.assertEqual(job["error"], "falha 2")
+
+    def test_revision_tracks_visible_changes(self):
+        """Progresso e estado mudam a revisão; heartbeat e checkpoint não"""
+        self.store.create("t1", {})
+        self.store.claim("w1")
+        revision = self.store.get("t1")["revision"]
+        self.assertIsNone(self.store.get_if_changed("t1", revision))
+
+        self.store.heartbeat("t1", "w1")
+        self.store.save_checkpoint("t1", "w1", {"stage": "transcribed"})
+        self.assertIsNone(self.store.get_if_changed("t1", revision))
+
+        self.store.update_progress("t1", "w1", 50)
+        job = self.store.get_if_changed("t1", revision)
+        self.assertEqual(job["progress"], 50)
+        self.assertGreater(job["revision"], revision)
+        self.assertEqual(self.store.get_if_changed("missing", 0)["status"], "not_found")
+
+    def test_lease_keeper_survives_heartbeat_error(self):
+        """Um erro do banco ao renovar não encerra a renovação do lease"""
+        self.store.create("t1", {})
+        self.store.claim("w1")
+        calls = []
+        heartbeat = self.store.heartbeat
+
+        def flaky_heartbeat(task_id, worker_id):
+            calls.append(task_id)
+            if len(calls) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            return heartbeat(task_id, worker_id)
+
+        self.store.heartbeat = flaky_heartbeat
+        deadline = time.monotonic() + 5
+        with LeaseKeeper(self.store, "t1", "w1", interval=0.01) as keeper:
+            while len(calls) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertGreaterEqual(len(calls), 3)
+        self.assertFalse(keeper.lost.is_set())
+
+if __name__ == '__main__':
+    unittest.main()
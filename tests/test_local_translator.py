@@ -0,0 +1,41 @@
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache.translation_cache import TranslationCache
+from src.translation.local_translator import LocalTranslator, split_units, join_units
+from src.translation.translator import create_translator
+
+class TestLocalTranslator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = TranslationCache(Path(self.tmp.name) / 'translations.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_units_round_trip(self):
+        text = "Primeira frase. Segunda frase!\n\nOutra linha"
+        lines = split_units(text)
+        self.assertEqual(lines, [["Primeira frase.", "Segunda frase!"], [], ["Outra linha"]])
+        self.assertEqual(join_units(lines), text)
+
+    def test_factory_selects_backend(self):
+        translator = create_translator('local', cache=self.cache)
+        self.assertIsInstance(translator, LocalTranslator)
+        self.assertEqual(translator.model_name('en', 'pt'), 'Helsinki-NLP/opus-mt-en-pt')
+        with self.assertRaises(ValueError):
+            create_translator('desconhecido')
+
+    def test_cache_hits_do_not_load_model(self):
+        self.cache.put("Good morning", "Bom dia", "pt", "en")
+        translator = LocalTranslator(cache=self.cache, model='modelo-inexistente')
+        self.assertEqual(translator.translate_batch(["Good morning", ""], "pt", "en"), ["Bom dia", ""])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+import torch
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models import models_handler
+from src.models.models_handler import ModelManager
+
+def fake_load(name, device, cpu_precision):
+    # 1000 floats = 4000 bytes por modelo
+    return torch.nn.Linear(999, 1)
+
+class TestModelManager(unittest.TestCase):
+    def setUp(self):
+        ModelManager._entries.clear()
+        ModelManager._known_sizes.clear()
+        for key in ModelManager._metrics:
+            ModelManager._metrics[key] = 0
+        ModelManager._budgets['cpu'] = 10000
+        patcher = patch.object(models_handler, '_load_uncached', side_effect=fake_load)
+        self.load = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_target_language_does_not_reload(self):
+        first = ModelManager.get_model('small', 'cpu', target_language='pt')
+        second = ModelManager.get_model('small', 'cpu', target_language='en')
+        self.assertIs(first, second)
+        self.assertEqual(self.load.call_count, 1)
+        self.assertEqual((ModelManager._metrics['hits'], ModelManager._metrics['misses']), (1, 1))
+
+    def test_lru_eviction_respects_budget(self):
+        ModelManager.get_model('a', 'cpu')
+        ModelManager.get_model('b', 'cpu')
+        ModelManager.get_model('a', 'cpu')  # 'b' passa a ser o menos recente
+        ModelManager.get_model('c', 'cpu')
+        keys = [e.key.split('|')[0] for e in ModelManager._entries.values()]
+        self.assertEqual(keys, ['a', 'c'])
+        self.assertEqual(ModelManager._metrics['evictions'], 1)
+
+    def test_model_in_use_is_not_evicted(self):
+        with ModelManager.use('a', 'cpu') as model:
+            ModelManager.get_model('b', 'cpu')
+            ModelManager.get_model('c', 'cpu')
+            self.assertIs(ModelManager.get_model('a', 'cpu'), model)
+        self.assertEqual(self.load.call_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
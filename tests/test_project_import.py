@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.worker.project_import import import_source_video, resolve_source_video, file_fingerprint
+
+class TestProjectImport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.video = self.root / 'video.mp4'
+        self.video.write_bytes(os.urandom(64 * 1024))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_auto_does_not_copy(self):
+        """No modo auto o vídeo é ligado ou referenciado, nunca copiado"""
+        result = import_source_video(self.video, self.root / 'p1' / 'original', mode='auto')
+        self.assertIn(result['mode'], ('reflink', 'hardlink', 'reference'))
+        self.assertEqual(Path(result['path']).read_bytes(), self.video.read_bytes())
+
+    def test_hardlink_shares_inode(self):
+        result = import_source_video(self.video, self.root / 'p2' / 'original', mode='hardlink')
+        if result['mode'] == 'hardlink':
+            self.assertEqual(os.stat(result['path']).st_ino, self.video.stat().st_ino)
+
+    def test_reference_resolves_and_detects_changes(self):
+        original_dir = self.root / 'p3' / 'original'
+        result = import_source_video(self.video, original_dir, mode='reference')
+        self.assertEqual(result['mode'], 'reference')
+        self.assertEqual(resolve_source_video(original_dir), self.video.absolute())
+
+        # Conteúdo diferente com outro tamanho invalida a referência
+        self.video.write_bytes(b'outro conteudo')
+        with self.assertRaises(ValueError):
+            resolve_source_video(original_dir)
+
+    def test_fingerprint_samples_large_files(self):
+        """Arquivos grandes são amostrados: a assinatura muda se uma amostra muda"""
+        big = self.root / 'big.bin'
+        big.write_bytes(bytes(8 * 1024 * 1024 + 10))
+        before = file_fingerprint(big, sample_size=1024, points=4)
+        with open(big, 'r+b') as f:
+            f.seek(0)
+            f.write(b'x')
+        self.assertNotEqual(before, file_fingerprint(big, sample_size=1024, points=4))
+
+if __name__ == '__main__':
+    unittest.main()
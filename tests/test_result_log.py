@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Adicionar diretório da API ao path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+
+from result_log import ResultLog, ResultWriter
+
+def seg(start, text):
+    return {"start": start, "end": start + 1, "text": f" {text} "}
+
+class TestResultLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log = ResultLog(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cursor_returns_only_new_records(self):
+        writer = ResultWriter(self.log, "t1")
+        writer.add_segments([seg(0, "a"), seg(1, "b")])
+        records, cursor = self.log.read("t1")
+        self.assertEqual([r["text"] for r in records], ["a", "b"])
+
+        writer.add_segments([seg(2, "c")])
+        writer.add_translations([(0, "A")])
+        records, cursor = self.log.read("t1", cursor)
+        self.assertEqual(records, [
+            {"index": 2, "timestamp": 2, "end": 3, "text": "c"},
+            {"index": 0, "translation": "A"}
+        ])
+        self.assertEqual(self.log.read("t1", cursor), ([], cursor))
+
+    def test_line_being_written_is_skipped(self):
+        self.log.append("t1", [{"index": 0, "text": "a"}])
+        with open(self.log.path("t1"), "a", encoding="utf-8") as f:
+            f.write('{"index": 1, "te')
+        records, cursor = self.log.read("t1")
+        self.assertEqual(len(records), 1)
+        self.assertEqual(cursor, 1)
+
+    def test_retry_does_not_repeat_logged_segments(self):
+        ResultWriter(self.log, "t1").add_segments([seg(0, "a"), seg(1, "b")])
+
+        retry = ResultWriter(self.log, "t1")
+        retry.add_segments([seg(0, "a"), seg(1, "b"), seg(2, "c")])
+        records, _ = self.log.read("t1")
+        self.assertEqual([r["index"] for r in records], [0, 1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
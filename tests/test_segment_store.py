@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio_processing.segment_store import save_segments, load_segments, segments_path, replace_texts
+from src.gui.transcript_text import timestamped_text, segment_texts
+
+class TestSegmentStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.segments = [
+            {'start': 0.5, 'end': 2.25, 'text': 'Olá, tudo bem?'},
+            {'start': 31.0, 'end': 33.5, 'text': 'Ação e reação'},
+        ]
+        self.words = [
+            {'start': 0.5, 'end': 1.0, 'text': 'Olá,', 'probability': 0.9, 'segment': 0},
+            {'start': 1.0, 'end': 2.25, 'text': 'tudo', 'probability': 0.8, 'segment': 0},
+            {'start': 31.0, 'end': 33.5, 'text': 'Ação', 'probability': 0.7, 'segment': 1},
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        path = save_segments(segments_path(self.tmp.name, 'full_audio'), self.segments, self.words)
+        self.assertEqual(Path(path).name, 'full_audio.segments.npz')
+
+        table = load_segments(path)
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.to_list(), self.segments)
+        self.assertEqual([w['text'] for w in table.words(0)], ['Olá,', 'tudo'])
+
+    def test_index_at(self):
+        table = load_segments(save_segments(segments_path(self.tmp.name, 'a'), self.segments))
+        self.assertEqual(table.index_at(0.1), -1)
+        self.assertEqual(table.index_at(1.0), 0)
+        self.assertEqual(table.index_at(40.0), 1)
+        self.assertFalse(table.has_words)
+
+    def test_edited_text_is_saved(self):
+        """Texto editado na interface volta para os segmentos, com os mesmos tempos"""
+        path = save_segments(segments_path(self.tmp.name, 'full_audio'), self.segments, self.words)
+        table = load_segments(path)
+        shown = timestamped_text(table.start, table.texts)
+        texts = segment_texts(shown.replace('Ação e reação', 'Ação e reação!'), len(table))
+
+        replace_texts(path, table, texts)
+        saved = load_segments(path)
+        self.assertEqual(saved.texts, ['Olá, tudo bem?', 'Ação e reação!'])
+        self.assertEqual([s['start'] for s in saved.to_list()], [0.5, 31.0])
+        self.assertEqual([w['text'] for w in saved.words(0)], ['Olá,', 'tudo'])
+        self.assertEqual(saved.words(1), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+import json
+import builtins
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.startup_profile import StartupProfiler
+
+class TestStartupProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        package = self.root / 'perfil_pkg'
+        package.mkdir()
+        (package / '__init__.py').write_text("import time\ntime.sleep(0.02)\nfrom . import filho\n")
+        (package / 'filho.py').write_text("import time\ntime.sleep(0.03)\n")
+        sys.path.insert(0, str(self.root))
+
+    def tearDown(self):
+        sys.path.remove(str(self.root))
+        for name in ('perfil_pkg', 'perfil_pkg.filho'):
+            sys.modules.pop(name, None)
+        self.tmp.cleanup()
+
+    def test_records_total_and_self_time(self):
+        profiler = StartupProfiler().install()
+        try:
+            import perfil_pkg  # noqa: F401
+        finally:
+            profiler.stop()
+
+        total, own = profiler.imports['perfil_pkg']
+        self.assertGreaterEqual(total, 0.05)
+        self.assertLess(own, total)
+        self.assertGreaterEqual(profiler.imports['perfil_pkg.filho'][0], 0.03)
+        self.assertIsNot(builtins.__import__, profiler._timed_import)
+
+    def test_report_and_save(self):
+        profiler = StartupProfiler()
+        profiler.mark("janela exibida")
+        self.assertIn("janela exibida", profiler.report())
+
+        path = profiler.save(self.root / 'startup_profile.jsonl')
+        profiler.save(path)
+        records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+        self.assertEqual(len(records), 2)
+        self.assertIn("janela exibida", records[0]['marks'])
+
+if __name__ == '__main__':
+    unittest.main()
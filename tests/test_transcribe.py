@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+from unittest import mock
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio_processing import transcribe
+from src.audio_processing.chunking import SAMPLE_RATE
+
+TIME_SCALE = 1000  # Cada amostra guarda o próprio instante (s / TIME_SCALE)
+
+class FakeModel:
+    """Whisper falso: uma frase por segundo de áudio, lida do instante gravado nas amostras"""
+    device = 'cpu'
+
+    def eval(self):
+        pass
+
+    def detect_language(self, mel):
+        return None, {'en': 1.0}
+
+    def transcribe(self, chunk, **options):
+        offset = float(chunk[0]) * TIME_SCALE
+        duration = len(chunk) / SAMPLE_RATE
+        return {"segments": [
+            {"start": k + 0.1 - offset, "end": k + 0.9 - offset, "text": f" Frase {k}."}
+            for k in range(int(offset), int(offset + duration) + 1)
+            if offset <= k + 0.5 < offset + duration
+        ]}
+
+class CountingTranslator:
+    cache = None
+
+    def __init__(self):
+        self.texts = []
+
+    def translate_batch(self, texts, target_lang, source_lang='auto', on_progress=None):
+        self.texts.extend(texts)
+        return [text.upper() for text in texts]
+
+class TestTranscribeTranslation(unittest.TestCase):
+    def test_overlap_is_translated_once(self):
+        """Com sobreposição entre chunks, cada frase vai ao tradutor uma única vez"""
+        seconds = 100
+        audio = (np.arange(SAMPLE_RATE * seconds) / SAMPLE_RATE / TIME_SCALE).astype(np.float32)
+        translator = CountingTranslator()
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(transcribe, 'check_system_resources'), \
+                mock.patch.object(transcribe, '_load_model', return_value=FakeModel()), \
+                mock.patch.object(transcribe, 'ModelManager'), \
+                mock.patch.object(transcribe, 'create_translator', return_value=translator):
+            audio_file = os.path.join(tmp, 'full_audio.wav')
+            open(audio_file, 'wb').close()
+            translated, error = transcribe.transcribe_audio(
+                audio_file, target_language='pt', audio=audio, use_vad=False, use_cache=False,
+                chunk_size=30, chunk_overlap=2.0, parallel_workers=1
+            )
+
+        self.assertEqual(error, "")
+        sentences = [f"Frase {k}." for k in range(seconds)]
+        self.assertEqual(translated, " ".join(sentence.upper() for sentence in sentences))
+        self.assertGreater(len(translator.texts), 1)
+        self.assertEqual(" ".join(translator.texts), " ".join(sentences))
+
+if __name__ == '__main__':
+    unittest.main()
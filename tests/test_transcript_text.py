@@ -0,0 +1,29 @@
+import unittest
+import sys
+import os
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.gui.transcript_text import timestamped_text, strip_timestamps, segment_texts
+
+class TestTranscriptText(unittest.TestCase):
+    def setUp(self):
+        self.text = timestamped_text([0.5, 75.2], ["Olá, tudo bem?", "Ação e reação"])
+
+    def test_edited_lines_map_to_segments(self):
+        self.assertEqual(self.text, "[00:00] Olá, tudo bem?\n[01:15] Ação e reação")
+        edited = self.text.replace("tudo bem", "tudo certo")
+        self.assertEqual(segment_texts(edited, 2), ["Olá, tudo certo?", "Ação e reação"])
+
+    def test_changed_structure_is_not_mapped(self):
+        merged = "[00:00] Olá, tudo bem? Ação e reação"
+        self.assertIsNone(segment_texts(merged, 2))
+        self.assertIsNone(segment_texts("Olá, tudo bem?\nAção e reação", 2))
+
+    def test_strip_timestamps(self):
+        self.assertEqual(strip_timestamps(self.text + "\nlinha livre"),
+                         "Olá, tudo bem?\nAção e reação\nlinha livre")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache.transcription_cache import TranscriptionCache, fingerprint_file
+
+class TestTranscriptionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.cache = TranscriptionCache(self.root / 'transcriptions.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_after_put(self):
+        key = TranscriptionCache.make_key('pcm:abc', 'small', options={'beam_size': 3})
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, {'language': 'en', 'segments': [{'start': 0.0, 'end': 1.0, 'text': 'hi'}]})
+        self.assertEqual(self.cache.get(key)['segments'][0]['text'], 'hi')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_depends_on_model_and_options(self):
+        base = TranscriptionCache.make_key('pcm:abc', 'small', options={'beam_size': 3})
+        self.assertNotEqual(base, TranscriptionCache.make_key('pcm:abc', 'large-v3', options={'beam_size': 3}))
+        self.assertNotEqual(base, TranscriptionCache.make_key('pcm:abc', 'small', options={'beam_size': 5}))
+        self.assertNotEqual(base, TranscriptionCache.make_key('pcm:abc', 'small', 'pt', {'beam_size': 3}))
+
+    def test_lru_eviction_keeps_recently_used(self):
+        payload = {'text': 'x' * 1000}
+        for name in ('a', 'b', 'c'):
+            self.cache.put(name, payload)
+        self.cache.get('a')  # 'a' passa a ser a mais recente
+        self.assertEqual(self.cache.evict(max_bytes=2500), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNotNone(self.cache.get('c'))
+
+    def test_file_fingerprint_is_content_based(self):
+        first, second = self.root / 'a.wav', self.root / 'b.wav'
+        first.write_bytes(b'audio' * 1000)
+        second.write_bytes(b'audio' * 1000)
+        self.assertEqual(fingerprint_file(first, chunk_size=1024), fingerprint_file(second))
+        second.write_bytes(b'audio' * 999)
+        self.assertNotEqual(fingerprint_file(first), fingerprint_file(second))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+import sys
+import os
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.translation.batching import pack_batches, join_batch, split_batch
+
+class TestTranslationBatching(unittest.TestCase):
+    def test_batches_respect_char_limit(self):
+        texts = ["x" * 40] * 10
+        batches = pack_batches(texts, max_chars=100)
+        self.assertEqual([i for batch in batches for i in batch], list(range(10)))
+        for batch in batches:
+            self.assertLessEqual(len(join_batch([texts[i] for i in batch])), 100)
+
+    def test_oversized_text_gets_own_batch(self):
+        batches = pack_batches(["a", "b" * 500, "c"], max_chars=100)
+        self.assertEqual(batches, [[0], [1], [2]])
+
+    def test_round_trip_with_internal_newlines(self):
+        texts = ["primeira linha\nainda a primeira", "segunda", "terceira"]
+        joined = join_batch(texts)
+        self.assertEqual(split_batch(joined, 3), ["primeira linha ainda a primeira", "segunda", "terceira"])
+
+    def test_split_mismatch_returns_none(self):
+        self.assertIsNone(split_batch("um\ndois", 3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache.translation_cache import TranslationCache
+
+class TestTranslationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = TranslationCache(Path(self.tmp.name) / 'translations.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_uses_languages_and_normalized_text(self):
+        self.cache.put("Hello  world ", "Olá mundo", "pt", "en")
+        self.assertEqual(self.cache.get(" Hello world", "pt", "en"), "Olá mundo")
+        self.assertIsNone(self.cache.get("Hello world", "es", "en"))
+        self.assertIsNone(self.cache.get("Hello world", "pt", "fr"))
+
+    def test_get_many_keeps_order_and_counts_hits(self):
+        self.cache.put_many([("one", "um"), ("two", "dois")], "pt", "en")
+        self.assertEqual(self.cache.get_many(["two", "three", "one", ""], "pt", "en"), ["dois", None, "um", None])
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+        self.assertAlmostEqual(stats['hit_rate'], 2 / 3)
+
+    def test_persists_between_instances(self):
+        self.cache.put("bye", "tchau", "pt", "en")
+        other = TranslationCache(self.cache.db_path)
+        self.assertEqual(other.get("bye", "pt", "en"), "tchau")
+
+    def test_evicts_least_recently_used(self):
+        self.cache.put_many([(f"text {i}", f"texto {i}") for i in range(3)], "pt", "en")
+        self.cache.get("text 0", "pt", "en")
+        entry_size = self.cache.size_bytes() // 3
+        self.cache.evict(max_bytes=entry_size * 2)
+        self.assertEqual(self.cache.get_many(["text 0", "text 1", "text 2"], "pt", "en"), ["texto 0", None, "texto 2"])
+
+    def test_put_keeps_size_under_limit(self):
+        cache = TranslationCache(Path(self.tmp.name) / 'small.db', max_size_mb=1000 / (1024 * 1024))
+        for i in range(50):
+            cache.put(f"text number {i:03d}", f"texto número {i:03d}", "pt", "en")
+        self.assertLessEqual(cache.size_bytes(), 1000)
+        self.assertEqual(cache.get("text number 049", "pt", "en"), "texto número 049")
+        self.assertIsNone(cache.get("text number 000", "pt", "en"))
+
+if __name__ == '__main__':
+    unittest.main()
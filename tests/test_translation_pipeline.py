@@ -0,0 +1,58 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.translation.pipeline import TranslationPipeline
+
+class FakeTranslator:
+    """Traduz para maiúsculas com um atraso fixo por lote"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+        self.translated = threading.Event()  # Sinalizado ao terminar o primeiro lote
+
+    def translate_batch(self, texts, target_lang, source_lang='auto', on_progress=None):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("falha na tradução")
+        self.batches.append(list(texts))
+        self.translated.set()
+        return [text.upper() for text in texts]
+
+class TestTranslationPipeline(unittest.TestCase):
+    def test_results_keep_submission_order(self):
+        translated = []
+        pipeline = TranslationPipeline(FakeTranslator(), 'pt', 'en', on_translated=translated.extend,
+                                       max_wait=0.01)
+        for i in range(10):
+            pipeline.submit([f"segmento {i}"])
+        self.assertEqual(pipeline.close(), [f"SEGMENTO {i}" for i in range(10)])
+        self.assertEqual([index for index, _ in translated], list(range(10)))
+
+    def test_translation_overlaps_producer(self):
+        """O primeiro lote é traduzido antes de o produtor enviar o último trecho"""
+        translator = FakeTranslator()
+        pipeline = TranslationPipeline(translator, 'pt', 'en', max_wait=0.0)
+        pipeline.submit(["trecho 0"])
+        # O "Whisper" ainda não terminou (nem chamou close) e a tradução já andou
+        self.assertTrue(translator.translated.wait(timeout=5))
+        for i in range(1, 5):
+            pipeline.submit([f"trecho {i}"])
+        self.assertEqual(pipeline.close(), [f"TRECHO {i}" for i in range(5)])
+        self.assertEqual(translator.batches[0], ["trecho 0"])
+
+    def test_error_is_raised_on_close(self):
+        pipeline = TranslationPipeline(FakeTranslator(fail=True), 'pt', 'en', max_wait=0.0)
+        pipeline.submit(["texto"])
+        with self.assertRaises(RuntimeError):
+            pipeline.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import hashlib
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório da API ao path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+
+from upload_store import UploadStore, UploadConflict
+
+class TestUploadStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.store = UploadStore(self.root)
+        self.data = os.urandom(1000)
+        self.upload = self.store.create(len(self.data), ".ogg", {"target_language": "pt-br"})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _put(self, start, end):
+        with self.store.open_range(self.upload["upload_id"], start, len(self.data)) as f:
+            f.write(self.data[start:end])
+
+    def test_resume_after_partial_block(self):
+        upload_id = self.upload["upload_id"]
+        self._put(0, 400)
+        self._put(400, 550)  # Conexão caiu no meio do bloco 400-799
+        self.assertEqual(self.store.get(upload_id)["offset"], 550)
+
+        with self.assertRaises(UploadConflict) as ctx:
+            self.store.open_range(upload_id, 800, len(self.data))
+        self.assertEqual(ctx.exception.offset, 550)
+
+        self._put(550, 1000)
+        destination = self.root / "final.ogg"
+        upload = self.store.finalize(upload_id, hashlib.sha256(self.data).hexdigest(), destination)
+        self.assertEqual(destination.read_bytes(), self.data)
+        self.assertEqual(upload["options"], {"target_language": "pt-br"})
+        self.assertIsNone(self.store.get(upload_id))
+
+    def test_resent_block_overwrites_tail(self):
+        self._put(0, 600)
+        self._put(400, 1000)  # Reenvio de um bloco cuja resposta se perdeu
+        self.store.finalize(self.upload["upload_id"], hashlib.sha256(self.data).hexdigest(), self.root / "out")
+        self.assertEqual((self.root / "out").read_bytes(), self.data)
+
+    def test_incomplete_or_wrong_hash_rejected(self):
+        upload_id = self.upload["upload_id"]
+        self._put(0, 500)
+        with self.assertRaises(UploadConflict):
+            self.store.finalize(upload_id, "", self.root / "out")
+        self._put(500, 1000)
+        with self.assertRaises(ValueError):
+            self.store.finalize(upload_id, "0" * 64, self.root / "out")
+        self.assertIsNone(self.store.get(upload_id))
+
+    def test_rejects_invalid_ids(self):
+        self.assertIsNone(self.store.get("../../etc/passwd"))
+        with self.assertRaises(KeyError):
+            self.store.open_range("../x", 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Adicionar diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio_processing.vad_engine import BatchedVAD, probs_to_regions, SAMPLE_RATE, WINDOW_SAMPLES
+
+class EnergySession:
+    """Substituto da sessão ONNX: 'fala' é qualquer janela com amplitude alta"""
+    def __init__(self):
+        self.batch_sizes = []
+
+    def run(self, _, inputs):
+        x = inputs['input']
+        self.batch_sizes.append(x.shape[0])
+        probs = (np.abs(x[:, 64:]).mean(axis=1, keepdims=True) > 0.1).astype(np.float32)
+        return probs, inputs['state']
+
+def make_engine():
+    engine = BatchedVAD.__new__(BatchedVAD)
+    engine.session = EnergySession()
+    engine._sr = np.array(SAMPLE_RATE, dtype=np.int64)
+    engine.reset_stats()
+    return engine
+
+class TestBatchedVAD(unittest.TestCase):
+    def test_batch_shrinks_as_streams_finish(self):
+        """Streams curtos saem do batch e os resultados voltam na ordem original"""
+        engine = make_engine()
+        short = np.ones(WINDOW_SAMPLES * 2, dtype=np.float32)
+        long = np.zeros(WINDOW_SAMPLES * 4, dtype=np.float32)
+
+        probs = engine.speech_probs([short, long])
+        self.assertEqual(engine.session.batch_sizes, [2, 2, 1, 1])
+        self.assertEqual(list(probs[0]), [1.0, 1.0])
+        self.assertEqual(list(probs[1]), [0.0] * 4)
+        self.assertGreater(engine.stats['audio_seconds'], 0)
+
+    def test_long_audio_slices_match_single_stream(self):
+        """Fatias paralelas com aquecimento reproduzem as probabilidades contínuas"""
+        engine = make_engine()
+        audio = np.zeros(SAMPLE_RATE * 60, dtype=np.float32)
+        audio[SAMPLE_RATE * 20:SAMPLE_RATE * 25] = 1.0
+
+        sliced = engine.long_audio_probs(audio, num_slices=4, warmup_seconds=1.0)
+        single = engine.speech_probs([audio])[0]
+        np.testing.assert_array_equal(sliced, single)
+
+    def test_probs_to_regions(self):
+        probs = np.zeros(100, dtype=np.float32)
+        probs[10:40] = 0.9
+        regions = probs_to_regions(probs, 100 * WINDOW_SAMPLES, speech_pad_ms=0)
+        self.assertEqual(len(regions), 1)
+        self.assertAlmostEqual(regions[0]['start'], 10 * WINDOW_SAMPLES / SAMPLE_RATE)
+        self.assertAlmostEqual(regions[0]['end'], 40 * WINDOW_SAMPLES / SAMPLE_RATE)
+
+if __name__ == '__main__':
+    unittest.main()